@@ -0,0 +1,71 @@
+"""Diff two benchmark result files written by run.py.
+
+Usage:
+  python benchmarks/compare.py OLD.json NEW.json [--threshold 1.2] [--metric median]
+                                                [--rss-threshold 1.2]
+
+Prints the NEW/OLD time ratio for every (generation, size, operation, mode)
+present in both files, and the peak RSS ratio where both have one
+(subprocess runs), and exits with status 1 if any time ratio exceeds
+`--threshold` or any RSS ratio exceeds `--rss-threshold`, so it can gate a
+CI job.
+"""
+from __future__ import annotations
+
+import argparse
+import json
+import sys
+
+
+def load(path: str):
+    with open(path, "r", encoding="utf-8") as f:
+        doc = json.load(f)
+    return doc["meta"], {(r["generation"], r["size"], r["op"], r["mode"]): r for r in doc["results"]}
+
+
+def main(argv=None) -> int:
+    p = argparse.ArgumentParser(description="Compare two benchmark result files")
+    p.add_argument("old")
+    p.add_argument("new")
+    p.add_argument("--threshold", type=float, default=1.2, help="flag ratios above this (default: 1.2)")
+    p.add_argument("--metric", choices=["median", "min", "first"], default="median")
+    p.add_argument("--rss-threshold", type=float, default=1.2,
+                   help="flag peak RSS ratios above this (default: 1.2)")
+    args = p.parse_args(argv)
+
+    old_meta, old = load(args.old)
+    new_meta, new = load(args.new)
+    print(f"old: {old_meta.get('commit')} ({old_meta.get('timestamp')})")
+    print(f"new: {new_meta.get('commit')} ({new_meta.get('timestamp')})")
+    print(f"{'generation':<8} {'size':>8} {'operation':<24} {'mode':<10} {'old':>8} {'new':>8} {'ratio':>6} "
+          f"{'old RSS':>9} {'new RSS':>9} {'ratio':>6}")
+    regressions = 0
+    for key in sorted(old.keys() & new.keys(), key=lambda k: (k[0], k[1], k[2], k[3])):
+        before, after = old[key][args.metric], new[key][args.metric]
+        ratio = after / before if before else float("inf")
+        flags = []
+        if ratio > args.threshold:
+            flags.append("REGRESSION")
+        rss_cols = f"{'-':>9} {'-':>9} {'-':>6}"
+        rss_before, rss_after = old[key].get("peak_rss_kb"), new[key].get("peak_rss_kb")
+        if rss_before and rss_after:
+            rss_ratio = rss_after / rss_before
+            rss_cols = f"{rss_before / 1024:>5.0f} MiB {rss_after / 1024:>5.0f} MiB {rss_ratio:>6.2f}"
+            if rss_ratio > args.rss_threshold:
+                flags.append("RSS REGRESSION")
+        regressions += len(flags)
+        gen, size, op, mode = key
+        flag = "".join("  " + f for f in flags)
+        print(f"{gen:<8} {size:>8} {op:<24} {mode:<10} {before:>8.3f} {after:>8.3f} {ratio:>6.2f} {rss_cols}{flag}")
+    missing = sorted(old.keys() ^ new.keys())
+    if missing:
+        print(f"{len(missing)} result(s) only in one file (different sizes/generations?)")
+    if regressions:
+        print(f"{regressions} regression(s) above {args.threshold:.2f}x (time) or "
+              f"{args.rss_threshold:.2f}x (peak RSS)", file=sys.stderr)
+        return 1
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
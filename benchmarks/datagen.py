@@ -0,0 +1,114 @@
+"""Synthetic data for the benchmark suite.
+
+Tag, category and (for tasks5) user popularity follow a Zipf-like skew, the
+way real task lists have a few tags on most tasks and a long tail of rare
+ones. Everything is seeded, so a given size always produces the same file.
+
+- `todo_tasks(n)` yields tasks in the tasks1/tasks2/tasks3 JSON format
+  (`with_category=False` drops the field tasks1 doesn't have).
+- `tasks5_document(n)` builds a tasks5 data document, with the lookup index
+  JsonEngine would maintain so reads don't pay for a rebuild.
+- `paragraphs(n)` builds a tasks4 input text.
+"""
+from __future__ import annotations
+
+import bisect
+import itertools
+import json
+import os
+import random
+import sys
+from typing import Dict, Iterator, List, Sequence
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+VERBS = ["buy", "read", "clean", "write", "call", "email", "fix", "plan", "review", "pay",
+         "book", "pick up", "return", "schedule", "update", "order", "file", "water"]
+NOUNS = ["groceries", "report", "kitchen", "invoice", "dentist", "garden", "slides", "laundry",
+         "car", "rent", "tickets", "notes", "budget", "backup", "homework", "parcel", "plants"]
+CATEGORIES = ["household", "schoolwork", "errands", "work", "general", "health", "finance",
+              "social", "garden", "travel", "admin", "hobby"]
+TAGS = [f"tag{i}" for i in range(500)]
+
+# tags/queries the suite filters on: the most popular tag and a mid-frequency word
+HOT_TAG = TAGS[0]
+HOT_CATEGORY = CATEGORIES[0]
+SEARCH_QUERY = "invoice"
+
+
+class Zipf:
+    """Draw items from `items` with weight 1/rank**s."""
+
+    def __init__(self, items: Sequence, s: float = 1.1):
+        self.items = list(items)
+        self.cum = list(itertools.accumulate(1.0 / (r ** s) for r in range(1, len(self.items) + 1)))
+
+    def __call__(self, rng: random.Random):
+        return self.items[bisect.bisect_left(self.cum, rng.random() * self.cum[-1])]
+
+
+def todo_tasks(n: int, seed: int = 0, with_category: bool = True) -> Iterator[Dict]:
+    rng = random.Random(seed)
+    tag = Zipf(TAGS)
+    category = Zipf(CATEGORIES, s=0.8)
+    for i in range(1, n + 1):
+        tags = sorted({tag(rng) for _ in range(rng.choice((0, 1, 1, 2, 2, 3, 4)))})
+        task = {
+            "id": i,
+            "title": f"{rng.choice(VERBS)} {rng.choice(NOUNS)} #{i}",
+            "created": f"2025-{rng.randint(1, 12):02d}-{rng.randint(1, 28):02d}T"
+                       f"{rng.randint(0, 23):02d}:{rng.randint(0, 59):02d}:{rng.randint(0, 59):02d}."
+                       f"{rng.randint(0, 999999):06d}Z",
+            "tags": tags,
+        }
+        if with_category:
+            task["category"] = category(rng)
+        task["done"] = rng.random() < 0.3
+        yield task
+
+
+def write_todo_file(path: str, n: int, with_category: bool = True) -> None:
+    with open(path, "w", encoding="utf-8") as f:
+        json.dump(list(todo_tasks(n, with_category=with_category)), f)
+
+
+def tasks5_document(n: int, users: int = 200, seed: int = 0) -> Dict:
+    """`n` tasks spread over `users` users (user u0 has the most)."""
+    rng = random.Random(seed)
+    user_ids = [f"u{i}" for i in range(users)]
+    owner = Zipf(user_ids, s=1.0)
+    category = Zipf(CATEGORIES, s=0.8)
+    tasks = []
+    for i in range(n):
+        tasks.append({
+            "id": f"t{i:07d}",
+            "user_id": owner(rng),
+            "title": f"{rng.choice(VERBS)} {rng.choice(NOUNS)}",
+            "due_date": f"{rng.choice((2025, 2026))}-{rng.randint(1, 12):02d}-{rng.randint(1, 28):02d}",
+            "category": category(rng) if rng.random() < 0.8 else None,
+            "created_at": "2025-01-01T00:00:00Z",
+        })
+    data = {"users": [{"id": u, "display_name": f"User {u}"} for u in user_ids], "tasks": tasks}
+    sys.path.insert(0, os.path.join(ROOT, "tasks5"))
+    try:
+        from src import index
+    finally:
+        sys.path.pop(0)
+    data["index"] = index.build(data)
+    return data
+
+
+def write_tasks5_file(path: str, n: int) -> Dict:
+    data = tasks5_document(n)
+    with open(path, "w", encoding="utf-8") as f:
+        json.dump(data, f)
+    return data
+
+
+def paragraphs(n: int, seed: int = 0) -> str:
+    rng = random.Random(seed)
+    out: List[str] = []
+    for _ in range(n):
+        words = [rng.choice(VERBS + NOUNS + CATEGORIES) for _ in range(rng.randint(20, 60))]
+        out.append(" ".join(words).capitalize() + ".")
+    return "\n\n".join(out)
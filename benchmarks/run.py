@@ -0,0 +1,374 @@
+"""Benchmark suite for every CLI generation (tasks1-tasks5).
+
+Usage (from the repository root):
+  python benchmarks/run.py [--sizes 10k,100k,1m] [--generations tasks1,tasks3]
+                           [--modes inproc,subprocess] [--repeat 3] [--out FILE]
+
+For each generation and store size it generates a synthetic data file (see
+`datagen.py`) and times the CLI operations that generation has -- `add`,
+`list`, `list --tags`, `search`, `recommend` for the todo CLIs, `list-tasks`,
+`add-task` and `remove-task` for tasks5, an offline summarize run for tasks4:
+
+- inproc: the generation's `main(argv)` called in this process (stdout
+  discarded), which isolates the work from interpreter start-up;
+- subprocess: a fresh interpreter per run, as a user would invoke it, with
+  that child's peak RSS read back from `wait4`.
+
+On Linux a child's peak RSS starts at its parent's RSS at fork time, so
+each measured command is started by a tiny launcher interpreter rather
+than by this harness, and every mode runs in a harness process of its own.
+Peak RSS is only reported for subprocess runs; in-process it would be the
+harness's running high-water mark, not the operation's.
+
+Each operation runs `--repeat` times. Sidecar files (indexes, journals) are
+removed before the first run, so `first` is the cold time and later runs
+are warm; operations that change the data get a fresh copy every run.
+Results go to `benchmarks/results/<timestamp>-<commit>.json` (or `--out`);
+compare two runs with `python benchmarks/compare.py OLD.json NEW.json`.
+"""
+from __future__ import annotations
+
+import argparse
+import contextlib
+import importlib.util
+import json
+import os
+import platform
+import shutil
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+from dataclasses import dataclass
+from typing import Callable, Dict, List, Optional
+
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+import datagen  # noqa: E402
+from datagen import HOT_CATEGORY, HOT_TAG, ROOT, SEARCH_QUERY  # noqa: E402
+
+
+@dataclass
+class Op:
+    name: str
+    argv: Callable[[Dict], List[str]]
+    mutates: bool = False
+
+
+def _todo_ops(with_category: bool, recommend: bool) -> List[Op]:
+    cat = ["--category", "work"] if with_category else []
+    ops = [
+        Op("add", lambda c: ["--file", c["file"], "add", "benchmark task", "--tags", "a,b"] + cat, True),
+        Op("list", lambda c: ["--file", c["file"], "list"]),
+        Op("list --tags", lambda c: ["--file", c["file"], "list", "--tags", HOT_TAG]),
+        Op("search", lambda c: ["--file", c["file"], "search", SEARCH_QUERY]),
+    ]
+    if recommend:
+        ops.append(Op("recommend", lambda c: ["--file", c["file"], "recommend", "5", "--category", HOT_CATEGORY]))
+    return ops
+
+
+def _load_script(name: str, path: str):
+    spec = importlib.util.spec_from_file_location(name, path)
+    module = importlib.util.module_from_spec(spec)
+    sys.modules[name] = module  # dataclasses look their module up here
+    spec.loader.exec_module(module)
+    return module
+
+
+def _load_package(src_dir: str, name: str):
+    if src_dir not in sys.path:
+        sys.path.insert(0, src_dir)
+    return importlib.import_module(name)
+
+
+class Generation:
+    """How to set up data for, and invoke, one CLI generation."""
+
+    name = ""
+    ops: List[Op] = []
+    cwd = ROOT
+
+    def setup(self, workdir: str, size: int) -> Dict:
+        raise NotImplementedError
+
+    def command(self, argv: List[str]) -> List[str]:
+        raise NotImplementedError
+
+    def env(self, ctx: Dict) -> Dict[str, str]:
+        return {}
+
+    def module(self):
+        raise NotImplementedError
+
+    def call(self, ctx: Dict, argv: List[str]) -> int:
+        return self.module().main(argv)
+
+
+class TodoScript(Generation):
+    def __init__(self, name: str, with_category: bool, recommend: bool):
+        self.name = name
+        self.with_category = with_category
+        self.ops = _todo_ops(with_category, recommend)
+        self.script = os.path.join(ROOT, name, "todo.py")
+        self._module = None
+
+    def setup(self, workdir, size):
+        path = os.path.join(workdir, "tasks.json")
+        datagen.write_todo_file(path, size, with_category=self.with_category)
+        return {"file": path, "data": [path]}
+
+    def command(self, argv):
+        return [sys.executable, self.script] + argv
+
+    def module(self):
+        if self._module is None:
+            self._module = _load_script(f"bench_{self.name}_todo", self.script)
+        return self._module
+
+
+class Tasks3(TodoScript):
+    def __init__(self):
+        super().__init__("tasks3", with_category=True, recommend=True)
+        self.src = os.path.join(ROOT, "tasks3", "src")
+
+    def command(self, argv):
+        return [sys.executable, "-c",
+                f"import sys; sys.path.insert(0, {self.src!r}); import tasks3; sys.exit(tasks3.main())"] + argv
+
+    def module(self):
+        return _load_package(self.src, "tasks3")
+
+
+class Tasks4(Generation):
+    name = "tasks4"
+    ops = [Op("summarize (extractive)", lambda c: [c["file"], "--backend", "extractive"])]
+
+    def __init__(self):
+        self.src = os.path.join(ROOT, "tasks4", "src")
+
+    def setup(self, workdir, size):
+        path = os.path.join(workdir, "input.txt")
+        with open(path, "w", encoding="utf-8") as f:
+            f.write(datagen.paragraphs(max(size // 10, 1)))
+        return {"file": path, "data": [path]}
+
+    def command(self, argv):
+        return [sys.executable, "-c",
+                f"import sys; sys.path.insert(0, {self.src!r}); import tasks4; sys.exit(tasks4.main())"] + argv
+
+    def module(self):
+        return _load_package(self.src, "tasks4")
+
+
+class Tasks5(Generation):
+    name = "tasks5"
+    cwd = os.path.join(ROOT, "tasks5")
+    ops = [
+        Op("list-tasks", lambda c: ["list-tasks", c["user"]]),
+        Op("list-tasks --limit 20", lambda c: ["list-tasks", c["user"], "--from", "2026-01-01", "--limit", "20"]),
+        Op("add-task", lambda c: ["add-task", c["user"], "--title", "benchmark", "--due", "2025-06-01"], True),
+        Op("remove-task", lambda c: ["remove-task", c["user"], c["task"]], True),
+    ]
+
+    def setup(self, workdir, size):
+        path = os.path.join(workdir, "tasks.json")
+        data = datagen.write_tasks5_file(path, size)
+        task = data["index"]["by_user"]["u0"]["ids"][0]
+        return {"file": path, "data": [path], "user": "u0", "task": task}
+
+    def command(self, argv):
+        return [sys.executable, "-m", "src.cli"] + argv
+
+    def env(self, ctx):
+        return {"TASKS_FILE": ctx["file"]}
+
+    def module(self):
+        return _load_package(self.cwd, "src.cli")
+
+
+GENERATIONS = {g.name: g for g in (
+    TodoScript("tasks1", with_category=False, recommend=False),
+    TodoScript("tasks2", with_category=True, recommend=True),
+    Tasks3(),
+    Tasks4(),
+    Tasks5(),
+)}
+
+
+def _rss_kb(ru_maxrss: int) -> int:
+    # ru_maxrss is in kilobytes on Linux and bytes on macOS
+    return ru_maxrss // 1024 if sys.platform == "darwin" else ru_maxrss
+
+
+def _reset(ctx: Dict, pristine: Dict[str, str], full: bool) -> None:
+    """Drop sidecars next to the data files; with `full`, restore the data too."""
+    for path in ctx["data"]:
+        directory, base = os.path.split(path)
+        for name in os.listdir(directory):
+            if name.startswith(base + "."):
+                os.remove(os.path.join(directory, name))
+        if full:
+            shutil.copyfile(pristine[path], path)
+
+
+# Runs argv[1:] with stdio on /dev/null and prints "<exit code> <ru_maxrss>
+# <seconds>" for it. A forked child inherits its parent's RSS high-water mark,
+# so the parent doing the fork has to be this small, not the harness.
+_LAUNCHER = """
+import os, sys, time
+start = time.perf_counter()
+pid = os.fork()
+if pid == 0:
+    null = os.open(os.devnull, os.O_RDWR)
+    for fd in (0, 1, 2):
+        os.dup2(null, fd)
+    try:
+        os.execvp(sys.argv[1], sys.argv[1:])
+    finally:
+        os._exit(127)
+_, status, usage = os.wait4(pid, 0)
+print(os.waitstatus_to_exitcode(status), usage.ru_maxrss, time.perf_counter() - start)
+"""
+
+
+def run_inproc(gen: Generation, ctx: Dict, argv: List[str]) -> Dict:
+    env = gen.env(ctx)
+    saved = {k: os.environ.get(k) for k in env}
+    os.environ.update(env)
+    cwd = os.getcwd()
+    os.chdir(gen.cwd)
+    try:
+        with open(os.devnull, "w") as devnull, contextlib.redirect_stdout(devnull), \
+                contextlib.redirect_stderr(devnull):
+            start = time.perf_counter()
+            code = gen.call(ctx, argv)
+            elapsed = time.perf_counter() - start
+    finally:
+        os.chdir(cwd)
+        for k, v in saved.items():
+            if v is None:
+                os.environ.pop(k, None)
+            else:
+                os.environ[k] = v
+    return {"seconds": elapsed, "code": code, "rss_kb": None}
+
+
+def run_subprocess(gen: Generation, ctx: Dict, argv: List[str]) -> Dict:
+    env = dict(os.environ, **gen.env(ctx))
+    if not hasattr(os, "fork"):  # pragma: no cover - Windows
+        start = time.perf_counter()
+        code = subprocess.call(gen.command(argv), cwd=gen.cwd, env=env,
+                               stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+        return {"seconds": time.perf_counter() - start, "code": code, "rss_kb": None}
+    # -S: no site module, to keep the launcher (and so the floor it sets) small
+    out = subprocess.run([sys.executable, "-S", "-c", _LAUNCHER] + gen.command(argv), cwd=gen.cwd,
+                         env=env, check=True, stdout=subprocess.PIPE, text=True).stdout
+    code, maxrss, elapsed = out.split()
+    return {"seconds": float(elapsed), "code": int(code), "rss_kb": _rss_kb(int(maxrss))}
+
+
+RUNNERS = {"inproc": run_inproc, "subprocess": run_subprocess}
+
+
+def parse_size(text: str) -> int:
+    text = text.strip().lower()
+    scale = {"k": 1_000, "m": 1_000_000}.get(text[-1:], 1)
+    return int(float(text.rstrip("km")) * scale)
+
+
+def git_commit() -> Optional[str]:
+    try:
+        return subprocess.run(["git", "rev-parse", "--short", "HEAD"], cwd=ROOT, check=True,
+                              stdout=subprocess.PIPE, stderr=subprocess.DEVNULL, text=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def main(argv=None) -> int:
+    p = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    p.add_argument("--sizes", default="10k,100k", help="comma-separated store sizes (default: 10k,100k)")
+    p.add_argument("--generations", default=",".join(GENERATIONS))
+    p.add_argument("--modes", default="inproc,subprocess")
+    p.add_argument("--repeat", type=int, default=3)
+    p.add_argument("--out", help="results file (default: benchmarks/results/<timestamp>-<commit>.json)")
+    args = p.parse_args(argv)
+
+    sizes = [parse_size(s) for s in args.sizes.split(",")]
+    gens = [GENERATIONS[g] for g in args.generations.split(",")]
+    modes = args.modes.split(",")
+    commit = git_commit()
+    if len(modes) > 1:
+        results = _run_modes_apart(argv if argv is not None else sys.argv[1:], modes)
+    else:
+        results = run_suite(gens, sizes, modes[0], args.repeat)
+
+    out = args.out
+    if out is None:
+        stamp = time.strftime("%Y%m%d-%H%M%S")
+        out = os.path.join(ROOT, "benchmarks", "results", f"{stamp}-{commit or 'nogit'}.json")
+    os.makedirs(os.path.dirname(os.path.abspath(out)), exist_ok=True)
+    meta = {
+        "commit": commit, "timestamp": time.strftime("%Y-%m-%dT%H:%M:%S%z"),
+        "python": platform.python_version(), "platform": platform.platform(),
+        "repeat": args.repeat, "sizes": sizes,
+    }
+    with open(out, "w", encoding="utf-8") as f:
+        json.dump({"meta": meta, "results": results}, f, indent=2)
+    print(f"results written to {out}")
+    return 0
+
+
+def _run_modes_apart(argv: List[str], modes: List[str]) -> List[Dict]:
+    """Run this script once per mode, so no mode runs in a harness that
+    another mode has already grown, and collect their results."""
+    results = []
+    with tempfile.TemporaryDirectory(prefix="bench-modes-") as tmp:
+        for mode in modes:
+            out = os.path.join(tmp, f"{mode}.json")
+            subprocess.run([sys.executable, os.path.abspath(__file__)] + argv +
+                           ["--modes", mode, "--out", out], check=True)
+            with open(out, "r", encoding="utf-8") as f:
+                results.extend(json.load(f)["results"])
+    results.sort(key=lambda r: (r["generation"], r["size"], r["op"], r["mode"]))
+    return results
+
+
+def run_suite(gens: List[Generation], sizes: List[int], mode: str, repeat: int) -> List[Dict]:
+    """Time every operation of `gens` at each size in `mode`."""
+    results = []
+    print(f"{'generation':<8} {'size':>8} {'operation':<24} {'mode':<10} {'first':>8} {'median':>8} "
+          f"{'min':>8} {'peak RSS':>10}")
+    for gen in gens:
+        for size in sizes:
+            with tempfile.TemporaryDirectory(prefix=f"bench-{gen.name}-") as workdir:
+                ctx = gen.setup(workdir, size)
+                pristine = {}
+                for path in ctx["data"]:
+                    pristine[path] = os.path.join(workdir, "pristine-" + os.path.basename(path))
+                    shutil.copyfile(path, pristine[path])
+                for op in gen.ops:
+                    _reset(ctx, pristine, full=True)
+                    samples = []
+                    for _ in range(repeat):
+                        if op.mutates:
+                            _reset(ctx, pristine, full=True)
+                        samples.append(RUNNERS[mode](gen, ctx, op.argv(ctx)))
+                    times = [s["seconds"] for s in samples]
+                    rss = [s["rss_kb"] for s in samples if s["rss_kb"] is not None]
+                    row = {
+                        "generation": gen.name, "size": size, "op": op.name, "mode": mode,
+                        "samples": times, "first": times[0], "median": statistics.median(times),
+                        "min": min(times), "peak_rss_kb": max(rss) if rss else None,
+                        "exit_codes": sorted({s["code"] for s in samples}),
+                    }
+                    results.append(row)
+                    peak = f"{row['peak_rss_kb'] / 1024:.0f} MiB" if rss else "-"
+                    print(f"{gen.name:<8} {size:>8} {op.name:<24} {mode:<10} {row['first']:>8.3f} "
+                          f"{row['median']:>8.3f} {row['min']:>8.3f} {peak:>10}", flush=True)
+    return results
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
@@ -6,7 +6,9 @@ Usage:
   python todo.py list [--all] [--tags tag]
   python todo.py search "query"
 
-Tasks stored in `tasks.json` next to this script by default.
+Tasks stored in `tasks.json` next to this script by default. `search` keeps
+a trigram index of titles and tags in a `tasks.json.idx` sidecar, rebuilt
+automatically whenever `tasks.json` changes behind its back.
 """
 from __future__ import annotations
 
@@ -15,8 +17,7 @@ import json
 import os
 import sys
 from dataclasses import dataclass, asdict
-from datetime import datetime
-from typing import List, Optional
+from typing import Dict, List, Optional, Set
 
 
 DEFAULT_DATA_FILE = os.path.join(os.path.dirname(__file__), "tasks.json")
@@ -50,6 +51,71 @@ def save_tasks(path: str, tasks: List[Task]) -> None:
         json.dump([asdict(t) for t in tasks], f, indent=2, ensure_ascii=False)
 
 
+def index_path(path: str) -> str:
+    return path + ".idx"
+
+
+def _file_stamp(path: str) -> Optional[List[int]]:
+    try:
+        st = os.stat(path)
+    except FileNotFoundError:
+        return None
+    return [st.st_mtime_ns, st.st_size]
+
+
+def _trigrams(text: str) -> Set[str]:
+    text = text.lower()
+    return {text[i:i + 3] for i in range(len(text) - 2)}
+
+
+def index_task(postings: Dict[str, List[int]], t: Task) -> None:
+    grams = _trigrams(t.title)
+    for tag in t.tags:
+        grams |= _trigrams(tag)
+    for g in grams:
+        postings.setdefault(g, []).append(t.id)
+
+
+def build_index(tasks: List[Task]) -> Dict[str, List[int]]:
+    postings: Dict[str, List[int]] = {}
+    for t in tasks:
+        index_task(postings, t)
+    return postings
+
+
+def load_index(path: str) -> Optional[Dict[str, List[int]]]:
+    """Return the trigram postings for `path` if the sidecar is still fresh."""
+    try:
+        with open(index_path(path), "r", encoding="utf-8") as f:
+            data = json.load(f)
+    except (FileNotFoundError, json.JSONDecodeError):
+        return None
+    if data.get("stamp") != _file_stamp(path):
+        return None
+    return data["postings"]
+
+
+def save_index(path: str, postings: Dict[str, List[int]]) -> None:
+    data = {"stamp": _file_stamp(path), "postings": postings}
+    # write then replace, so a crash mid-write never leaves a torn sidecar
+    tmp = index_path(path) + ".tmp"
+    with open(tmp, "w", encoding="utf-8") as f:
+        json.dump(data, f, ensure_ascii=False, separators=(",", ":"))
+    os.replace(tmp, index_path(path))
+
+
+def search_candidates(postings: Dict[str, List[int]], q: str) -> Optional[Set[int]]:
+    """Ids sharing every trigram of `q`; None if `q` is under three characters."""
+    grams = _trigrams(q)
+    if not grams:
+        return None
+    lists = sorted((postings.get(g, []) for g in grams), key=len)
+    result = set(lists[0])
+    for ids in lists[1:]:
+        result.intersection_update(ids)
+    return result
+
+
 def next_id(tasks: List[Task]) -> int:
     if not tasks:
         return 1
@@ -57,12 +123,18 @@ def next_id(tasks: List[Task]) -> int:
 
 
 def cmd_add(args: argparse.Namespace) -> int:
+    from datetime import datetime
+
     tasks = load_tasks(args.file)
     tid = next_id(tasks)
     tags = [t.strip() for t in args.tags.split(",")] if args.tags else []
     t = Task(id=tid, title=args.title, created=datetime.utcnow().isoformat() + "Z", tags=tags)
     tasks.append(t)
+    postings = load_index(args.file)
     save_tasks(args.file, tasks)
+    if postings is not None:
+        index_task(postings, t)
+        save_index(args.file, postings)
     print(f"Added task {t.id}: {t.title}")
     return 0
 
@@ -92,6 +164,14 @@ def cmd_list(args: argparse.Namespace) -> int:
 def cmd_search(args: argparse.Namespace) -> int:
     tasks = load_tasks(args.file)
     q = args.query.lower()
+    postings = load_index(args.file)
+    if postings is None:
+        postings = build_index(tasks)
+        if os.path.exists(args.file):
+            save_index(args.file, postings)
+    cands = search_candidates(postings, q)
+    if cands is not None:
+        tasks = [t for t in tasks if t.id in cands]
     matches = [t for t in tasks if q in t.title.lower() or any(q in tag.lower() for tag in t.tags)]
     if not matches:
         print("No matches found.")
@@ -101,31 +181,62 @@ def cmd_search(args: argparse.Namespace) -> int:
     return 0
 
 
-def build_parser() -> argparse.ArgumentParser:
-    p = argparse.ArgumentParser(description="Simple JSON-backed todo CLI")
-    p.add_argument("--file", "-f", default=DEFAULT_DATA_FILE, help="tasks JSON file")
-    sub = p.add_subparsers(dest="cmd")
-
-    pa = sub.add_parser("add", help="Add a new task")
+def _add_args(pa: argparse.ArgumentParser) -> None:
     pa.add_argument("title", help="Task title")
     pa.add_argument("--tags", help="Comma-separated tags", default="")
     pa.set_defaults(func=cmd_add)
 
-    pl = sub.add_parser("list", help="List tasks")
+
+def _list_args(pl: argparse.ArgumentParser) -> None:
     pl.add_argument("--all", action="store_true", help="Include completed tasks")
     pl.add_argument("--tags", help="Filter by comma-separated tags")
     pl.set_defaults(func=cmd_list)
 
-    ps = sub.add_parser("search", help="Search tasks by text or tag")
+
+def _search_args(ps: argparse.ArgumentParser) -> None:
     ps.add_argument("query", help="Search query")
     ps.set_defaults(func=cmd_search)
 
+
+# subcommand -> (help, function adding its arguments)
+SUBCOMMANDS = {
+    "add": ("Add a new task", _add_args),
+    "list": ("List tasks", _list_args),
+    "search": ("Search tasks by text or tag", _search_args),
+}
+
+
+def build_parser(command: Optional[str] = None) -> argparse.ArgumentParser:
+    """The CLI's parser; with `command`, only that subcommand gets its arguments."""
+    p = argparse.ArgumentParser(description="Simple JSON-backed todo CLI")
+    p.add_argument("--file", "-f", default=DEFAULT_DATA_FILE, help="tasks JSON file")
+    sub = p.add_subparsers(dest="cmd")
+    for name, (help_text, add_args) in SUBCOMMANDS.items():
+        if command is None or name == command:
+            add_args(sub.add_parser(name, help=help_text))
+        else:
+            sub.add_parser(name, help=help_text, add_help=False)
     return p
 
 
+def _command_in(argv: List[str]) -> Optional[str]:
+    """The subcommand `argv` names, or None if it names none or asks for help."""
+    args = iter(argv)
+    for arg in args:
+        if arg in ("-h", "--help"):
+            return None
+        if arg.startswith("-"):
+            # --file/-f take a value; argparse also accepts prefixes such as --fi
+            if arg == "-f" or (arg.startswith("--") and "--file".startswith(arg)):
+                next(args, None)
+            continue
+        return arg if arg in SUBCOMMANDS else None
+    return None
+
+
 def main(argv: Optional[List[str]] = None) -> int:
     argv = argv if argv is not None else sys.argv[1:]
-    parser = build_parser()
+    parser = build_parser(_command_in(argv))
     args = parser.parse_args(argv)
     if not hasattr(args, "func"):
         parser.print_help()
@@ -5,8 +5,12 @@ Usage:
   python todo.py add "Task title" --tags tag1,tag2
   python todo.py list [--all] [--tags tag]
   python todo.py search "query"
+  python todo.py recommend 3 --strategy oldest --seed 7
 
-Tasks stored in `tasks.json` next to this script by default.
+Tasks stored in `tasks.json` next to this script by default. `search` keeps
+a trigram index of titles and tags in a `tasks.json.idx` sidecar, and
+`list`/`recommend` keep tag/category/done bitsets in `tasks.json.bits`; both
+are rebuilt automatically whenever `tasks.json` changes behind their back.
 """
 from __future__ import annotations
 
@@ -15,9 +19,7 @@ import json
 import os
 import sys
 from dataclasses import dataclass, asdict
-from datetime import datetime
-import random
-from typing import List, Optional
+from typing import Callable, Dict, List, Optional, Set, Tuple
 
 
 DEFAULT_DATA_FILE = os.path.join(os.path.dirname(__file__), "tasks.json")
@@ -47,9 +49,196 @@ def load_tasks(path: str) -> List[Task]:
     return tasks
 
 
-def save_tasks(path: str, tasks: List[Task]) -> None:
+def save_tasks(path: str, tasks: List[Task]) -> List[int]:
+    """Write `tasks` to `path`; return the stamp of exactly what was written."""
     with open(path, "w", encoding="utf-8") as f:
         json.dump([asdict(t) for t in tasks], f, indent=2, ensure_ascii=False)
+        f.flush()
+        st = os.fstat(f.fileno())
+    return [st.st_mtime_ns, st.st_size]
+
+
+def index_path(path: str) -> str:
+    return path + ".idx"
+
+
+def _file_stamp(path: str) -> Optional[List[int]]:
+    try:
+        st = os.stat(path)
+    except FileNotFoundError:
+        return None
+    return [st.st_mtime_ns, st.st_size]
+
+
+def _trigrams(text: str) -> Set[str]:
+    text = text.lower()
+    return {text[i:i + 3] for i in range(len(text) - 2)}
+
+
+def index_task(postings: Dict[str, List[int]], t: Task) -> None:
+    grams = _trigrams(t.title)
+    for tag in t.tags:
+        grams |= _trigrams(tag)
+    for g in grams:
+        postings.setdefault(g, []).append(t.id)
+
+
+def build_index(tasks: List[Task]) -> Dict[str, List[int]]:
+    postings: Dict[str, List[int]] = {}
+    for t in tasks:
+        index_task(postings, t)
+    return postings
+
+
+def load_index(path: str, stamp: Optional[List[int]]) -> Optional[Dict[str, List[int]]]:
+    """Return the trigram postings for `path` if the sidecar was saved for
+    the file with `stamp` (the one the caller read)."""
+    try:
+        with open(index_path(path), "r", encoding="utf-8") as f:
+            data = json.load(f)
+    except (FileNotFoundError, json.JSONDecodeError):
+        return None
+    if stamp is None or data.get("stamp") != stamp:
+        return None
+    return data["postings"]
+
+
+def save_index(path: str, postings: Dict[str, List[int]], stamp: List[int]) -> None:
+    data = {"stamp": stamp, "postings": postings}
+    # write then replace, so a crash mid-write never leaves a torn sidecar
+    tmp = index_path(path) + ".tmp"
+    with open(tmp, "w", encoding="utf-8") as f:
+        json.dump(data, f, ensure_ascii=False, separators=(",", ":"))
+    os.replace(tmp, index_path(path))
+
+
+def search_candidates(postings: Dict[str, List[int]], q: str) -> Optional[Set[int]]:
+    """Ids sharing every trigram of `q`; None if `q` is under three characters."""
+    grams = _trigrams(q)
+    if not grams:
+        return None
+    lists = sorted((postings.get(g, []) for g in grams), key=len)
+    result = set(lists[0])
+    for ids in lists[1:]:
+        result.intersection_update(ids)
+    return result
+
+
+def bitmap_path(path: str) -> str:
+    return path + ".bits"
+
+
+def _ids_to_bits(ids: List[int]) -> int:
+    # a bitset has no room for negative ids; select_ids lets them through
+    ids = [i for i in ids if i >= 0]
+    if not ids:
+        return 0
+    buf = bytearray(max(ids) // 8 + 1)
+    for i in ids:
+        buf[i >> 3] |= 1 << (i & 7)
+    return int.from_bytes(buf, "little")
+
+
+def build_bitmaps(tasks: List[Task]) -> Dict:
+    """Map each tag, each category and the done flag to an int bitset of task ids."""
+    tags: Dict[str, List[int]] = {}
+    categories: Dict[str, List[int]] = {}
+    for t in tasks:
+        for tag in t.tags:
+            tags.setdefault(tag, []).append(t.id)
+        categories.setdefault(t.category, []).append(t.id)
+    return {
+        "ids": _ids_to_bits([t.id for t in tasks]),
+        "tags": {k: _ids_to_bits(v) for k, v in tags.items()},
+        "categories": {k: _ids_to_bits(v) for k, v in categories.items()},
+        "done": _ids_to_bits([t.id for t in tasks if t.done]),
+    }
+
+
+def bitmaps_add(bitmaps: Dict, t: Task) -> None:
+    if t.id < 0:
+        return
+    bit = 1 << t.id
+    bitmaps["ids"] |= bit
+    for tag in t.tags:
+        bitmaps["tags"][tag] = bitmaps["tags"].get(tag, 0) | bit
+    bitmaps["categories"][t.category] = bitmaps["categories"].get(t.category, 0) | bit
+    if t.done:
+        bitmaps["done"] |= bit
+
+
+def load_bitmaps(path: str, stamp: Optional[List[int]]) -> Optional[Dict]:
+    """Return the bitsets for `path` if the sidecar was saved for the file
+    with `stamp`."""
+    try:
+        with open(bitmap_path(path), "r", encoding="utf-8") as f:
+            data = json.load(f)
+    except (FileNotFoundError, json.JSONDecodeError):
+        return None
+    if stamp is None or data.get("stamp") != stamp:
+        return None
+    return {
+        "ids": int(data["ids"], 16),
+        "tags": {k: int(v, 16) for k, v in data["tags"].items()},
+        "categories": {k: int(v, 16) for k, v in data["categories"].items()},
+        "done": int(data["done"], 16),
+    }
+
+
+def save_bitmaps(path: str, bitmaps: Dict, stamp: List[int]) -> None:
+    data = {
+        "stamp": stamp,
+        "ids": format(bitmaps["ids"], "x"),
+        "tags": {k: format(v, "x") for k, v in bitmaps["tags"].items()},
+        "categories": {k: format(v, "x") for k, v in bitmaps["categories"].items()},
+        "done": format(bitmaps["done"], "x"),
+    }
+    tmp = bitmap_path(path) + ".tmp"
+    with open(tmp, "w", encoding="utf-8") as f:
+        json.dump(data, f, ensure_ascii=False, separators=(",", ":"))
+    os.replace(tmp, bitmap_path(path))
+
+
+def select_ids(bitmaps: Dict, tags: List[str], category: Optional[str], include_done: bool) -> Callable[[int], bool]:
+    """OR the tag bitsets, AND the category/done ones; return an O(1) id test
+    that may let through tasks that do not match (see `prefilter`)."""
+    bits = bitmaps["ids"]
+    if tags:
+        any_tag = 0
+        for tag in tags:
+            any_tag |= bitmaps["tags"].get(tag, 0)
+        bits &= any_tag
+    if category:
+        bits &= bitmaps["categories"].get(category, 0)
+    if not include_done:
+        bits &= ~bitmaps["done"]
+    hits = bits.to_bytes((bits.bit_length() + 7) // 8, "little")
+    return lambda tid: tid < 0 or ((tid >> 3) < len(hits) and bool(hits[tid >> 3] >> (tid & 7) & 1))
+
+
+def task_matches(t: Task, tags: List[str], category: Optional[str], include_done: bool) -> bool:
+    if t.done and not include_done:
+        return False
+    if tags and not any(tag in t.tags for tag in tags):
+        return False
+    return not category or t.category == category
+
+
+def prefilter(path: str, stamp: Optional[List[int]], tasks: List[Task], tags: List[str],
+              category: Optional[str], include_done: bool) -> List[Task]:
+    """The `tasks` (read from `path` when it had `stamp`) matching the filters.
+
+    The bitsets only narrow the candidates: ids are not unique in a hand
+    edited file, and the sidecar may describe another version of it, so
+    every candidate is checked against the filters too.
+    """
+    bitmaps = load_bitmaps(path, stamp)
+    if bitmaps is None:
+        bitmaps = build_bitmaps(tasks)
+        if stamp is not None:
+            save_bitmaps(path, bitmaps, stamp)
+    may_match = select_ids(bitmaps, tags, category, include_done)
+    return [t for t in tasks if may_match(t.id) and task_matches(t, tags, category, include_done)]
 
 
 def next_id(tasks: List[Task]) -> int:
@@ -59,6 +248,10 @@ def next_id(tasks: List[Task]) -> int:
 
 
 def cmd_add(args: argparse.Namespace) -> int:
+    from datetime import datetime
+
+    # taken before reading: a write landing in between makes it stale, not wrong
+    stamp = _file_stamp(args.file)
     tasks = load_tasks(args.file)
     tid = next_id(tasks)
     tags = [t.strip() for t in args.tags.split(",")] if args.tags else []
@@ -66,7 +259,17 @@ def cmd_add(args: argparse.Namespace) -> int:
     category = args.category if getattr(args, "category", None) else "general"
     t = Task(id=tid, title=args.title, created=datetime.utcnow().isoformat() + "Z", tags=tags, category=category)
     tasks.append(t)
-    save_tasks(args.file, tasks)
+    postings = load_index(args.file, stamp)
+    bitmaps = load_bitmaps(args.file, stamp)
+    # stamp the sidecars with exactly what we wrote, not with whatever a
+    # concurrent writer may have put there since
+    stamp = save_tasks(args.file, tasks)
+    if postings is not None:
+        index_task(postings, t)
+        save_index(args.file, postings, stamp)
+    if bitmaps is not None:
+        bitmaps_add(bitmaps, t)
+        save_bitmaps(args.file, bitmaps, stamp)
     print(f"Added task {t.id}: {t.title}")
     return 0
 
@@ -78,26 +281,34 @@ def format_task(t: Task) -> str:
 
 
 def cmd_list(args: argparse.Namespace) -> int:
+    stamp = _file_stamp(args.file)
     tasks = load_tasks(args.file)
     if not tasks:
         print("No tasks.")
         return 0
-    filtered = tasks
-    if not args.all:
-        filtered = [t for t in tasks if not t.done]
-    if args.tags:
-        tags = [x.strip() for x in args.tags.split(",")]
-        filtered = [t for t in filtered if any(tag in t.tags for tag in tags)]
-    if getattr(args, "category", None):
-        filtered = [t for t in filtered if t.category == args.category]
+    tags = [x.strip() for x in args.tags.split(",")] if args.tags else []
+    category = getattr(args, "category", None)
+    if tags or category:
+        filtered = prefilter(args.file, stamp, tasks, tags, category, args.all)
+    else:
+        filtered = tasks if args.all else [t for t in tasks if not t.done]
     for t in sorted(filtered, key=lambda x: x.id):
         print(format_task(t))
     return 0
 
 
 def cmd_search(args: argparse.Namespace) -> int:
+    stamp = _file_stamp(args.file)
     tasks = load_tasks(args.file)
     q = args.query.lower()
+    postings = load_index(args.file, stamp)
+    if postings is None:
+        postings = build_index(tasks)
+        if stamp is not None:
+            save_index(args.file, postings, stamp)
+    cands = search_candidates(postings, q)
+    if cands is not None:
+        tasks = [t for t in tasks if t.id in cands]
     matches = [t for t in tasks if q in t.title.lower() or any(q in tag.lower() for tag in t.tags)]
     if not matches:
         print("No matches found.")
@@ -109,6 +320,102 @@ def cmd_search(args: argparse.Namespace) -> int:
     return 0
 
 
+# with --strategy tags, each step up the --prefer list multiplies a weight by this
+TAG_BOOST = 4
+
+
+def build_alias(weights: List[float]) -> Tuple[List[float], List[int]]:
+    """Vose alias table for `weights`: O(n) to build, O(1) per `alias_draw`."""
+    n = len(weights)
+    total = float(sum(weights))
+    scaled = [w * n / total for w in weights]
+    prob, alias = [1.0] * n, list(range(n))
+    small = [i for i, p in enumerate(scaled) if p < 1.0]
+    large = [i for i, p in enumerate(scaled) if p >= 1.0]
+    while small and large:
+        s, g = small.pop(), large.pop()
+        prob[s], alias[s] = scaled[s], g
+        scaled[g] += scaled[s] - 1.0
+        (small if scaled[g] < 1.0 else large).append(g)
+    return prob, alias
+
+
+def alias_draw(prob: List[float], alias: List[int], rng) -> int:
+    i = rng.randrange(len(prob))
+    return i if rng.random() < prob[i] else alias[i]
+
+
+def recommend_weights(tasks: List[Task], strategy: str, prefer: List[str]) -> List[float]:
+    """Per-task weights for the `oldest` and `tags` strategies."""
+    if strategy == "oldest":
+        # the oldest task weighs len(tasks), the newest 1
+        newest_first = sorted(range(len(tasks)), key=lambda i: (tasks[i].created, tasks[i].id), reverse=True)
+        weights = [0.0] * len(tasks)
+        for rank, i in enumerate(newest_first, 1):
+            weights[i] = float(rank)
+        return weights
+    boost = {}
+    for pos, tag in enumerate(prefer):
+        boost.setdefault(tag, float(TAG_BOOST ** (len(prefer) - pos)))
+    return [max((boost.get(tag, 1.0) for tag in t.tags), default=1.0) for t in tasks]
+
+
+def pick_weighted(weights: List[float], k: int, rng) -> List[int]:
+    """k distinct indexes drawn with probability proportional to `weights`.
+
+    Alias draws cost O(1) each; a repeat is drawn again. If repeats pile up
+    (k near len(weights), or the weight on a few items) it falls back to an
+    exact weighted reservoir pass: the k largest log(u) / w keys.
+    """
+    import heapq
+    import math
+
+    prob, alias = build_alias(weights)
+    chosen = set()
+    for _ in range(3 * k + 16):
+        chosen.add(alias_draw(prob, alias, rng))
+        if len(chosen) == k:
+            return list(chosen)
+    keys = [math.log(1.0 - rng.random()) / w if w > 0 else -math.inf for w in weights]
+    return heapq.nlargest(k, range(len(weights)), key=keys.__getitem__)
+
+
+def pick_round_robin(tasks: List[Task], k: int, rng) -> List[Task]:
+    """k tasks with categories taking turns, one random task each per round."""
+    groups: Dict[str, List[Task]] = {}
+    for t in tasks:
+        groups.setdefault(t.category, []).append(t)
+    groups_list = list(groups.values())
+    quota = [0] * len(groups_list)
+    active = list(range(len(groups_list)))
+    left = k
+    while left:
+        # only the last, partial round needs a random choice of categories
+        turn = active if left >= len(active) else rng.sample(active, left)
+        for g in turn:
+            quota[g] += 1
+        left -= len(turn)
+        active = [g for g in active if quota[g] < len(groups_list[g])]
+    picks = []
+    for g, n in enumerate(quota):
+        if n:
+            picks.extend(rng.sample(groups_list[g], n))
+    return picks
+
+
+def pick_tasks(tasks: List[Task], k: int, strategy: str, prefer: List[str], rng) -> List[Task]:
+    """Choose min(k, len(tasks)) distinct tasks by `strategy` (see `--strategy`)."""
+    if k >= len(tasks):
+        return list(tasks)
+    if k <= 0:
+        return []
+    if strategy == "category":
+        return pick_round_robin(tasks, k, rng)
+    if strategy in ("oldest", "tags"):
+        return [tasks[i] for i in pick_weighted(recommend_weights(tasks, strategy, prefer), k, rng)]
+    return rng.sample(tasks, k)
+
+
 def cmd_recommend(args: argparse.Namespace) -> int:
     """Recommend a number of tasks to complete at random.
 
@@ -117,18 +424,21 @@ def cmd_recommend(args: argparse.Namespace) -> int:
     - Supports optional --category and --tags filters (comma-separated tags).
     - If fewer tasks are available than requested, all matching tasks are returned.
     """
+    import random
+
+    stamp = _file_stamp(args.file)
     tasks = load_tasks(args.file)
     if not tasks:
         print("No tasks.")
         return 0
-    candidates = tasks
-    if not args.all:
-        candidates = [t for t in tasks if not t.done]
-    if args.tags:
-        tags = [x.strip() for x in args.tags.split(",")]
-        candidates = [t for t in candidates if any(tag in t.tags for tag in tags)]
-    if getattr(args, "category", None):
-        candidates = [t for t in candidates if t.category == args.category]
+    tags = [x.strip() for x in args.tags.split(",")] if args.tags else []
+    category = getattr(args, "category", None)
+    if tags or category:
+        candidates = prefilter(args.file, stamp, tasks, tags, category, args.all)
+    else:
+        candidates = tasks if args.all else [t for t in tasks if not t.done]
+    strategy = getattr(args, "strategy", None) or "random"
+    prefer = [x.strip() for x in args.prefer.split(",")] if getattr(args, "prefer", None) else []
 
     if not candidates:
         print("No matching tasks to recommend.")
@@ -140,49 +450,86 @@ def cmd_recommend(args: argparse.Namespace) -> int:
         print("Invalid count; please provide an integer number of tasks to recommend.")
         return 1
 
-    k = min(count, len(candidates))
-    picks = random.sample(candidates, k)
-    print(f"Recommended {k} task(s):")
+    picks = pick_tasks(candidates, count, strategy, prefer, random.Random(getattr(args, "seed", None)))
+    print(f"Recommended {len(picks)} task(s):")
     for t in sorted(picks, key=lambda x: x.id):
         print(format_task(t))
     return 0
 
 
-def build_parser() -> argparse.ArgumentParser:
-    p = argparse.ArgumentParser(description="Simple JSON-backed todo CLI")
-    p.add_argument("--file", "-f", default=DEFAULT_DATA_FILE, help="tasks JSON file")
-    sub = p.add_subparsers(dest="cmd")
-
-    pa = sub.add_parser("add", help="Add a new task")
+def _add_args(pa: argparse.ArgumentParser) -> None:
     pa.add_argument("title", help="Task title")
     pa.add_argument("--tags", help="Comma-separated tags", default="")
     pa.add_argument("--category", help="Task category (e.g. household, schoolwork)", default="")
     pa.set_defaults(func=cmd_add)
 
-    pl = sub.add_parser("list", help="List tasks")
+
+def _list_args(pl: argparse.ArgumentParser) -> None:
     pl.add_argument("--all", action="store_true", help="Include completed tasks")
     pl.add_argument("--tags", help="Filter by comma-separated tags")
     pl.add_argument("--category", help="Filter by category (exact match)")
     pl.set_defaults(func=cmd_list)
 
-    ps = sub.add_parser("search", help="Search tasks by text or tag")
+
+def _search_args(ps: argparse.ArgumentParser) -> None:
     ps.add_argument("query", help="Search query")
     ps.add_argument("--category", help="Filter search by category (exact match)")
     ps.set_defaults(func=cmd_search)
 
-    pr = sub.add_parser("recommend", help="Recommend N random tasks to complete")
+
+def _recommend_args(pr: argparse.ArgumentParser) -> None:
     pr.add_argument("count", help="Number of tasks to recommend")
     pr.add_argument("--all", action="store_true", help="Include completed tasks as candidates")
     pr.add_argument("--tags", help="Filter candidates by comma-separated tags")
     pr.add_argument("--category", help="Filter candidates by category (exact match)")
+    pr.add_argument("--strategy", choices=["random", "oldest", "category", "tags"], default="random",
+                    help="random (default), weighted towards older tasks, round-robin over "
+                         "categories, or weighted towards --prefer tags")
+    pr.add_argument("--prefer", help="Comma-separated tags to favour, most important first (--strategy tags)")
+    pr.add_argument("--seed", type=int, help="Seed the random choice to make it repeatable")
     pr.set_defaults(func=cmd_recommend)
 
+
+# subcommand -> (help, function adding its arguments)
+SUBCOMMANDS = {
+    "add": ("Add a new task", _add_args),
+    "list": ("List tasks", _list_args),
+    "search": ("Search tasks by text or tag", _search_args),
+    "recommend": ("Recommend N random tasks to complete", _recommend_args),
+}
+
+
+def build_parser(command: Optional[str] = None) -> argparse.ArgumentParser:
+    """The CLI's parser; with `command`, only that subcommand gets its arguments."""
+    p = argparse.ArgumentParser(description="Simple JSON-backed todo CLI")
+    p.add_argument("--file", "-f", default=DEFAULT_DATA_FILE, help="tasks JSON file")
+    sub = p.add_subparsers(dest="cmd")
+    for name, (help_text, add_args) in SUBCOMMANDS.items():
+        if command is None or name == command:
+            add_args(sub.add_parser(name, help=help_text))
+        else:
+            sub.add_parser(name, help=help_text, add_help=False)
     return p
 
 
+def _command_in(argv: List[str]) -> Optional[str]:
+    """The subcommand `argv` names, or None if it names none or asks for help."""
+    args = iter(argv)
+    for arg in args:
+        if arg in ("-h", "--help"):
+            return None
+        if arg.startswith("-"):
+            # --file/-f take a value; argparse also accepts prefixes such as --fi
+            if arg == "-f" or (arg.startswith("--") and "--file".startswith(arg)):
+                next(args, None)
+            continue
+        return arg if arg in SUBCOMMANDS else None
+    return None
+
+
 def main(argv: Optional[List[str]] = None) -> int:
     argv = argv if argv is not None else sys.argv[1:]
-    parser = build_parser()
+    parser = build_parser(_command_in(argv))
     args = parser.parse_args(argv)
     if not hasattr(args, "func"):
         parser.print_help()
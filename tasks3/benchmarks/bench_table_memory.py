@@ -0,0 +1,72 @@
+"""Compare memory use of a list of Task dataclasses against a TaskTable.
+
+Usage:
+  python benchmarks/bench_table_memory.py [N]
+
+Decodes N synthetic JSON task records both ways and reports the bytes each
+structure keeps alive (measured with tracemalloc), plus the build time.
+"""
+from __future__ import annotations
+
+import json
+import os
+import random
+import sys
+import time
+import tracemalloc
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), "..", "src"))
+
+from tasks3 import Task  # noqa: E402
+from tasks3.table import TaskTable  # noqa: E402
+
+TAGS = [f"tag{i}" for i in range(200)]
+CATEGORIES = ["household", "schoolwork", "errands", "work", "general"]
+
+
+def synthetic(n: int):
+    rng = random.Random(42)
+    for i in range(1, n + 1):
+        yield {
+            "id": i,
+            "title": f"Task {i} " + rng.choice(["buy", "read", "clean", "write"]) + " something",
+            "created": f"2025-{rng.randint(1, 12):02d}-{rng.randint(1, 28):02d}T12:{rng.randint(0, 59):02d}:00.{rng.randint(1, 999999):06d}Z",
+            "tags": rng.sample(TAGS, rng.randint(0, 3)),
+            "category": rng.choice(CATEGORIES),
+            "done": rng.random() < 0.3,
+        }
+
+
+def measure(build):
+    tracemalloc.start()
+    start = time.perf_counter()
+    obj = build()
+    elapsed = time.perf_counter() - start
+    current, _ = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return obj, current, elapsed
+
+
+def main(argv=None) -> int:
+    argv = argv if argv is not None else sys.argv[1:]
+    n = int(argv[0]) if argv else 200_000
+    # decode inside each build so both structures own their strings
+    lines = [json.dumps(item) for item in synthetic(n)]
+
+    def as_list():
+        return [Task(**json.loads(line)) for line in lines]
+
+    def as_table():
+        return TaskTable.from_tasks(Task(**json.loads(line)) for line in lines)
+
+    _, list_bytes, list_time = measure(as_list)
+    _, table_bytes, table_time = measure(as_table)
+    print(f"tasks: {n}")
+    print(f"list[Task]: {list_bytes / 1e6:8.1f} MB  {list_bytes / n:6.0f} B/task  built in {list_time:.2f}s")
+    print(f"TaskTable:  {table_bytes / 1e6:8.1f} MB  {table_bytes / n:6.0f} B/task  built in {table_time:.2f}s")
+    print(f"ratio: {list_bytes / table_bytes:.1f}x")
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
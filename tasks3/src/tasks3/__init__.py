@@ -5,8 +5,19 @@ Usage:
   python todo.py add "Task title" --tags tag1,tag2
   python todo.py list [--all] [--tags tag]
   python todo.py search "query"
-
-Tasks stored in `tasks.json` next to this script by default.
+  python todo.py done 3
+  python todo.py --storage journal add "Task title"
+  python todo.py compact
+  python todo.py import tasks.csv
+  python todo.py recommend 3 --strategy oldest --seed 7
+  python todo.py --profile list
+  python todo.py shell
+
+Tasks stored in `tasks.json` next to this script by default. With
+`--storage journal`, writes append to `tasks.json.log` instead (see
+`tasks3.journal`). `shell` keeps the store loaded between commands (see
+`tasks3.shell`). `--profile` (or `TASKS_TRACE=<file>`) times the load,
+filter, sort, format and save phases (see `tasks3.profiling`).
 """
 from __future__ import annotations
 
@@ -14,14 +25,27 @@ import argparse
 import json
 import os
 import sys
+import time
 from dataclasses import dataclass, asdict
-from datetime import datetime
-import random
-from typing import List, Optional
+from typing import TYPE_CHECKING, Iterable, Iterator, List, Optional
+
+from . import index as search_index
+from . import journal
+from . import profiling
+from .profiling import span
+
+# datetime, random, csv and .table are imported only where they are
+# needed: short commands are dominated by start-up
+if TYPE_CHECKING:
+    from .table import TaskTable
 
 
 DEFAULT_DATA_FILE = os.path.join(os.path.dirname(__file__), "tasks.json")
 
+# tasks per batch handed out by iter_task_batches: enough to make the
+# per-batch profiling spans free, few enough to keep streaming memory flat
+BATCH_SIZE = 64
+
 
 @dataclass
 class Task:
@@ -34,78 +58,452 @@ class Task:
 
 
 def load_tasks(path: str) -> List[Task]:
-    if not os.path.exists(path):
-        return []
-    with open(path, "r", encoding="utf-8") as f:
-        try:
-            data = json.load(f)
-        except json.JSONDecodeError:
-            return []
-    tasks = []
-    for item in data:
-        tasks.append(Task(**item))
+    data = []
+    if os.path.exists(path):
+        with open(path, "r", encoding="utf-8") as f:
+            try:
+                with span("parse"):
+                    data = json.load(f)
+            except json.JSONDecodeError:
+                return []
+    # replay any journaled writes on top of the snapshot
+    with span("journal"):
+        data = journal.replay(data, journal.read_records(path))
+    with span("build"):
+        tasks = [Task(**item) for item in data]
     return tasks
 
 
+def _decode_elements(decode, buf: str, pos: int, started: bool, eof: bool,
+                     out: List[dict]) -> tuple:
+    """Decode up to BATCH_SIZE JSON array elements from `buf[pos:]` into `out`.
+
+    Returns (pos, started, done): where decoding stopped, whether the
+    opening bracket has been seen, and whether the closing one was reached.
+    Stops early (not done) when `out` is full or the buffer runs out
+    mid-element.
+    """
+    end = len(buf)
+    while len(out) < BATCH_SIZE:
+        while pos < end and buf[pos] in " \t\r\n":
+            pos += 1
+        if pos == end:
+            if eof:
+                raise json.JSONDecodeError("unterminated array", buf, pos)
+            return pos, started, False
+        ch = buf[pos]
+        if not started:
+            if ch != "[":
+                raise json.JSONDecodeError("expected '['", buf, pos)
+            started = True
+            pos += 1
+        elif ch == ",":
+            pos += 1
+        elif ch == "]":
+            return pos, started, True
+        else:
+            try:
+                item, pos = decode(buf, pos)
+            except json.JSONDecodeError:
+                # element straddles the chunk boundary: the caller reads more
+                if eof:
+                    raise
+                return pos, started, False
+            out.append(item)
+    return pos, started, False
+
+
+def _iter_json_batches(f, chunk_size: int = 1 << 16) -> Iterator[List[dict]]:
+    """Yield the elements of the JSON array in `f`, up to BATCH_SIZE at a time.
+
+    Only one chunk plus one batch of elements is held in memory.
+    Raises json.JSONDecodeError on malformed input, after yielding the
+    elements that precede the error.
+    """
+    decode = json.JSONDecoder().raw_decode
+    buf = ""
+    pos = 0
+    eof = False
+    started = False
+    while True:
+        batch: List[dict] = []
+        error = None
+        with span("parse"):
+            try:
+                pos, started, done = _decode_elements(decode, buf, pos, started, eof, batch)
+            except json.JSONDecodeError as e:
+                error = e
+        if batch:
+            yield batch
+        if error is not None:
+            raise error
+        if done:
+            return
+        if len(batch) == BATCH_SIZE:
+            continue  # the buffer may hold more elements
+        with span("read"):
+            chunk = f.read(chunk_size)
+        eof = not chunk
+        buf, pos = buf[pos:] + chunk, 0
+
+
+def iter_task_batches(path: str, chunk_size: int = 1 << 16) -> Iterator[List[Task]]:
+    """Yield the tasks in `path` in lists of at most BATCH_SIZE.
+
+    Produces the same tasks, in the same order, as `load_tasks` (journal
+    included) without materializing the whole document. Batches are never
+    empty. A malformed file (say, one cut short) is only noticed when
+    decoding reaches the bad spot: the stream stops there, after the
+    batches decoded before it and without the journal's additions, where
+    `load_tasks` returns nothing at all.
+    """
+    with span("journal"):
+        added, done = journal.fold(journal.read_records(path))
+    if os.path.exists(path):
+        with open(path, "r", encoding="utf-8") as f:
+            try:
+                for items in _iter_json_batches(f, chunk_size):
+                    with span("build"):
+                        batch = []
+                        for item in items:
+                            tid = item["id"]
+                            if tid in added:
+                                item = added.pop(tid)
+                            elif tid in done:
+                                item["done"] = True
+                            batch.append(Task(**item))
+                    yield batch
+            except json.JSONDecodeError:
+                return
+    rest = list(added.values())
+    for start in range(0, len(rest), BATCH_SIZE):
+        with span("build"):
+            batch = [Task(**item) for item in rest[start:start + BATCH_SIZE]]
+        yield batch
+
+
+def iter_tasks(path: str, chunk_size: int = 1 << 16) -> Iterator[Task]:
+    """Yield the tasks in `path` one at a time (see `iter_task_batches`)."""
+    for batch in iter_task_batches(path, chunk_size):
+        yield from batch
+
+
 def save_tasks(path: str, tasks: List[Task]) -> None:
-    with open(path, "w", encoding="utf-8") as f:
-        json.dump([asdict(t) for t in tasks], f, indent=2, ensure_ascii=False)
+    # atomic write: write to temp file then replace, so a crash never leaves
+    # a half-written snapshot behind
+    tmp = path + ".tmp"
+    with span("save"):
+        with open(tmp, "w", encoding="utf-8") as f:
+            json.dump([asdict(t) for t in tasks], f, indent=2, ensure_ascii=False)
+        os.replace(tmp, path)
+    # the snapshot now holds everything, so the journal is redundant
+    journal.discard(path)
 
 
-def next_id(tasks: List[Task]) -> int:
-    if not tasks:
-        return 1
-    return max(t.id for t in tasks) + 1
+def compact(path: str) -> None:
+    """Fold the journal for `path` back into its snapshot."""
+    save_tasks(path, load_tasks(path))
+
+
+def _save_with_index(path: str, tasks: List[Task], added: List[Task] = (),
+                     done: List[int] = ()) -> None:
+    """Save `tasks` and keep fresh index sidecars in step with the file."""
+    with span("index"):
+        index = search_index.load_fresh(path)
+        bitmaps = search_index.load_bitmaps_fresh(path)
+    save_tasks(path, tasks)
+    with span("index"):
+        if index is not None:
+            for t in added:
+                index.add(t)
+            index.save(path)
+        if bitmaps is not None:
+            for t in added:
+                bitmaps.add(t)
+            for tid in done:
+                bitmaps.mark_done(tid)
+            bitmaps.save(path)
+
+
+def _prefilter(args: argparse.Namespace, table: TaskTable, tags: List[str]) -> List[int]:
+    """Rows of `table` left after the tag/category/done bitmaps, before exact filtering."""
+    bitmaps = search_index.load_bitmaps(args.file, table)
+    may_match = bitmaps.select(tags=tags, category=getattr(args, "category", None),
+                               include_done=args.all)
+    ids = table.ids
+    return [row for row in range(len(ids)) if may_match(ids[row])]
+
+
+def _journaled(args: argparse.Namespace) -> bool:
+    return getattr(args, "storage", "json") == "journal"
+
+
+def _append(args: argparse.Namespace, records: List[dict]) -> None:
+    journal.append_records(args.file, records)
+    if journal.needs_compaction(args.file):
+        compact(args.file)
+
+
+def next_id(tasks: Iterable[Task]) -> int:
+    return max((t.id for t in tasks), default=0) + 1
+
+
+def meta_path(path: str) -> str:
+    return path + ".meta"
+
+
+def _store_stamps(path: str) -> list:
+    return [search_index.file_stamp(path), search_index.file_stamp(journal.journal_path(path))]
+
+
+def _read_meta(path: str) -> Optional[dict]:
+    try:
+        with open(meta_path(path), "r", encoding="utf-8") as f:
+            return json.load(f)
+    except (FileNotFoundError, json.JSONDecodeError):
+        return None
+
+
+def write_meta(path: str, next_free: int) -> None:
+    """Record the id high-water mark for `path` after a write we made."""
+    tmp = meta_path(path) + ".tmp"
+    with open(tmp, "w", encoding="utf-8") as f:
+        json.dump({"next_id": next_free, "stamps": _store_stamps(path)}, f)
+    os.replace(tmp, meta_path(path))
+
+
+def allocate_id(path: str, tasks: Optional[Iterable[Task]] = None) -> int:
+    """Return the next unused id for the store at `path`.
+
+    Reads the high-water mark from `<file>.meta` without touching the task
+    bodies. If the tasks file or journal changed since the mark was written,
+    the store is rescanned (`tasks` if given, else streamed from disk), but
+    the result never drops below the recorded mark, so ids freed by removing
+    tasks are never handed out again.
+    """
+    meta = _read_meta(path)
+    floor = meta["next_id"] if meta else 1
+    if meta is None or meta.get("stamps") != _store_stamps(path):
+        floor = max(floor, next_id(tasks if tasks is not None else iter_tasks(path)))
+    return floor
 
 
 def cmd_add(args: argparse.Namespace) -> int:
-    tasks = load_tasks(args.file)
-    tid = next_id(tasks)
+    from datetime import datetime
     tags = [t.strip() for t in args.tags.split(",")] if args.tags else []
     # choose provided category or fall back to Task default
     category = args.category if getattr(args, "category", None) else "general"
-    t = Task(id=tid, title=args.title, created=datetime.utcnow().isoformat() + "Z", tags=tags, category=category)
-    tasks.append(t)
-    save_tasks(args.file, tasks)
+    if _journaled(args):
+        # constant time: no load, just the high-water mark and one appended line
+        tid = allocate_id(args.file)
+        t = Task(id=tid, title=args.title, created=datetime.utcnow().isoformat() + "Z", tags=tags, category=category)
+        _append(args, [{"op": "add", "task": asdict(t)}])
+    else:
+        tasks = load_tasks(args.file)
+        tid = allocate_id(args.file, tasks)
+        t = Task(id=tid, title=args.title, created=datetime.utcnow().isoformat() + "Z", tags=tags, category=category)
+        tasks.append(t)
+        _save_with_index(args.file, tasks, [t])
+    write_meta(args.file, tid + 1)
     print(f"Added task {t.id}: {t.title}")
     return 0
 
 
+def cmd_done(args: argparse.Namespace) -> int:
+    tasks = load_tasks(args.file)
+    tid = int(args.id)
+    for t in tasks:
+        if t.id == tid:
+            break
+    else:
+        print(f"No task with id {tid}.")
+        return 1
+    high_water = allocate_id(args.file, tasks)
+    if _journaled(args):
+        _append(args, [{"op": "done", "id": tid}])
+    else:
+        t.done = True
+        _save_with_index(args.file, tasks, done=[tid])
+    write_meta(args.file, high_water)
+    print(f"Marked task {tid} done")
+    return 0
+
+
+def cmd_compact(args: argparse.Namespace) -> int:
+    records = journal.read_records(args.file)
+    high_water = allocate_id(args.file)
+    compact(args.file)
+    write_meta(args.file, high_water)
+    print(f"Compacted {len(records)} journal record(s) into {args.file}")
+    return 0
+
+
+def _import_row(row) -> Task:
+    """Validate one imported row; the id is filled in by the caller."""
+    if not isinstance(row, dict):
+        raise ValueError("row is not an object")
+    title = row.get("title")
+    if not isinstance(title, str) or not title.strip():
+        raise ValueError("missing title")
+    tags = row.get("tags") or []
+    if isinstance(tags, str):
+        tags = [x.strip() for x in tags.split(",") if x.strip()]
+    elif not isinstance(tags, list) or not all(isinstance(x, str) for x in tags):
+        raise ValueError("tags must be a list of strings or a comma-separated string")
+    category = row.get("category") or "general"
+    if not isinstance(category, str):
+        raise ValueError("category must be a string")
+    return Task(id=0, title=title, created="", tags=tags, category=category)
+
+
+def _read_import_rows(f, fmt: str) -> Iterator[tuple]:
+    """Yield (line number, row dict or the error that row raised)."""
+    if fmt == "csv":
+        import csv
+        reader = csv.DictReader(f)
+        for row in reader:
+            yield reader.line_num, row
+        return
+    for lineno, line in enumerate(f, 1):
+        if not line.strip():
+            continue
+        try:
+            yield lineno, json.loads(line)
+        except json.JSONDecodeError as e:
+            yield lineno, e
+
+
+def cmd_import(args: argparse.Namespace) -> int:
+    """Bulk-add tasks from a JSONL or CSV file (or stdin).
+
+    Each row gives `title` and optionally `tags` (list or comma-separated)
+    and `category`. Bad rows are reported on stderr and skipped; the good
+    ones get consecutive ids and are written in a single save/append.
+    Returns 1 if any row was rejected.
+    """
+    from datetime import datetime
+    source = getattr(args, "source", "-") or "-"
+    fmt = getattr(args, "format", None) or ("csv" if source.lower().endswith(".csv") else "jsonl")
+    start = time.perf_counter()
+    rows = []
+    rejected = 0
+    f = sys.stdin if source == "-" else open(source, "r", encoding="utf-8", newline="")
+    try:
+        for lineno, row in _read_import_rows(f, fmt):
+            try:
+                if isinstance(row, Exception):
+                    raise ValueError(f"invalid JSON ({row.msg})")
+                rows.append(_import_row(row))
+            except ValueError as e:
+                rejected += 1
+                print(f"line {lineno}: {e}", file=sys.stderr)
+    finally:
+        if f is not sys.stdin:
+            f.close()
+
+    created = datetime.utcnow().isoformat() + "Z"
+    if _journaled(args):
+        first = allocate_id(args.file)
+    else:
+        tasks = load_tasks(args.file)
+        first = allocate_id(args.file, tasks)
+    for i, t in enumerate(rows):
+        t.id = first + i
+        t.created = created
+    if rows:
+        if _journaled(args):
+            _append(args, [{"op": "add", "task": asdict(t)} for t in rows])
+        else:
+            tasks.extend(rows)
+            _save_with_index(args.file, tasks, rows)
+        write_meta(args.file, first + len(rows))
+    elapsed = time.perf_counter() - start
+    rate = len(rows) / elapsed if elapsed > 0 else 0.0
+    print(f"Imported {len(rows)} task(s) in {elapsed:.2f}s ({rate:.0f} tasks/s); {rejected} rejected")
+    return 1 if rejected else 0
+
+
 def format_task(t: Task) -> str:
     tags = f" [{', '.join(t.tags)}]" if t.tags else ""
     status = "x" if t.done else " "
     return f"{t.id:3d}. [{status}] {t.title}{tags} <{t.category}> (created: {t.created})"
 
 
+def _print_tasks(tasks: List[Task]) -> None:
+    """Print `tasks` in id order, one `format_task` line each."""
+    with span("sort"):
+        tasks = sorted(tasks, key=lambda x: x.id)
+    with span("format"):
+        lines = [format_task(t) + "\n" for t in tasks]
+    with span("print"):
+        sys.stdout.writelines(lines)
+
+
 def cmd_list(args: argparse.Namespace) -> int:
-    tasks = load_tasks(args.file)
-    if not tasks:
+    tags = [x.strip() for x in args.tags.split(",")] if args.tags else []
+    category = getattr(args, "category", None)
+    may_match = None
+    if tags or category:
+        # use the bitmaps only if they are already fresh; list never rebuilds them
+        with span("index"):
+            bitmaps = search_index.load_bitmaps_fresh(args.file)
+            if bitmaps is not None:
+                may_match = bitmaps.select(tags=tags, category=category, include_done=args.all)
+    seen = False
+    filtered = []
+    for batch in iter_task_batches(args.file):
+        seen = True
+        with span("filter"):
+            for t in batch:
+                if may_match is not None and not may_match(t.id):
+                    continue
+                if not args.all and t.done:
+                    continue
+                if tags and not any(tag in t.tags for tag in tags):
+                    continue
+                if category and t.category != category:
+                    continue
+                filtered.append(t)
+    if not seen:
         print("No tasks.")
         return 0
-    filtered = tasks
-    if not args.all:
-        filtered = [t for t in tasks if not t.done]
-    if args.tags:
-        tags = [x.strip() for x in args.tags.split(",")]
-        filtered = [t for t in filtered if any(tag in t.tags for tag in tags)]
-    if getattr(args, "category", None):
-        filtered = [t for t in filtered if t.category == args.category]
-    for t in sorted(filtered, key=lambda x: x.id):
-        print(format_task(t))
+    _print_tasks(filtered)
     return 0
 
 
 def cmd_search(args: argparse.Namespace) -> int:
-    tasks = load_tasks(args.file)
     q = args.query.lower()
-    matches = [t for t in tasks if q in t.title.lower() or any(q in tag.lower() for tag in t.tags)]
+    with span("index"):
+        index = search_index.load_fresh(args.file)
+        rebuilt = None
+        cands = None
+        if index is None:
+            # build a fresh index from the same pass that answers the query
+            rebuilt = search_index.TaskIndex()
+        else:
+            cands = index.candidates(q)
+    matches = []
+    for batch in iter_task_batches(args.file):
+        if rebuilt is not None:
+            with span("index"):
+                for t in batch:
+                    rebuilt.add(t)
+        with span("filter"):
+            for t in batch:
+                if rebuilt is None and cands is not None and t.id not in cands and index.covers(t.id):
+                    # only tasks sharing every trigram of the query (or not yet indexed) can match
+                    continue
+                if q in t.title.lower() or any(q in tag.lower() for tag in t.tags):
+                    matches.append(t)
+    if rebuilt is not None and os.path.exists(args.file):
+        with span("index"):
+            rebuilt.save(args.file)
     if not matches:
         print("No matches found.")
         return 0
     if getattr(args, "category", None):
         matches = [t for t in matches if t.category == args.category]
-    for t in sorted(matches, key=lambda x: x.id):
-        print(format_task(t))
+    _print_tasks(matches)
     return 0
 
 
@@ -117,20 +515,45 @@ def cmd_recommend(args: argparse.Namespace) -> int:
     - Supports optional --category and --tags filters (comma-separated tags).
     - If fewer tasks are available than requested, all matching tasks are returned.
     """
-    tasks = load_tasks(args.file)
-    if not tasks:
+    from .table import TaskTable
+
+    table = TaskTable.from_tasks(iter_tasks(args.file))
+    if not len(table):
         print("No tasks.")
         return 0
-    candidates = tasks
-    if not args.all:
-        candidates = [t for t in tasks if not t.done]
-    if args.tags:
-        tags = [x.strip() for x in args.tags.split(",")]
-        candidates = [t for t in candidates if any(tag in t.tags for tag in tags)]
-    if getattr(args, "category", None):
-        candidates = [t for t in candidates if t.category == args.category]
+    return _recommend(args, table)
+
 
-    if not candidates:
+def _recommend(args: argparse.Namespace, table: TaskTable, prefilter: bool = True,
+               cache: Optional[dict] = None) -> int:
+    """`recommend` over an already loaded, non-empty `table`.
+
+    With `prefilter` the saved bitmaps narrow the rows first; the shell
+    turns it off because its table may hold changes the file does not.
+    `cache` maps the filters and strategy to the `Recommender` built for
+    them, so a caller that keeps the table (the shell) builds it only once.
+    """
+    import random
+    from .recommend import Recommender
+
+    tags = [x.strip() for x in args.tags.split(",")] if args.tags else []
+    category = getattr(args, "category", None)
+    strategy = getattr(args, "strategy", None) or "random"
+    prefer = [x.strip() for x in args.prefer.split(",")] if getattr(args, "prefer", None) else []
+    key = (tuple(tags), category, args.all, strategy, tuple(prefer))
+    engine = cache.get(key) if cache is not None else None
+    if engine is None:
+        rows = None
+        if prefilter and (tags or category):
+            rows = _prefilter(args, table, tags)
+        with span("filter"):
+            candidates = table.select(tags=tags, category=category, include_done=args.all, rows=rows)
+        with span("weights"):
+            engine = Recommender(table, candidates, strategy=strategy, prefer=prefer)
+        if cache is not None:
+            cache[key] = engine
+
+    if not engine.rows:
         print("No matching tasks to recommend.")
         return 0
 
@@ -140,49 +563,150 @@ def cmd_recommend(args: argparse.Namespace) -> int:
         print("Invalid count; please provide an integer number of tasks to recommend.")
         return 1
 
-    k = min(count, len(candidates))
-    picks = random.sample(candidates, k)
-    print(f"Recommended {k} task(s):")
+    rng = random.Random(getattr(args, "seed", None))
+    with span("pick"):
+        picks = [table.task(row) for row in engine.pick(count, rng)]
+    print(f"Recommended {len(picks)} task(s):")
     for t in sorted(picks, key=lambda x: x.id):
         print(format_task(t))
     return 0
 
 
-def build_parser() -> argparse.ArgumentParser:
-    p = argparse.ArgumentParser(description="Simple JSON-backed todo CLI")
-    p.add_argument("--file", "-f", default=DEFAULT_DATA_FILE, help="tasks JSON file")
-    sub = p.add_subparsers(dest="cmd")
+def cmd_shell(args: argparse.Namespace) -> int:
+    """Answer command lines from stdin against one resident load of the store."""
+    from . import shell
+    return shell.run(args.file, storage=args.storage, defer=args.defer)
+
 
-    pa = sub.add_parser("add", help="Add a new task")
+def _add_args(pa: argparse.ArgumentParser) -> None:
     pa.add_argument("title", help="Task title")
     pa.add_argument("--tags", help="Comma-separated tags", default="")
     pa.add_argument("--category", help="Task category (e.g. household, schoolwork)", default="")
     pa.set_defaults(func=cmd_add)
 
-    pl = sub.add_parser("list", help="List tasks")
+
+def _list_args(pl: argparse.ArgumentParser) -> None:
     pl.add_argument("--all", action="store_true", help="Include completed tasks")
     pl.add_argument("--tags", help="Filter by comma-separated tags")
     pl.add_argument("--category", help="Filter by category (exact match)")
     pl.set_defaults(func=cmd_list)
 
-    ps = sub.add_parser("search", help="Search tasks by text or tag")
+
+def _search_args(ps: argparse.ArgumentParser) -> None:
     ps.add_argument("query", help="Search query")
     ps.add_argument("--category", help="Filter search by category (exact match)")
     ps.set_defaults(func=cmd_search)
 
-    pr = sub.add_parser("recommend", help="Recommend N random tasks to complete")
+
+def _recommend_args(pr: argparse.ArgumentParser) -> None:
     pr.add_argument("count", help="Number of tasks to recommend")
     pr.add_argument("--all", action="store_true", help="Include completed tasks as candidates")
     pr.add_argument("--tags", help="Filter candidates by comma-separated tags")
     pr.add_argument("--category", help="Filter candidates by category (exact match)")
+    pr.add_argument("--strategy", choices=["random", "oldest", "category", "tags"], default="random",
+                    help="random (default), weighted towards older tasks, round-robin over "
+                         "categories, or weighted towards --prefer tags")
+    pr.add_argument("--prefer", help="Comma-separated tags to favour, most important first (--strategy tags)")
+    pr.add_argument("--seed", type=int, help="Seed the random choice to make it repeatable")
     pr.set_defaults(func=cmd_recommend)
 
+
+def _done_args(pd: argparse.ArgumentParser) -> None:
+    pd.add_argument("id", type=int, help="Task id")
+    pd.set_defaults(func=cmd_done)
+
+
+def _import_args(pi: argparse.ArgumentParser) -> None:
+    pi.add_argument("source", nargs="?", default="-", help="File to read (default: stdin)")
+    pi.add_argument("--format", choices=["jsonl", "csv"],
+                    help="Input format (default: csv for *.csv files, else jsonl)")
+    pi.set_defaults(func=cmd_import)
+
+
+def _compact_args(pc: argparse.ArgumentParser) -> None:
+    pc.set_defaults(func=cmd_compact)
+
+
+def _shell_args(psh: argparse.ArgumentParser) -> None:
+    psh.add_argument("--defer", action="store_true",
+                     help="keep changes in memory until flush or exit instead of appending each to the journal")
+    psh.set_defaults(func=cmd_shell)
+
+
+# subcommand -> (help, function adding its arguments)
+SUBCOMMANDS = {
+    "add": ("Add a new task", _add_args),
+    "list": ("List tasks", _list_args),
+    "search": ("Search tasks by text or tag", _search_args),
+    "recommend": ("Recommend N random tasks to complete", _recommend_args),
+    "done": ("Mark a task as completed", _done_args),
+    "import": ("Bulk-add tasks from a JSONL or CSV file", _import_args),
+    "compact": ("Fold the journal back into the tasks file", _compact_args),
+    "shell": ("Run commands interactively against one load of the tasks file", _shell_args),
+}
+
+# global options that take a value, so the word after them is not a subcommand
+_VALUE_OPTIONS = ("--file", "-f", "--storage")
+
+
+def _help_formatter(prog: str) -> argparse.HelpFormatter:
+    """argparse's HelpFormatter, sized like its default one.
+
+    argparse builds a formatter for every `add_argument` and the default one
+    imports shutil (and bz2, lzma, ...) for the terminal width, even when no
+    help is printed; `os` can tell the width just as well.
+    """
+    try:
+        width = int(os.environ["COLUMNS"])
+    except (KeyError, ValueError):
+        try:
+            width = os.get_terminal_size(sys.__stdout__.fileno()).columns
+        except (AttributeError, ValueError, OSError):
+            width = 80
+    return argparse.HelpFormatter(prog, width=width - 2)
+
+
+def build_parser(command: Optional[str] = None) -> argparse.ArgumentParser:
+    """The CLI's parser; with `command`, only that subcommand gets its arguments.
+
+    That is all `main` needs to parse a command line naming `command`, and
+    saves setting up every other subcommand on each run.
+    """
+    p = argparse.ArgumentParser(description="Simple JSON-backed todo CLI",
+                                formatter_class=_help_formatter)
+    p.add_argument("--file", "-f", default=DEFAULT_DATA_FILE, help="tasks JSON file")
+    p.add_argument("--storage", choices=["json", "journal"], default="json",
+                   help="json rewrites the file on every change; journal appends to <file>.log")
+    p.add_argument("--profile", action="store_true",
+                   help="print a per-phase timing breakdown to stderr")
+    sub = p.add_subparsers(dest="cmd")
+    for name, (help_text, add_args) in SUBCOMMANDS.items():
+        if command is None or name == command:
+            add_args(sub.add_parser(name, help=help_text, formatter_class=_help_formatter))
+        else:
+            sub.add_parser(name, help=help_text, add_help=False)
     return p
 
 
+def _command_in(argv: List[str]) -> Optional[str]:
+    """The subcommand `argv` names, or None if it names none or asks for help."""
+    args = iter(argv)
+    for arg in args:
+        if arg in ("-h", "--help"):
+            return None
+        if arg.startswith("-"):
+            # argparse accepts unambiguous prefixes (--fi) of long options
+            if arg in _VALUE_OPTIONS or (arg.startswith("--") and "=" not in arg and
+                                         any(o.startswith(arg) for o in _VALUE_OPTIONS if o.startswith("--"))):
+                next(args, None)
+            continue
+        return arg if arg in SUBCOMMANDS else None
+    return None
+
+
 def main(argv: Optional[List[str]] = None) -> int:
     argv = argv if argv is not None else sys.argv[1:]
-    parser = build_parser()
+    parser = build_parser(_command_in(argv))
     args = parser.parse_args(argv)
     if not hasattr(args, "func"):
         parser.print_help()
@@ -191,4 +715,9 @@ def main(argv: Optional[List[str]] = None) -> int:
     d = os.path.dirname(args.file)
     if d and not os.path.exists(d):
         os.makedirs(d, exist_ok=True)
-    return args.func(args)
\ No newline at end of file
+    profiling.start(profile=args.profile)
+    try:
+        with span(args.cmd):
+            return args.func(args)
+    finally:
+        profiling.stop()
\ No newline at end of file
@@ -0,0 +1,239 @@
+"""On-disk indexes for the tasks3 CLI.
+
+`TaskIndex` maps lowercase trigrams of every title and tag to the ids of
+the tasks containing them, and lives in a `<tasks file>.idx` sidecar.
+`BitmapIndex` maps each tag, each category and the done flag to a bitset of
+task ids (bit N set means task N), and lives in `<tasks file>.bits`. Both
+are stamped with the mtime/size of the tasks file they were built from and
+are rebuilt whenever those no longer match.
+
+The indexes only narrow the set of tasks a command has to look at: every
+candidate is still checked against the real task, and tasks an index has
+never seen (e.g. ones still sitting in the journal) are always candidates,
+so results are identical to a full scan.
+"""
+from __future__ import annotations
+
+import json
+import os
+
+from typing import Callable, Dict, Iterable, List, Optional, Set
+
+
+def index_path(path: str) -> str:
+    return path + ".idx"
+
+
+def bitmap_path(path: str) -> str:
+    return path + ".bits"
+
+
+def file_stamp(path: str) -> Optional[List[int]]:
+    """Return [mtime_ns, size] for `path`, or None if it does not exist."""
+    try:
+        st = os.stat(path)
+    except FileNotFoundError:
+        return None
+    return [st.st_mtime_ns, st.st_size]
+
+
+def trigrams(text: str) -> Set[str]:
+    text = text.lower()
+    return {text[i:i + 3] for i in range(len(text) - 2)}
+
+
+class TaskIndex:
+    """Trigram -> task id postings for the tasks in one tasks file."""
+
+    def __init__(self, stamp: Optional[List[int]] = None,
+                 postings: Optional[Dict[str, List[int]]] = None,
+                 ids: Optional[Iterable[int]] = None):
+        self.stamp = stamp
+        # postings stay as lists until a query needs them
+        self.postings: Dict[str, List[int]] = postings or {}
+        self.ids: Set[int] = set(ids or ())
+
+    @classmethod
+    def build(cls, tasks, stamp: Optional[List[int]] = None) -> "TaskIndex":
+        index = cls(stamp=stamp)
+        for t in tasks:
+            index.add(t)
+        return index
+
+    def add(self, task) -> None:
+        grams = trigrams(task.title)
+        for tag in task.tags:
+            grams |= trigrams(tag)
+        for g in grams:
+            self.postings.setdefault(g, []).append(task.id)
+        self.ids.add(task.id)
+
+    def covers(self, tid: int) -> bool:
+        return tid in self.ids
+
+    def candidates(self, query: str) -> Optional[Set[int]]:
+        """Ids that may contain `query`, or None if the query is too short
+        for the index to help (fewer than three characters)."""
+        grams = trigrams(query)
+        if not grams:
+            return None
+        lists = sorted((self.postings.get(g, []) for g in grams), key=len)
+        result = set(lists[0])
+        for ids in lists[1:]:
+            if not result:
+                break
+            result.intersection_update(ids)
+        return result
+
+    def save(self, path: str) -> None:
+        """Write the index next to `path`, stamped with its current state."""
+        self.stamp = file_stamp(path)
+        data = {"stamp": self.stamp, "ids": sorted(self.ids), "postings": self.postings}
+        tmp = index_path(path) + ".tmp"
+        with open(tmp, "w", encoding="utf-8") as f:
+            json.dump(data, f, ensure_ascii=False, separators=(",", ":"))
+        os.replace(tmp, index_path(path))
+
+
+def load_fresh(path: str) -> Optional[TaskIndex]:
+    """Return the saved index for `path` if it still matches the file."""
+    try:
+        with open(index_path(path), "r", encoding="utf-8") as f:
+            data = json.load(f)
+    except (FileNotFoundError, json.JSONDecodeError):
+        return None
+    if data.get("stamp") != file_stamp(path):
+        return None
+    return TaskIndex(stamp=data["stamp"], postings=data.get("postings"), ids=data.get("ids"))
+
+
+def _to_bytes(bits: int) -> bytes:
+    return bits.to_bytes((bits.bit_length() + 7) // 8, "little")
+
+
+def _from_ids(ids: List[int]) -> int:
+    """Build a bitset from a list of ids in one pass over a bytearray."""
+    if not ids:
+        return 0
+    buf = bytearray(max(ids) // 8 + 1)
+    for i in ids:
+        buf[i >> 3] |= 1 << (i & 7)
+    return int.from_bytes(buf, "little")
+
+
+def _has_bit(bits: bytes, i: int) -> bool:
+    j = i >> 3
+    return j < len(bits) and bool(bits[j] >> (i & 7) & 1)
+
+
+class BitmapIndex:
+    """Tag, category and done bitsets over task ids.
+
+    Bitsets are Python ints, so OR-ing tags and AND-ing the category and
+    done filters are single big-integer operations; the result is turned
+    into bytes once so each per-task membership test is O(1).
+    """
+
+    def __init__(self, stamp: Optional[List[int]] = None, ids: int = 0,
+                 tags: Optional[Dict[str, int]] = None,
+                 categories: Optional[Dict[str, int]] = None, done: int = 0):
+        self.stamp = stamp
+        self.ids = ids
+        self.tags: Dict[str, int] = tags or {}
+        self.categories: Dict[str, int] = categories or {}
+        self.done = done
+
+    @classmethod
+    def build(cls, tasks, stamp: Optional[List[int]] = None) -> "BitmapIndex":
+        ids: List[int] = []
+        done: List[int] = []
+        tags: Dict[str, List[int]] = {}
+        categories: Dict[str, List[int]] = {}
+        for t in tasks:
+            ids.append(t.id)
+            for tag in t.tags:
+                tags.setdefault(tag, []).append(t.id)
+            categories.setdefault(t.category, []).append(t.id)
+            if t.done:
+                done.append(t.id)
+        return cls(
+            stamp=stamp,
+            ids=_from_ids(ids),
+            tags={k: _from_ids(v) for k, v in tags.items()},
+            categories={k: _from_ids(v) for k, v in categories.items()},
+            done=_from_ids(done),
+        )
+
+    def add(self, task) -> None:
+        bit = 1 << task.id
+        self.ids |= bit
+        for tag in task.tags:
+            self.tags[tag] = self.tags.get(tag, 0) | bit
+        self.categories[task.category] = self.categories.get(task.category, 0) | bit
+        if task.done:
+            self.done |= bit
+
+    def mark_done(self, tid: int) -> None:
+        self.done |= 1 << tid
+
+    def select(self, tags: Optional[List[str]] = None, category: Optional[str] = None,
+               include_done: bool = True) -> Callable[[int], bool]:
+        """Return a predicate telling whether a task id may pass the filters.
+
+        `tags` are OR-ed together; `category` and the done filter are AND-ed.
+        """
+        bits = self.ids
+        if tags:
+            any_tag = 0
+            for tag in tags:
+                any_tag |= self.tags.get(tag, 0)
+            bits &= any_tag
+        if category:
+            bits &= self.categories.get(category, 0)
+        if not include_done:
+            bits &= ~self.done
+        hits = _to_bytes(bits)
+        known = _to_bytes(self.ids)
+        return lambda tid: _has_bit(hits, tid) or not _has_bit(known, tid)
+
+    def save(self, path: str) -> None:
+        self.stamp = file_stamp(path)
+        data = {
+            "stamp": self.stamp,
+            "ids": format(self.ids, "x"),
+            "tags": {k: format(v, "x") for k, v in self.tags.items()},
+            "categories": {k: format(v, "x") for k, v in self.categories.items()},
+            "done": format(self.done, "x"),
+        }
+        tmp = bitmap_path(path) + ".tmp"
+        with open(tmp, "w", encoding="utf-8") as f:
+            json.dump(data, f, ensure_ascii=False, separators=(",", ":"))
+        os.replace(tmp, bitmap_path(path))
+
+
+def load_bitmaps_fresh(path: str) -> Optional[BitmapIndex]:
+    """Return the saved bitmaps for `path` if they still match the file."""
+    try:
+        with open(bitmap_path(path), "r", encoding="utf-8") as f:
+            data = json.load(f)
+    except (FileNotFoundError, json.JSONDecodeError):
+        return None
+    if data.get("stamp") != file_stamp(path):
+        return None
+    return BitmapIndex(
+        stamp=data["stamp"],
+        ids=int(data["ids"], 16),
+        tags={k: int(v, 16) for k, v in data["tags"].items()},
+        categories={k: int(v, 16) for k, v in data["categories"].items()},
+        done=int(data["done"], 16),
+    )
+
+
+def load_bitmaps(path: str, tasks) -> BitmapIndex:
+    """Return fresh bitmaps for `path`, rebuilding them from `tasks` if needed."""
+    index = load_bitmaps_fresh(path)
+    if index is None:
+        index = BitmapIndex.build(tasks)
+        if os.path.exists(path):
+            index.save(path)
+    return index
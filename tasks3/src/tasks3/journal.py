@@ -0,0 +1,115 @@
+"""Append-only journal storage for the tasks3 CLI.
+
+In journal mode `add` and `done` append one JSON-lines record to
+`<tasks file>.log` instead of rewriting the whole tasks file. Reads replay
+the log on top of the snapshot stored in the tasks file itself, and
+`compact` folds the log back into the snapshot.
+
+Records look like:
+  {"op": "add", "task": {...}}
+  {"op": "done", "id": 3}
+
+Replaying is idempotent (an `add` for an id that already exists replaces
+it, `done` only sets a flag), so a crash between writing a new snapshot
+and removing the log never duplicates tasks.
+"""
+from __future__ import annotations
+
+import json
+import os
+
+from typing import Any, Dict, List, Set, Tuple
+
+# Compact automatically once the log grows past this many bytes.
+COMPACT_THRESHOLD = 1 << 20
+
+
+def journal_path(path: str) -> str:
+    return path + ".log"
+
+
+def append_records(path: str, records: List[Dict[str, Any]]) -> None:
+    """Append `records` to the journal of the tasks file at `path`."""
+    lines = "".join(json.dumps(r, ensure_ascii=False) + "\n" for r in records)
+    with open(journal_path(path), "a", encoding="utf-8") as f:
+        f.write(lines)
+        f.flush()
+
+
+def read_records(path: str) -> List[Dict[str, Any]]:
+    """Return the journal records for `path` ([] if there is no log).
+
+    A torn final line (from a crash mid-append) is ignored.
+    """
+    log = journal_path(path)
+    if not os.path.exists(log):
+        return []
+    records = []
+    with open(log, "r", encoding="utf-8") as f:
+        for line in f:
+            line = line.strip()
+            if not line:
+                continue
+            try:
+                records.append(json.loads(line))
+            except json.JSONDecodeError:
+                break
+    return records
+
+
+def replay(items: List[Dict[str, Any]], records: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+    """Apply journal `records` to the snapshot `items` (list of task dicts)."""
+    if not records:
+        return items
+    pos = {item["id"]: i for i, item in enumerate(items)}
+    for rec in records:
+        op = rec.get("op")
+        if op == "add":
+            task = rec["task"]
+            if task["id"] in pos:
+                items[pos[task["id"]]] = task
+            else:
+                pos[task["id"]] = len(items)
+                items.append(task)
+        elif op == "done":
+            i = pos.get(rec.get("id"))
+            if i is not None:
+                items[i]["done"] = True
+    return items
+
+
+def fold(records: List[Dict[str, Any]]) -> Tuple[Dict[int, Dict[str, Any]], Set[int]]:
+    """Collapse `records` into (tasks added by the log, ids marked done).
+
+    This is what `replay` does, but without needing the snapshot in memory:
+    a snapshot item whose id is in the first mapping is replaced by that
+    task, otherwise it is marked done if its id is in the second set. Tasks
+    left in the mapping come after the snapshot, in the order they were
+    first added.
+    """
+    added: Dict[int, Dict[str, Any]] = {}
+    done: Set[int] = set()
+    for rec in records:
+        op = rec.get("op")
+        if op == "add":
+            added[rec["task"]["id"]] = dict(rec["task"])
+        elif op == "done":
+            tid = rec.get("id")
+            if tid in added:
+                added[tid]["done"] = True
+            else:
+                done.add(tid)
+    return added, done
+
+
+def needs_compaction(path: str) -> bool:
+    log = journal_path(path)
+    return os.path.exists(log) and os.path.getsize(log) > COMPACT_THRESHOLD
+
+
+def discard(path: str) -> None:
+    """Remove the journal for `path`, e.g. after its snapshot was rewritten."""
+    try:
+        os.remove(journal_path(path))
+    except FileNotFoundError:
+        pass
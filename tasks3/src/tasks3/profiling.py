@@ -0,0 +1,103 @@
+"""Timing spans for the CLI's hot paths.
+
+`with span("parse"): ...` times one phase. Until `start()` turns spans on,
+`span()` returns a shared no-op, so a disabled span costs a flag check.
+`--profile` prints a per-phase breakdown whose self time leaves out nested
+spans; `TASKS_TRACE=<file>` appends one JSON line per span (see README).
+"""
+from __future__ import annotations
+
+import json
+import os
+import sys
+import time
+from contextlib import nullcontext
+from typing import Dict, List, Optional, TextIO
+
+TRACE_ENV = "TASKS_TRACE"
+
+_NULL = nullcontext()
+_enabled = False
+_report = False
+_trace: Optional[TextIO] = None
+_stack: List["_Span"] = []
+# name -> [calls, total seconds, self seconds], in order of first use
+_phases: Dict[str, list] = {}
+
+
+class _Span:
+    __slots__ = ("name", "start", "children")
+
+    def __init__(self, name: str):
+        self.name = name
+
+    def __enter__(self):
+        self.children = 0.0
+        _stack.append(self)
+        self.start = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc):
+        elapsed = time.perf_counter() - self.start
+        _stack.pop()
+        if _stack:
+            _stack[-1].children += elapsed
+        phase = _phases.setdefault(self.name, [0, 0.0, 0.0])
+        phase[0] += 1
+        phase[1] += elapsed
+        phase[2] += elapsed - self.children
+        if _trace is not None:
+            _trace.write(json.dumps({
+                "name": self.name,
+                "ts": int((time.time() - elapsed) * 1e6),
+                "dur": int(elapsed * 1e6),
+                "depth": len(_stack),
+                "pid": os.getpid(),
+            }) + "\n")
+        return False
+
+
+def span(name: str):
+    """Time the enclosed block as phase `name` (a no-op unless started)."""
+    if _enabled:
+        return _Span(name)
+    return _NULL
+
+
+def start(profile: bool = False, trace_path: Optional[str] = None) -> None:
+    """Turn spans on if `profile` is set or a trace file is given
+    (`trace_path`, default `TASKS_TRACE`)."""
+    global _enabled, _report, _trace
+    if trace_path is None:
+        trace_path = os.environ.get(TRACE_ENV)
+    _phases.clear()
+    _report = profile
+    if trace_path:
+        _trace = open(trace_path, "a", encoding="utf-8")
+    _enabled = bool(profile or trace_path)
+
+
+def stop(out: Optional[TextIO] = None) -> None:
+    """Turn spans off, print the breakdown if asked for and close the trace."""
+    global _enabled, _report, _trace
+    if _report:
+        report(out if out is not None else sys.stderr)
+    if _trace is not None:
+        _trace.close()
+        _trace = None
+    _enabled = _report = False
+
+
+def phases() -> Dict[str, tuple]:
+    """{name: (calls, total seconds, self seconds)} for the spans so far."""
+    return {name: tuple(v) for name, v in _phases.items()}
+
+
+def report(out: TextIO) -> None:
+    """Print the per-phase breakdown, slowest self time first."""
+    wall = sum(v[2] for v in _phases.values())
+    print(f"{'phase':<12} {'calls':>7} {'total ms':>10} {'self ms':>10} {'self %':>7}", file=out)
+    for name, (calls, total, own) in sorted(_phases.items(), key=lambda kv: -kv[1][2]):
+        share = 100.0 * own / wall if wall else 0.0
+        print(f"{name:<12} {calls:>7} {total * 1e3:>10.2f} {own * 1e3:>10.2f} {share:>6.1f}%", file=out)
+    print(f"{'(wall)':<12} {'':>7} {wall * 1e3:>10.2f}", file=out)
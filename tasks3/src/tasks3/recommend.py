@@ -0,0 +1,157 @@
+"""Choosing the tasks `recommend` suggests.
+
+A `Recommender` is built once for a set of candidate rows of a `TaskTable`
+(one pass over them, plus a sort for `oldest`) and then picks k of them in
+O(k) expected time, so a caller that keeps it, like the shell, pays the
+build once per candidate set. Strategies:
+
+- random: every candidate equally likely
+- oldest: weighted by age rank, the oldest candidate n times as likely as
+  the newest (a `created` that is not an ISO timestamp counts as oldest)
+- category: categories take turns, each adding one uniformly chosen task
+  per round, so a big category cannot crowd out the small ones
+- tags: a task carrying a `--prefer` tag is TAG_BOOST times as likely as
+  one carrying only the next tag down the list (tasks with none weigh 1)
+
+Weighted strategies draw from a Vose alias table, O(1) per draw, and draw
+again on a duplicate, which keeps the picks a sample without replacement.
+When duplicates pile up (k close to the number of candidates, or the
+weight concentrated on a few tasks) the remaining work goes to an exact
+weighted reservoir pass (Efraimidis-Spirakis) over all candidates instead.
+
+All randomness comes from the `random.Random` passed to `pick`, so a
+seeded one gives the same picks for the same store and filters.
+"""
+from __future__ import annotations
+
+import heapq
+import math
+from typing import TYPE_CHECKING, List, Sequence
+
+if TYPE_CHECKING:
+    from random import Random
+
+    from .table import TaskTable
+
+STRATEGIES = ("random", "oldest", "category", "tags")
+TAG_BOOST = 4
+
+
+class AliasTable:
+    """Vose's alias method: O(n) to build, O(1) per weighted draw."""
+
+    __slots__ = ("prob", "alias")
+
+    def __init__(self, weights: Sequence[float]):
+        n = len(weights)
+        total = float(sum(weights))
+        scaled = [w * n / total for w in weights]
+        self.prob = [1.0] * n
+        self.alias = list(range(n))
+        small = [i for i, p in enumerate(scaled) if p < 1.0]
+        large = [i for i, p in enumerate(scaled) if p >= 1.0]
+        while small and large:
+            s, g = small.pop(), large.pop()
+            self.prob[s] = scaled[s]
+            self.alias[s] = g
+            scaled[g] += scaled[s] - 1.0
+            (small if scaled[g] < 1.0 else large).append(g)
+        # whatever is left holds 1.0 up to rounding, as initialized
+
+    def draw(self, rng: Random) -> int:
+        i = rng.randrange(len(self.prob))
+        return i if rng.random() < self.prob[i] else self.alias[i]
+
+
+def _age_weights(table: TaskTable, rows: List[int]) -> List[float]:
+    created, ids = table.created, table.ids
+    newest_first = sorted(range(len(rows)), key=lambda i: (created[rows[i]], ids[rows[i]]), reverse=True)
+    weights = [0.0] * len(rows)
+    for rank, i in enumerate(newest_first, 1):
+        weights[i] = float(rank)
+    return weights
+
+
+def _tag_weights(table: TaskTable, rows: List[int], prefer: List[str]) -> List[float]:
+    lookup = {name: i for i, name in enumerate(table.tag_names)}
+    boost = {}
+    for pos, tag in enumerate(prefer):
+        if tag in lookup:
+            boost.setdefault(lookup[tag], float(TAG_BOOST ** (len(prefer) - pos)))
+    start, tag_ids = table.tag_start, table.tag_ids
+    return [max((boost.get(t, 1.0) for t in tag_ids[start[r]:start[r + 1]]), default=1.0)
+            for r in rows]
+
+
+class Recommender:
+    """Picks among fixed candidate `rows` of `table`; see the module docstring."""
+
+    def __init__(self, table: TaskTable, rows: List[int], strategy: str = "random",
+                 prefer: Sequence[str] = ()):
+        if strategy not in STRATEGIES:
+            raise ValueError(f"unknown strategy {strategy!r}")
+        self.rows = rows
+        self.strategy = strategy
+        if strategy == "category":
+            groups = {}
+            cats = table.category
+            for r in rows:
+                groups.setdefault(cats[r], []).append(r)
+            self.groups = list(groups.values())
+        elif strategy in ("oldest", "tags"):
+            if strategy == "oldest":
+                self.weights = _age_weights(table, rows)
+            else:
+                self.weights = _tag_weights(table, rows, list(prefer))
+            self.alias = AliasTable(self.weights) if rows else None
+
+    def pick(self, k: int, rng: Random) -> List[int]:
+        """k distinct rows (all of them if there are no more than k)."""
+        rows = self.rows
+        if k >= len(rows):
+            return list(rows)
+        if k <= 0:
+            return []
+        if self.strategy == "random":
+            return rng.sample(rows, k)
+        if self.strategy == "category":
+            return self._round_robin(k, rng)
+        return self._weighted(k, rng)
+
+    def _round_robin(self, k: int, rng: Random) -> List[int]:
+        groups = self.groups
+        quota = [0] * len(groups)
+        active = list(range(len(groups)))
+        left = k
+        while left:
+            # a full round gives every category one more; only the last,
+            # partial round needs a random choice of who gets one
+            if left >= len(active):
+                turn = active
+            else:
+                turn = rng.sample(active, left)
+            for g in turn:
+                quota[g] += 1
+            left -= len(turn)
+            active = [g for g in active if quota[g] < len(groups[g])]
+        picks = []
+        for g, n in enumerate(quota):
+            if n:
+                picks.extend(rng.sample(groups[g], n))
+        return picks
+
+    def _weighted(self, k: int, rng: Random) -> List[int]:
+        alias, rows = self.alias, self.rows
+        chosen = set()
+        for _ in range(3 * k + 16):
+            chosen.add(alias.draw(rng))
+            if len(chosen) == k:
+                return [rows[i] for i in chosen]
+        return self._reservoir(k, rng)
+
+    def _reservoir(self, k: int, rng: Random) -> List[int]:
+        """Exact weighted sample without replacement in one O(n log k) pass:
+        keep the k largest log(u) / w keys (u uniform in (0, 1])."""
+        weights, rows = self.weights, self.rows
+        keys = [math.log(1.0 - rng.random()) / w if w > 0 else -math.inf for w in weights]
+        return [rows[i] for i in heapq.nlargest(k, range(len(rows)), key=keys.__getitem__)]
@@ -0,0 +1,286 @@
+"""Interactive shell for the tasks3 CLI (`todo.py shell`).
+
+Every other command loads and parses the tasks file from scratch. The
+shell loads it once into a `TaskTable` and answers `add`, `list`,
+`search`, `recommend` and `done` lines from memory; each line takes the
+same arguments as the matching command. `recommend` keeps the engine it
+built for a set of filters until the table changes.
+
+Changes are turned into journal records (see `tasks3.journal`):
+
+- by default each change is appended to `<file>.log` as soon as it is
+  made, so other processes see it straight away and a crash loses nothing
+- with `--defer` they are kept in memory until `flush` (or the end of the
+  session)
+
+`flush` writes everything out: with `--storage journal` it appends any
+held records to the log, otherwise it rewrites the tasks file (folding the
+log into it). The session ends with a `flush` if anything is unwritten.
+
+Before each line the stamps (mtime, size) of the tasks file and its log
+are compared with the ones seen at the last load or write; if something
+else changed the store it is reloaded and any held changes are applied
+again on top.
+"""
+from __future__ import annotations
+
+import argparse
+import cmd
+import shlex
+import sys
+
+from dataclasses import asdict
+from typing import Dict, List, Optional, TextIO
+
+from . import (SUBCOMMANDS, Task, _help_formatter, _print_tasks, _recommend,
+               _store_stamps, allocate_id, iter_tasks, journal, save_tasks,
+               write_meta)
+from . import index as search_index
+from .profiling import span
+from .table import TaskTable
+
+
+class TaskShell(cmd.Cmd):
+    """Line-oriented front end over one resident task store."""
+
+    intro = "Tasks shell. Type help for commands, exit to quit."
+    prompt = "tasks> "
+
+    def __init__(self, path: str, storage: str = "json", defer: bool = False,
+                 stdin: Optional[TextIO] = None):
+        interactive = stdin is None and sys.stdin.isatty()
+        super().__init__(stdin=stdin)
+        # cmd uses input() (and so readline) only on a terminal
+        self.use_rawinput = interactive
+        if not interactive:
+            self.intro = None
+            self.prompt = ""
+        self.path = path
+        self.storage = storage
+        self.defer = defer
+        self.pending: List[dict] = []  # records not yet written anywhere
+        self.dirty = False  # the tasks file lags behind the log we appended to
+        self._parsers: Dict[str, argparse.ArgumentParser] = {}
+        self.load()
+
+    # -- the store ---------------------------------------------------------
+
+    def load(self) -> None:
+        """(Re)read the store and apply any changes still held in memory."""
+        # stamps first: a write landing during the load triggers another one
+        self.stamps = _store_stamps(self.path)
+        self.table = TaskTable.from_tasks(iter_tasks(self.path))
+        self._index: Optional[search_index.TaskIndex] = None
+        # `recommend` engines by filters; any change to the table drops them
+        self._engines: dict = {}
+        for rec in self.pending:
+            self._apply(rec)
+        ids = self.table.ids
+        self.next_free = max(allocate_id(self.path, ()), max(ids, default=0) + 1)
+
+    def _apply(self, rec: dict) -> None:
+        self._engines.clear()
+        if rec["op"] == "add":
+            if self.table.row_of(rec["task"]["id"]) is None:
+                t = Task(**rec["task"])
+                self.table.append(t)
+                if self._index is not None:
+                    self._index.add(t)
+        elif rec["op"] == "done":
+            self.table.mark_done(rec["id"])
+
+    def index(self) -> search_index.TaskIndex:
+        """Trigram index over the table, built on the first search."""
+        if self._index is None:
+            with span("index"):
+                self._index = search_index.TaskIndex.build(self.table)
+        return self._index
+
+    def _record(self, rec: dict) -> None:
+        self._apply(rec)
+        self.pending.append(rec)
+        if not self.defer:
+            self._append_pending()
+
+    def _append_pending(self) -> None:
+        journal.append_records(self.path, self.pending)
+        self.pending = []
+        if journal.needs_compaction(self.path):
+            save_tasks(self.path, list(self.table))
+            self.dirty = False
+        else:
+            self.dirty = self.storage != "journal"
+        self._written()
+
+    def _written(self) -> None:
+        write_meta(self.path, self.next_free)
+        self.stamps = _store_stamps(self.path)
+
+    def flush(self) -> None:
+        """Write out everything held in memory (see the module docstring)."""
+        if self.storage == "journal":
+            if self.pending:
+                self._append_pending()
+            return
+        if not (self.pending or self.dirty):
+            return
+        save_tasks(self.path, list(self.table))
+        if self._index is not None:
+            # it covers every task, so keep it for the next `search` command
+            self._index.save(self.path)
+        self.pending = []
+        self.dirty = False
+        self._written()
+
+    # -- command plumbing --------------------------------------------------
+
+    def _parse(self, name: str, line: str) -> Optional[argparse.Namespace]:
+        parser = self._parsers.get(name)
+        if parser is None:
+            help_text, add_args = SUBCOMMANDS[name]
+            parser = argparse.ArgumentParser(prog=name, description=help_text,
+                                             formatter_class=_help_formatter)
+            add_args(parser)
+            self._parsers[name] = parser
+        try:
+            args = parser.parse_args(shlex.split(line))
+        except ValueError as e:  # unbalanced quotes
+            print(f"{name}: {e}", file=sys.stderr)
+            return None
+        except SystemExit:  # argparse already printed the usage or help
+            return None
+        args.file, args.storage = self.path, self.storage
+        return args
+
+    def precmd(self, line: str) -> str:
+        if _store_stamps(self.path) != self.stamps:
+            print("(tasks file changed on disk; reloading)", file=sys.stderr)
+            with span("reload"):
+                self.load()
+        return line
+
+    def get_names(self) -> List[str]:
+        # keep `EOF` (end of input) out of `help`
+        return [n for n in super().get_names() if n != "do_EOF"]
+
+    def emptyline(self) -> bool:
+        return False
+
+    def default(self, line: str) -> bool:
+        print(f"Unknown command: {line.split()[0]} (type help for a list)")
+        return False
+
+    # -- commands ----------------------------------------------------------
+
+    def do_add(self, line: str) -> None:
+        """add TITLE [--tags a,b] [--category C]: add a task"""
+        args = self._parse("add", line)
+        if args is None:
+            return
+        from datetime import datetime
+        with span("add"):
+            tags = [t.strip() for t in args.tags.split(",")] if args.tags else []
+            t = Task(id=self.next_free, title=args.title, created=datetime.utcnow().isoformat() + "Z",
+                     tags=tags, category=args.category or "general")
+            self.next_free += 1
+            if self.defer:
+                # reserve the id now so other writers do not hand it out too
+                write_meta(self.path, self.next_free)
+            self._record({"op": "add", "task": asdict(t)})
+        print(f"Added task {t.id}: {t.title}")
+
+    def do_done(self, line: str) -> None:
+        """done ID: mark a task as completed"""
+        args = self._parse("done", line)
+        if args is None:
+            return
+        with span("done"):
+            if self.table.row_of(args.id) is None:
+                print(f"No task with id {args.id}.")
+                return
+            self._record({"op": "done", "id": args.id})
+        print(f"Marked task {args.id} done")
+
+    def do_list(self, line: str) -> None:
+        """list [--all] [--tags a,b] [--category C]: list tasks"""
+        args = self._parse("list", line)
+        if args is None:
+            return
+        with span("list"):
+            table = self.table
+            if not len(table):
+                print("No tasks.")
+                return
+            tags = [x.strip() for x in args.tags.split(",")] if args.tags else []
+            with span("filter"):
+                rows = table.select(tags=tags, category=args.category, include_done=args.all)
+            _print_tasks([table.task(r) for r in rows])
+
+    def do_search(self, line: str) -> None:
+        """search QUERY [--category C]: find tasks by title or tag text"""
+        args = self._parse("search", line)
+        if args is None:
+            return
+        with span("search"):
+            table = self.table
+            cands = self.index().candidates(args.query)
+            with span("filter"):
+                rows = None
+                if cands is not None:
+                    rows = sorted(r for r in map(table.row_of, cands) if r is not None)
+                rows = table.search(args.query, rows)
+            if not rows:
+                print("No matches found.")
+                return
+            if args.category:
+                rows = table.select(category=args.category, rows=rows)
+            _print_tasks([table.task(r) for r in rows])
+
+    def do_recommend(self, line: str) -> None:
+        """recommend N [--all] [--tags a,b] [--category C] [--strategy S] [--seed N]: suggest N tasks"""
+        args = self._parse("recommend", line)
+        if args is None:
+            return
+        with span("recommend"):
+            if not len(self.table):
+                print("No tasks.")
+                return
+            # the on-disk bitmaps may not know about held changes
+            _recommend(args, self.table, prefilter=False, cache=self._engines)
+
+    def do_flush(self, line: str) -> None:
+        """flush: write held changes to disk now"""
+        with span("flush"):
+            self.flush()
+
+    def do_reload(self, line: str) -> None:
+        """reload: reread the tasks file (held changes are kept)"""
+        with span("reload"):
+            self.load()
+        print(f"Loaded {len(self.table)} task(s)")
+
+    def do_exit(self, line: str) -> bool:
+        """exit: write held changes and leave the shell"""
+        return True
+
+    do_quit = do_exit
+
+    def do_EOF(self, line: str) -> bool:
+        if self.use_rawinput:
+            print()
+        return True
+
+    def postloop(self) -> None:
+        self.flush()
+
+
+def run(path: str, storage: str = "json", defer: bool = False,
+        stdin: Optional[TextIO] = None) -> int:
+    """Run a shell over the store at `path` until exit or end of input."""
+    shell = TaskShell(path, storage=storage, defer=defer, stdin=stdin)
+    try:
+        shell.cmdloop()
+    except KeyboardInterrupt:
+        print()
+        shell.flush()
+    return 0
@@ -0,0 +1,157 @@
+"""Columnar in-memory task storage for the tasks3 CLI.
+
+A list of `Task` dataclasses costs an instance dict, a tag list and an ISO
+string per task. `TaskTable` keeps the same data in parallel columns
+instead:
+
+- ids in an `array('q')` and done flags in a `bytearray`
+- tags and categories interned to small ints; each row's tags are a slice
+  of one shared `array('I')` (`tag_start[row]:tag_start[row + 1]`)
+- created timestamps as epoch microseconds in an `array('q')`; strings
+  that would not round-trip exactly are kept verbatim in a side dict
+
+`Task` objects are only built on demand by `task(row)`.
+"""
+from __future__ import annotations
+
+from array import array
+from datetime import datetime, timedelta
+from typing import Dict, Iterable, Iterator, List, Optional
+
+_EPOCH = datetime(1970, 1, 1)
+_US = timedelta(microseconds=1)
+# marks a row whose `created` string lives in TaskTable.raw_created
+_RAW = -(1 << 63)
+
+
+def _created_to_us(created: str) -> int:
+    """Epoch microseconds for an ISO `...Z` timestamp, or _RAW if the
+    string would not come back unchanged from `_us_to_created`."""
+    if not created.endswith("Z"):
+        return _RAW
+    try:
+        us = (datetime.fromisoformat(created[:-1]) - _EPOCH) // _US
+    except (ValueError, TypeError):
+        return _RAW
+    return us if _us_to_created(us) == created else _RAW
+
+
+def _us_to_created(us: int) -> str:
+    return (_EPOCH + us * _US).isoformat() + "Z"
+
+
+class TaskTable:
+    """Tasks stored column-wise; see the module docstring."""
+
+    def __init__(self):
+        self.ids = array("q")
+        self.titles: List[str] = []
+        self.done = bytearray()
+        self.created = array("q")
+        self.raw_created: Dict[int, str] = {}
+        self.category = array("I")
+        self.tag_start = array("I", [0])
+        self.tag_ids = array("I")
+        self.tag_names: List[str] = []
+        self.category_names: List[str] = []
+        self._tag_lookup: Dict[str, int] = {}
+        self._category_lookup: Dict[str, int] = {}
+        self._rows: Optional[Dict[int, int]] = None
+
+    @classmethod
+    def from_tasks(cls, tasks: Iterable) -> "TaskTable":
+        table = cls()
+        for t in tasks:
+            table.append(t)
+        return table
+
+    def _intern(self, names: List[str], lookup: Dict[str, int], name: str) -> int:
+        i = lookup.get(name)
+        if i is None:
+            i = lookup[name] = len(names)
+            names.append(name)
+        return i
+
+    def append(self, task) -> int:
+        """Add `task` as a new row and return the row number."""
+        row = len(self.ids)
+        self.ids.append(task.id)
+        self.titles.append(task.title)
+        self.done.append(1 if task.done else 0)
+        us = _created_to_us(task.created)
+        if us == _RAW:
+            self.raw_created[row] = task.created
+        self.created.append(us)
+        self.category.append(self._intern(self.category_names, self._category_lookup, task.category))
+        for tag in task.tags:
+            self.tag_ids.append(self._intern(self.tag_names, self._tag_lookup, tag))
+        self.tag_start.append(len(self.tag_ids))
+        if self._rows is not None:
+            self._rows[task.id] = row
+        return row
+
+    def __len__(self) -> int:
+        return len(self.ids)
+
+    def __iter__(self) -> Iterator:
+        for row in range(len(self.ids)):
+            yield self.task(row)
+
+    def row_of(self, tid: int) -> Optional[int]:
+        """Row holding task `tid` (the id -> row map is built on first use)."""
+        if self._rows is None:
+            self._rows = {tid: row for row, tid in enumerate(self.ids)}
+        return self._rows.get(tid)
+
+    def tags(self, row: int) -> List[str]:
+        names = self.tag_names
+        return [names[i] for i in self.tag_ids[self.tag_start[row]:self.tag_start[row + 1]]]
+
+    def created_at(self, row: int) -> str:
+        us = self.created[row]
+        return self.raw_created[row] if us == _RAW else _us_to_created(us)
+
+    def task(self, row: int):
+        """Materialize row `row` as a `Task`."""
+        from . import Task
+        return Task(id=self.ids[row], title=self.titles[row], created=self.created_at(row),
+                    tags=self.tags(row), category=self.category_names[self.category[row]],
+                    done=bool(self.done[row]))
+
+    def mark_done(self, tid: int) -> bool:
+        row = self.row_of(tid)
+        if row is None:
+            return False
+        self.done[row] = 1
+        return True
+
+    def select(self, tags: Optional[List[str]] = None, category: Optional[str] = None,
+               include_done: bool = True, rows: Optional[Iterable[int]] = None) -> List[int]:
+        """Rows passing the `list`/`recommend` filters (tags OR-ed, the
+        category and done filters AND-ed), optionally within `rows`."""
+        rows = range(len(self.ids)) if rows is None else rows
+        done = self.done
+        if not include_done:
+            rows = [r for r in rows if not done[r]]
+        if tags:
+            wanted = {self._tag_lookup[t] for t in tags if t in self._tag_lookup}
+            start, ids = self.tag_start, self.tag_ids
+            rows = [r for r in rows if not wanted.isdisjoint(ids[start[r]:start[r + 1]])]
+        if category:
+            cid = self._category_lookup.get(category)
+            cats = self.category
+            rows = [r for r in rows if cats[r] == cid]
+        return list(rows)
+
+    def search(self, query: str, rows: Optional[Iterable[int]] = None) -> List[int]:
+        """Rows whose title or any tag contains `query`, case-insensitively.
+
+        Tags are interned, so each distinct tag is lowercased once rather
+        than once per task.
+        """
+        q = query.lower()
+        rows = range(len(self.ids)) if rows is None else rows
+        hit_tags = {i for i, name in enumerate(self.tag_names) if q in name.lower()}
+        titles, start, ids = self.titles, self.tag_start, self.tag_ids
+        return [r for r in rows
+                if q in titles[r].lower() or not hit_tags.isdisjoint(ids[start[r]:start[r + 1]])]
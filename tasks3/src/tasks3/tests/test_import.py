@@ -0,0 +1,73 @@
+import io
+import os
+import sys
+import tempfile
+import json
+from argparse import Namespace
+
+ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), "..", ".."))
+if ROOT not in sys.path:
+    sys.path.insert(0, ROOT)
+
+import tasks3 as todo
+from tasks3 import journal
+
+
+def temp_file(suffix, text=None):
+    fd, path = tempfile.mkstemp(suffix=suffix)
+    os.close(fd)
+    if text is not None:
+        with open(path, "w", encoding="utf-8") as f:
+            f.write(text)
+    return path
+
+
+def cleanup(*paths):
+    for path in paths:
+        for p in (path, journal.journal_path(path), todo.meta_path(path)):
+            if os.path.exists(p):
+                os.remove(p)
+
+
+JSONL = "\n".join([
+    json.dumps({"title": "A", "tags": ["x", "y"], "category": "home"}),
+    "{not json",
+    json.dumps({"title": "B", "tags": "p, q"}),
+    "",
+    json.dumps({"tags": ["no title"]}),
+    json.dumps({"title": "C", "tags": [1, 2]}),
+    json.dumps({"title": "D"}),
+]) + "\n"
+
+
+def test_import_jsonl_rejects_bad_rows(capsys):
+    tasks_path = temp_file(".json", json.dumps([
+        {"id": 4, "title": "existing", "created": "", "tags": [], "category": "c", "done": False},
+    ]))
+    src = temp_file(".jsonl", JSONL)
+    ret = todo.cmd_import(Namespace(file=tasks_path, source=src, format=None, storage="json"))
+    captured = capsys.readouterr()
+    assert ret == 1
+    assert "Imported 3 task(s)" in captured.out and "3 rejected" in captured.out
+    assert "line 2:" in captured.err and "line 5: missing title" in captured.err and "line 6:" in captured.err
+    tasks = todo.load_tasks(tasks_path)
+    assert [(t.id, t.title, t.tags, t.category) for t in tasks] == [
+        (4, "existing", [], "c"),
+        (5, "A", ["x", "y"], "home"),
+        (6, "B", ["p", "q"], "general"),
+        (7, "D", [], "general"),
+    ]
+    cleanup(tasks_path, src)
+
+
+def test_import_csv_from_stdin_journal_appends_once(monkeypatch, capsys):
+    tasks_path = temp_file(".json", "[]")
+    monkeypatch.setattr(sys, "stdin", io.StringIO('title,tags,category\nWash car,"chores,outside",household\nRead,,\n'))
+    ret = todo.cmd_import(Namespace(file=tasks_path, source="-", format="csv", storage="journal"))
+    assert ret == 0
+    assert "Imported 2 task(s)" in capsys.readouterr().out
+    assert open(tasks_path, encoding="utf-8").read() == "[]"
+    assert len(journal.read_records(tasks_path)) == 2
+    tasks = todo.load_tasks(tasks_path)
+    assert [(t.id, t.tags, t.category) for t in tasks] == [(1, ["chores", "outside"], "household"), (2, [], "general")]
+    cleanup(tasks_path)
@@ -0,0 +1,131 @@
+import os
+import sys
+import tempfile
+import json
+from argparse import Namespace
+
+ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), "..", ".."))
+if ROOT not in sys.path:
+    sys.path.insert(0, ROOT)
+
+import tasks3 as todo
+from tasks3 import index as search_index
+from tasks3 import journal
+
+
+TASKS = [
+    {"id": 1, "title": "Buy milk", "created": "", "tags": ["shopping"], "category": "home", "done": False},
+    {"id": 2, "title": "Read book", "created": "", "tags": ["leisure"], "category": "home", "done": False},
+    {"id": 3, "title": "Milkshake run", "created": "", "tags": ["Food"], "category": "fun", "done": True},
+    {"id": 4, "title": "Email Bob", "created": "", "tags": ["work", "inbox"], "category": "work", "done": False},
+]
+
+
+def temp_tasks_file(data=None):
+    fd, path = tempfile.mkstemp(suffix=".json")
+    os.close(fd)
+    if data is not None:
+        with open(path, "w", encoding="utf-8") as f:
+            json.dump(data, f)
+    return path
+
+
+def cleanup(path):
+    for p in (path, journal.journal_path(path), todo.meta_path(path), search_index.index_path(path),
+              search_index.bitmap_path(path)):
+        if os.path.exists(p):
+            os.remove(p)
+
+
+def scan(tasks, q):
+    q = q.lower()
+    return [t.id for t in tasks if q in t.title.lower() or any(q in tag.lower() for tag in t.tags)]
+
+
+def test_candidates_match_full_scan():
+    tasks = [todo.Task(**item) for item in TASKS]
+    index = search_index.TaskIndex.build(tasks)
+    for q in ["milk", "MILK", "ilk", "ook", "food", "inbox", "bob", "zzz", "shake run", "k r"]:
+        cands = index.candidates(q.lower())
+        assert set(scan(tasks, q)) <= cands
+        assert scan([t for t in tasks if t.id in cands], q) == scan(tasks, q)
+    assert index.candidates("mi") is None
+
+
+def test_search_builds_sidecar_and_rebuilds_when_stale(capsys):
+    path = temp_tasks_file(TASKS)
+    todo.cmd_search(Namespace(file=path, query="milk", category=None))
+    out = capsys.readouterr().out
+    assert "Buy milk" in out and "Milkshake run" in out
+    assert search_index.load_fresh(path) is not None
+
+    # an external edit changes mtime/size, so the sidecar must be ignored
+    with open(path, "w", encoding="utf-8") as f:
+        json.dump(TASKS + [{"id": 5, "title": "More milk", "created": "", "tags": [], "category": "home", "done": False}], f)
+    assert search_index.load_fresh(path) is None
+    todo.cmd_search(Namespace(file=path, query="milk", category=None))
+    assert "More milk" in capsys.readouterr().out
+    cleanup(path)
+
+
+def test_add_keeps_index_fresh(capsys):
+    path = temp_tasks_file(TASKS)
+    todo.cmd_search(Namespace(file=path, query="book", category=None))
+    todo.cmd_add(Namespace(file=path, title="Bookshelf", tags="diy", category="", storage="json"))
+    index = search_index.load_fresh(path)
+    assert index is not None and index.covers(5)
+    capsys.readouterr()
+    todo.cmd_search(Namespace(file=path, query="book", category=None))
+    out = capsys.readouterr().out
+    assert "Read book" in out and "Bookshelf" in out
+    cleanup(path)
+
+
+def test_journaled_tasks_are_searched_without_reindexing(capsys):
+    path = temp_tasks_file(TASKS)
+    todo.cmd_search(Namespace(file=path, query="milk", category=None))
+    todo.cmd_add(Namespace(file=path, title="Oat milk", tags="", category="", storage="journal"))
+    capsys.readouterr()
+    todo.cmd_search(Namespace(file=path, query="milk", category=None))
+    assert "Oat milk" in capsys.readouterr().out
+    cleanup(path)
+
+
+def exact(tasks, tags=None, category=None, include_done=True):
+    return [t.id for t in tasks
+            if (include_done or not t.done)
+            and (not tags or any(tag in t.tags for tag in tags))
+            and (not category or t.category == category)]
+
+
+def test_bitmap_select_matches_filters():
+    tasks = [todo.Task(**item) for item in TASKS]
+    bitmaps = search_index.BitmapIndex.build(tasks)
+    for tags in (None, ["shopping"], ["work", "Food"], ["nope"]):
+        for category in (None, "home", "fun", "missing"):
+            for include_done in (True, False):
+                may_match = bitmaps.select(tags=tags, category=category, include_done=include_done)
+                assert [t.id for t in tasks if may_match(t.id)] == exact(tasks, tags, category, include_done)
+    # ids the bitmaps have never seen always pass
+    assert bitmaps.select(tags=["nope"])(99)
+
+
+def test_bitmaps_persist_and_track_done(capsys):
+    path = temp_tasks_file(TASKS)
+    # recommend builds the sidecar; list only uses it once it is fresh
+    todo.cmd_recommend(Namespace(file=path, count=5, all=False, tags="shopping,inbox", category=None))
+    out = capsys.readouterr().out
+    assert "Buy milk" in out and "Email Bob" in out and "Read book" not in out
+    todo.cmd_list(Namespace(file=path, all=False, tags="shopping,inbox", category=None))
+    assert capsys.readouterr().out.count("\n") == 2
+    bitmaps = search_index.load_bitmaps_fresh(path)
+    assert bitmaps is not None and bitmaps.tags["inbox"] == 1 << 4
+
+    todo.cmd_done(Namespace(file=path, id=1, storage="json"))
+    bitmaps = search_index.load_bitmaps_fresh(path)
+    assert bitmaps is not None and bitmaps.done & (1 << 1)
+    capsys.readouterr()
+    todo.cmd_list(Namespace(file=path, all=False, tags=None, category="home"))
+    out = capsys.readouterr().out
+    assert "Read book" in out and "Buy milk" not in out
+    cleanup(path)
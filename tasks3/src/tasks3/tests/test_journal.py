@@ -0,0 +1,130 @@
+import os
+import sys
+import tempfile
+import json
+from argparse import Namespace
+
+ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), "..", ".."))
+if ROOT not in sys.path:
+    sys.path.insert(0, ROOT)
+
+import tasks3 as todo
+from tasks3 import journal
+
+
+def temp_tasks_file(data=None):
+    fd, path = tempfile.mkstemp(suffix=".json")
+    os.close(fd)
+    if data is not None:
+        with open(path, "w", encoding="utf-8") as f:
+            json.dump(data, f)
+    return path
+
+
+def cleanup(path):
+    for p in (path, journal.journal_path(path), todo.meta_path(path)):
+        if os.path.exists(p):
+            os.remove(p)
+
+
+def add(path, title, storage="journal", tags="", category=""):
+    todo.cmd_add(Namespace(file=path, title=title, tags=tags, category=category, storage=storage))
+
+
+def test_journal_add_appends_without_rewriting_snapshot():
+    path = temp_tasks_file([
+        {"id": 1, "title": "A", "created": "", "tags": [], "category": "c", "done": False},
+    ])
+    before = open(path, encoding="utf-8").read()
+    add(path, "B", tags="x")
+    assert open(path, encoding="utf-8").read() == before
+    records = journal.read_records(path)
+    assert [r["op"] for r in records] == ["add"]
+    tasks = todo.load_tasks(path)
+    assert [(t.id, t.title, t.tags) for t in tasks] == [(1, "A", []), (2, "B", ["x"])]
+    cleanup(path)
+
+
+def test_journal_matches_json_storage():
+    jpath = temp_tasks_file([])
+    spath = temp_tasks_file([])
+    for path, storage in ((jpath, "journal"), (spath, "json")):
+        add(path, "one", storage=storage, tags="a,b", category="home")
+        add(path, "two", storage=storage)
+        todo.cmd_done(Namespace(file=path, id=1, storage=storage))
+    loaded = todo.load_tasks(jpath)
+    expected = todo.load_tasks(spath)
+    # created timestamps differ between the two runs
+    for t in loaded + expected:
+        t.created = ""
+    assert loaded == expected
+    assert loaded[0].done and not loaded[1].done
+    cleanup(jpath)
+    cleanup(spath)
+
+
+def test_compact_folds_log_into_snapshot(capsys):
+    path = temp_tasks_file([])
+    add(path, "A")
+    add(path, "B")
+    before = todo.load_tasks(path)
+    todo.cmd_compact(Namespace(file=path))
+    assert "Compacted 2" in capsys.readouterr().out
+    assert not os.path.exists(journal.journal_path(path))
+    assert todo.load_tasks(path) == before
+    cleanup(path)
+
+
+def test_replay_is_idempotent_and_ignores_torn_line():
+    path = temp_tasks_file([])
+    add(path, "A")
+    with open(journal.journal_path(path), "a", encoding="utf-8") as f:
+        f.write(open(journal.journal_path(path), encoding="utf-8").read())
+        f.write('{"op": "add", "ta')
+    tasks = todo.load_tasks(path)
+    assert [t.title for t in tasks] == ["A"]
+    cleanup(path)
+
+
+def test_done_unknown_id(capsys):
+    path = temp_tasks_file([])
+    assert todo.cmd_done(Namespace(file=path, id=7, storage="journal")) == 1
+    assert "No task with id 7" in capsys.readouterr().out
+    cleanup(path)
+
+
+def test_journal_add_uses_high_water_mark_without_loading(monkeypatch):
+    path = temp_tasks_file([
+        {"id": 1, "title": "A", "created": "", "tags": [], "category": "c", "done": False},
+    ])
+    add(path, "B")
+
+    def boom(*args, **kwargs):
+        raise AssertionError("add should not read the task bodies")
+
+    monkeypatch.setattr(todo, "load_tasks", boom)
+    monkeypatch.setattr(todo, "iter_tasks", boom)
+    add(path, "C")
+    monkeypatch.undo()
+    assert [t.id for t in todo.load_tasks(path)] == [1, 2, 3]
+    cleanup(path)
+
+
+def test_ids_are_not_reused_after_delete():
+    path = temp_tasks_file([])
+    for title in ("A", "B", "C"):
+        add(path, title, storage="json")
+    # drop the newest task behind the CLI's back
+    todo.save_tasks(path, todo.load_tasks(path)[:1])
+    add(path, "D")
+    assert [t.id for t in todo.load_tasks(path)] == [1, 4]
+    cleanup(path)
+
+
+def test_stale_meta_falls_back_to_scan():
+    path = temp_tasks_file([])
+    add(path, "A")
+    with open(path, "w", encoding="utf-8") as f:
+        json.dump([{"id": 10, "title": "X", "created": "", "tags": []}], f)
+    assert todo.allocate_id(path) == 11
+    cleanup(path)
@@ -0,0 +1,78 @@
+import io
+import os
+import sys
+import tempfile
+import json
+
+ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), "..", ".."))
+if ROOT not in sys.path:
+    sys.path.insert(0, ROOT)
+
+import tasks3 as todo
+from tasks3 import profiling
+
+
+def temp_tasks_file(data=None):
+    fd, path = tempfile.mkstemp(suffix=".json")
+    os.close(fd)
+    if data is not None:
+        with open(path, "w", encoding="utf-8") as f:
+            json.dump(data, f)
+    return path
+
+
+def make_tasks(n):
+    return [{"id": i, "title": f"task {i}", "created": "2023-01-01T00:00:00Z",
+             "tags": ["x"], "category": "c", "done": False} for i in range(1, n + 1)]
+
+
+def test_spans_are_shared_noops_when_disabled():
+    before = profiling.phases()
+    assert profiling.span("parse") is profiling.span("filter")
+    with profiling.span("parse"):
+        pass
+    assert profiling.phases() == before
+
+
+def test_nested_spans_split_self_time():
+    profiling.start(profile=True, trace_path="")
+    try:
+        with profiling.span("outer"):
+            with profiling.span("inner"):
+                pass
+            with profiling.span("inner"):
+                pass
+        phases = profiling.phases()
+    finally:
+        profiling.stop(out=io.StringIO())
+    assert phases["inner"][0] == 2
+    calls, total, own = phases["outer"]
+    assert calls == 1
+    assert abs(own - (total - phases["inner"][1])) < 1e-9
+
+
+def test_profile_flag_prints_breakdown(capsys):
+    path = temp_tasks_file(make_tasks(300))
+    assert todo.main(["-f", path, "--profile", "list"]) == 0
+    captured = capsys.readouterr()
+    assert len(captured.out.splitlines()) == 300
+    phases = {line.split()[0] for line in captured.err.splitlines()[1:]}
+    assert {"list", "read", "parse", "build", "filter", "sort", "format", "print", "(wall)"} <= phases
+    assert not profiling._enabled
+    os.remove(path)
+
+
+def test_trace_env_writes_json_lines(monkeypatch, capsys):
+    path = temp_tasks_file(make_tasks(5))
+    trace = path + ".trace"
+    monkeypatch.setenv(profiling.TRACE_ENV, trace)
+    assert todo.main(["-f", path, "done", "3"]) == 0
+    assert capsys.readouterr().err == ""
+    with open(trace, "r", encoding="utf-8") as f:
+        events = [json.loads(line) for line in f]
+    names = [e["name"] for e in events]
+    assert names[-1] == "done" and events[-1]["depth"] == 0
+    assert {"parse", "build", "save"} <= set(names)
+    assert all(e["dur"] >= 0 and e["pid"] == os.getpid() for e in events)
+    for p in (path, path + ".meta", trace):
+        os.remove(p)
@@ -0,0 +1,113 @@
+import io
+import os
+import random
+import sys
+import tempfile
+import json
+from argparse import Namespace
+from collections import Counter
+
+ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), "..", ".."))
+if ROOT not in sys.path:
+    sys.path.insert(0, ROOT)
+
+import tasks3 as todo
+from tasks3.recommend import AliasTable, Recommender
+from tasks3.shell import TaskShell
+from tasks3.table import TaskTable
+
+
+def temp_tasks_file(data=None):
+    fd, path = tempfile.mkstemp(suffix=".json")
+    os.close(fd)
+    if data is not None:
+        with open(path, "w", encoding="utf-8") as f:
+            json.dump(data, f)
+    return path
+
+
+def make_tasks(n, categories=("c",)):
+    return [{"id": i, "title": f"task {i}", "created": f"2023-01-01T00:00:{i % 60:02d}Z",
+             "tags": ["urgent"] if i % 10 == 0 else ["x"], "category": categories[i % len(categories)],
+             "done": False} for i in range(1, n + 1)]
+
+
+def make_table(n, categories=("c",)):
+    return TaskTable.from_tasks(todo.Task(**d) for d in make_tasks(n, categories))
+
+
+def recommend_args(count, **kw):
+    defaults = dict(all=False, tags=None, category=None, strategy="random", prefer=None, seed=None)
+    defaults.update(kw)
+    return Namespace(count=count, **defaults)
+
+
+def test_alias_table_follows_weights():
+    alias = AliasTable([1, 2, 7])
+    rng = random.Random(0)
+    counts = Counter(alias.draw(rng) for _ in range(20000))
+    for i, w in enumerate([0.1, 0.2, 0.7]):
+        assert abs(counts[i] / 20000 - w) < 0.02
+
+
+def test_picks_are_distinct_and_capped():
+    table = make_table(50)
+    rng = random.Random(1)
+    for strategy in ("random", "oldest", "category", "tags"):
+        engine = Recommender(table, list(range(50)), strategy=strategy, prefer=["urgent"])
+        picks = engine.pick(10, rng)
+        assert len(set(picks)) == 10
+        assert sorted(engine.pick(80, rng)) == list(range(50))
+
+
+def test_reservoir_pass_is_weighted_without_replacement():
+    table = make_table(40)
+    engine = Recommender(table, list(range(40)), strategy="tags", prefer=["urgent"])
+    rng = random.Random(2)
+    counts = Counter()
+    for _ in range(2000):
+        picks = engine._reservoir(4, rng)
+        assert len(set(picks)) == 4
+        counts.update(picks)
+    # rows 9, 19, 29 and 39 carry the tag and four times the weight
+    heavy = sum(counts[r] for r in (9, 19, 29, 39)) / 4
+    light = sum(counts[r] for r in range(40) if r % 10 != 9) / 36
+    assert heavy > 2.5 * light
+    # nearly every candidate: alias draws keep hitting duplicates
+    assert len(set(engine.pick(39, rng))) == 39
+
+
+def test_category_round_robin_spreads_picks():
+    categories = ("big",) * 8 + ("small", "tiny")
+    table = make_table(100, categories)
+    engine = Recommender(table, list(range(100)), strategy="category")
+    picks = engine.pick(7, random.Random(3))
+    cats = Counter(table.category_names[table.category[r]] for r in picks)
+    assert cats["small"] >= 2 and cats["tiny"] >= 2
+
+
+def test_seed_makes_recommend_repeatable(capsys):
+    path = temp_tasks_file(make_tasks(200))
+    outputs = []
+    for _ in range(2):
+        todo.main(["-f", path, "recommend", "5", "--strategy", "oldest", "--seed", "42"])
+        outputs.append(capsys.readouterr().out)
+    assert outputs[0] == outputs[1]
+    assert outputs[0].startswith("Recommended 5 task(s):")
+    os.remove(path)
+
+
+def test_shell_reuses_engine_until_table_changes(capsys):
+    path = temp_tasks_file(make_tasks(20))
+    shell = TaskShell(path, defer=True, stdin=io.StringIO())
+    table = shell.table
+    assert todo._recommend(recommend_args(3, seed=1), table, prefilter=False, cache=shell._engines) == 0
+    engine = next(iter(shell._engines.values()))
+    todo._recommend(recommend_args(3, seed=2), table, prefilter=False, cache=shell._engines)
+    assert list(shell._engines.values()) == [engine]
+    shell.onecmd("done 1")
+    assert shell._engines == {}
+    capsys.readouterr()
+    for p in (path, todo.meta_path(path)):
+        if os.path.exists(p):
+            os.remove(p)
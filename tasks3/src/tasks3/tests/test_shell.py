@@ -0,0 +1,116 @@
+import io
+import os
+import sys
+import tempfile
+import json
+
+ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), "..", ".."))
+if ROOT not in sys.path:
+    sys.path.insert(0, ROOT)
+
+import tasks3 as todo
+from tasks3 import journal
+from tasks3.shell import TaskShell
+
+
+def temp_tasks_file(data=None):
+    fd, path = tempfile.mkstemp(suffix=".json")
+    os.close(fd)
+    if data is not None:
+        with open(path, "w", encoding="utf-8") as f:
+            json.dump(data, f)
+    return path
+
+
+def cleanup(path):
+    for p in (path, journal.journal_path(path), todo.meta_path(path), path + ".idx"):
+        if os.path.exists(p):
+            os.remove(p)
+
+
+def make_tasks(n):
+    return [{"id": i, "title": f"task {i}", "created": "2023-01-01T00:00:00Z",
+             "tags": ["x"], "category": "c", "done": False} for i in range(1, n + 1)]
+
+
+def run(shell, line):
+    return shell.onecmd(shell.precmd(line))
+
+
+def test_script_on_stdin(monkeypatch, capsys):
+    path = temp_tasks_file(make_tasks(2))
+    script = "add 'Buy milk' --tags shop\nsearch milk\ndone 1\nlist\ndone 9\nfrobnicate\nexit\n"
+    monkeypatch.setattr(sys, "stdin", io.StringIO(script))
+    assert todo.main(["-f", path, "shell"]) == 0
+    out = capsys.readouterr().out.splitlines()
+    assert out[0] == "Added task 3: Buy milk"
+    assert out[1].startswith("  3. [ ] Buy milk [shop]")
+    assert out[2] == "Marked task 1 done"
+    assert [line[:8] for line in out[3:5]] == ["  2. [ ]", "  3. [ ]"]
+    assert out[5] == "No task with id 9."
+    assert out[6].startswith("Unknown command: frobnicate")
+    # the session ends by folding its log into the tasks file
+    assert not os.path.exists(journal.journal_path(path))
+    tasks = todo.load_tasks(path)
+    assert [(t.id, t.done) for t in tasks] == [(1, True), (2, False), (3, False)]
+    cleanup(path)
+
+
+def test_changes_are_journaled_as_they_happen(capsys):
+    path = temp_tasks_file(make_tasks(1))
+    shell = TaskShell(path, stdin=io.StringIO())
+    run(shell, "add B")
+    run(shell, "done 1")
+    assert [r["op"] for r in journal.read_records(path)] == ["add", "done"]
+    # another process sees them without the shell flushing
+    assert [(t.id, t.done) for t in todo.load_tasks(path)] == [(1, True), (2, False)]
+    run(shell, "flush")
+    assert journal.read_records(path) == []
+    cleanup(path)
+
+
+def test_deferred_changes_wait_for_flush(capsys):
+    path = temp_tasks_file(make_tasks(1))
+    before = open(path, encoding="utf-8").read()
+    shell = TaskShell(path, defer=True, stdin=io.StringIO())
+    run(shell, "add B")
+    run(shell, "list")
+    assert "B" in capsys.readouterr().out
+    assert open(path, encoding="utf-8").read() == before
+    assert not os.path.exists(journal.journal_path(path))
+    run(shell, "flush")
+    assert [t.title for t in todo.load_tasks(path)] == ["task 1", "B"]
+    cleanup(path)
+
+
+def test_external_changes_are_reloaded_once(capsys):
+    path = temp_tasks_file(make_tasks(1))
+    shell = TaskShell(path, defer=True, stdin=io.StringIO())
+    run(shell, "add Mine")
+    table = shell.table
+    run(shell, "list")
+    assert shell.table is table
+    # the id reserved by the shell is not handed out again
+    assert todo.main(["-f", path, "add", "Theirs"]) == 0
+    capsys.readouterr()
+    run(shell, "list")
+    assert shell.table is not table
+    out = capsys.readouterr()
+    assert "reloading" in out.err
+    assert [line.split(" <")[0] for line in out.out.splitlines()] == \
+        ["  1. [ ] task 1 [x]", "  2. [ ] Mine", "  3. [ ] Theirs"]
+    shell.postloop()
+    assert sorted((t.id, t.title) for t in todo.load_tasks(path)) == [(1, "task 1"), (2, "Mine"), (3, "Theirs")]
+    cleanup(path)
+
+
+def test_journal_storage_keeps_the_log(capsys):
+    path = temp_tasks_file(make_tasks(1))
+    before = open(path, encoding="utf-8").read()
+    shell = TaskShell(path, storage="journal", defer=True, stdin=io.StringIO())
+    run(shell, "add B")
+    assert not os.path.exists(journal.journal_path(path))
+    shell.postloop()
+    assert open(path, encoding="utf-8").read() == before
+    assert [r["op"] for r in journal.read_records(path)] == ["add"]
+    cleanup(path)
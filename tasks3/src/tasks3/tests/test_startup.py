@@ -0,0 +1,50 @@
+import os
+import subprocess
+import sys
+import tempfile
+
+ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), "..", ".."))
+if ROOT not in sys.path:
+    sys.path.insert(0, ROOT)
+
+import tasks3 as todo
+
+# modules short commands used to pull in; none of them is needed to add or list
+HEAVY = {"random", "csv", "shutil", "tasks3.table"}
+
+
+def imported_modules(argv):
+    """{module: cumulative µs} from `python -X importtime` running the CLI."""
+    code = f"import sys; sys.path.insert(0, {ROOT!r}); import tasks3; sys.exit(tasks3.main({argv!r}))"
+    res = subprocess.run([sys.executable, "-X", "importtime", "-c", code],
+                         stdout=subprocess.PIPE, stderr=subprocess.PIPE, text=True)
+    assert res.returncode == 0, res.stderr
+    modules = {}
+    for line in res.stderr.splitlines():
+        if line.startswith("import time:") and "|" in line:
+            _, cumulative, name = line.split("|")
+            if cumulative.strip().isdigit():
+                modules[name.strip()] = int(cumulative)
+    return modules
+
+
+def test_short_commands_skip_heavy_imports():
+    fd, path = tempfile.mkstemp(suffix=".json")
+    os.close(fd)
+    os.remove(path)
+    added = imported_modules(["-f", path, "add", "Buy milk", "--tags", "x"])
+    assert "tasks3" in added
+    assert not HEAVY & set(added)
+    listed = imported_modules(["-f", path, "list", "--tags", "x"])
+    assert not (HEAVY | {"datetime"}) & set(listed)
+    for p in (path, path + ".meta"):
+        os.remove(p)
+
+
+def test_parser_for_one_command_parses_like_the_full_one():
+    argv = ["--fi", "x.json", "--storage=journal", "recommend", "2", "--tags", "a"]
+    assert todo._command_in(argv) == "recommend"
+    assert todo.build_parser("recommend").parse_args(argv) == todo.build_parser().parse_args(argv)
+    assert todo._command_in(["-f", "list", "add", "t"]) == "add"
+    assert todo._command_in(["-h", "list"]) is None
+    assert todo._command_in(["frobnicate"]) is None
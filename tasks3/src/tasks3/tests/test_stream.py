@@ -0,0 +1,97 @@
+import os
+import sys
+import tempfile
+import json
+import tracemalloc
+from argparse import Namespace
+
+ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), "..", ".."))
+if ROOT not in sys.path:
+    sys.path.insert(0, ROOT)
+
+import tasks3 as todo
+from tasks3 import journal
+
+
+def temp_tasks_file(data=None):
+    fd, path = tempfile.mkstemp(suffix=".json")
+    os.close(fd)
+    if data is not None:
+        with open(path, "w", encoding="utf-8") as f:
+            json.dump(data, f, indent=2)
+    return path
+
+
+def make_tasks(n):
+    return [
+        {"id": i, "title": f'Task number {i} é "quoted"', "created": "2023-01-01T00:00:00Z",
+         "tags": [f"t{i % 7}", "x"], "category": f"c{i % 3}", "done": i % 4 == 0}
+        for i in range(1, n + 1)
+    ]
+
+
+def test_iter_tasks_matches_load_tasks_across_chunk_boundaries():
+    path = temp_tasks_file(make_tasks(50))
+    expected = todo.load_tasks(path)
+    for chunk_size in (1, 7, 64, 1 << 16):
+        assert list(todo.iter_tasks(path, chunk_size=chunk_size)) == expected
+    os.remove(path)
+
+
+def test_iter_tasks_applies_journal():
+    path = temp_tasks_file(make_tasks(3))
+    journal.append_records(path, [
+        {"op": "done", "id": 9},
+        {"op": "add", "task": make_tasks(9)[-1]},
+        {"op": "done", "id": 1},
+        {"op": "add", "task": dict(make_tasks(2)[-1], title="replaced")},
+        {"op": "done", "id": 9},
+    ])
+    assert list(todo.iter_tasks(path, chunk_size=5)) == todo.load_tasks(path)
+    os.remove(path)
+    os.remove(journal.journal_path(path))
+
+
+def test_iter_tasks_missing_and_malformed_files():
+    assert list(todo.iter_tasks("/nonexistent/tasks.json")) == []
+    path = temp_tasks_file()
+    with open(path, "w", encoding="utf-8") as f:
+        f.write('[{"id": 1, "title": "A", "created": "", "tags": []}, {"id": 2,')
+    assert [t.id for t in todo.iter_tasks(path)] == [1]
+    os.remove(path)
+
+
+def test_iter_tasks_stops_at_a_truncation():
+    path = temp_tasks_file(make_tasks(500))
+    with open(path, "rb+") as f:
+        data = f.read()
+        f.truncate(data.index(b'"created"', len(data) // 2))
+    journal.append_records(path, [{"op": "add", "task": make_tasks(501)[-1]}])
+    assert todo.load_tasks(path) == []
+    ids = [t.id for t in todo.iter_tasks(path)]
+    # a prefix of the file, as far as decoding got; the journaled task is not reached
+    assert 0 < len(ids) < 500
+    assert ids == list(range(1, len(ids) + 1))
+    os.remove(path)
+    os.remove(journal.journal_path(path))
+
+
+def test_streamed_list_memory_is_bounded():
+    path = temp_tasks_file(make_tasks(20000))
+    size = os.path.getsize(path)
+    tracemalloc.start()
+    done = sum(1 for t in todo.iter_tasks(path) if t.done)
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    assert done == 5000
+    assert peak < size / 10
+    os.remove(path)
+
+
+def test_cmd_list_streams_with_filters(capsys):
+    path = temp_tasks_file(make_tasks(12))
+    todo.cmd_list(Namespace(file=path, all=False, tags="t1,t2", category="c0"))
+    out = capsys.readouterr().out
+    ids = [int(line.split(".")[0]) for line in out.splitlines()]
+    assert ids == [9]
+    os.remove(path)
@@ -0,0 +1,51 @@
+import os
+import sys
+
+ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), "..", ".."))
+if ROOT not in sys.path:
+    sys.path.insert(0, ROOT)
+
+import tasks3 as todo
+from tasks3.table import TaskTable
+
+
+TASKS = [
+    todo.Task(id=1, title="Buy milk", created="2025-10-19T19:41:39.167189Z", tags=["shopping", "Food"], category="home"),
+    todo.Task(id=2, title="Read book", created="2025-10-19T19:41:40Z", tags=[], category="fun", done=True),
+    todo.Task(id=5, title="Email BOB", created="", tags=["work"], category="work"),
+    todo.Task(id=9, title="Milkshake", created="now", tags=["food", "work"], category="home"),
+    todo.Task(id=11, title="Tax", created="2025-10-19T19:41:40.000000Z", tags=["shopping"]),
+]
+
+
+def test_table_round_trips_tasks():
+    table = TaskTable.from_tasks(TASKS)
+    assert len(table) == len(TASKS)
+    assert list(table) == TASKS
+    assert table.task(table.row_of(9)) == TASKS[3]
+    # "now" and the zero-padded microseconds would not survive the epoch column
+    assert set(table.raw_created) == {2, 3, 4}
+
+
+def test_table_select_and_search_match_list_semantics():
+    table = TaskTable.from_tasks(TASKS)
+    for tags in (None, ["shopping"], ["work", "Food"], ["missing"]):
+        for category in (None, "home", "general", "missing"):
+            for include_done in (True, False):
+                expected = [i for i, t in enumerate(TASKS)
+                            if (include_done or not t.done)
+                            and (not tags or any(tag in t.tags for tag in tags))
+                            and (not category or t.category == category)]
+                assert table.select(tags, category, include_done) == expected
+    for q in ("milk", "FOOD", "bob", "o", "zzz"):
+        ql = q.lower()
+        expected = [i for i, t in enumerate(TASKS)
+                    if ql in t.title.lower() or any(ql in tag.lower() for tag in t.tags)]
+        assert table.search(q) == expected
+
+
+def test_table_mark_done():
+    table = TaskTable.from_tasks(TASKS)
+    assert table.mark_done(5)
+    assert table.task(2).done
+    assert not table.mark_done(404)
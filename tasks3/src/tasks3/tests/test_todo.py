@@ -32,6 +32,7 @@ def test_add_and_load_tasks():
     assert set(t.tags) == {"work", "urgent"}
     assert t.category == "work"
     os.remove(path)
+    os.remove(path + ".meta")
 
 def test_save_and_load_tasks():
     path = temp_tasks_file([])
@@ -79,6 +80,7 @@ def test_cmd_search(capsys):
     out = capsys.readouterr().out
     assert "Buy milk" in out
     os.remove(path)
+    os.remove(path + ".idx")
 
 def test_cmd_recommend(capsys):
     path = temp_tasks_file([
@@ -94,6 +96,7 @@ def test_cmd_recommend(capsys):
     out = capsys.readouterr().out
     assert "A" in out
     os.remove(path)
+    os.remove(path + ".bits")
 
 def test_format_task():
     t = todo.Task(id=1, title="T", created="now", tags=["a", "b"], category="cat", done=True)
@@ -0,0 +1,61 @@
+"""Latency and throughput of the summarizer backends.
+
+Usage:
+  python benchmarks/bench_backends.py [PARAGRAPHS] [LATENCY_SECONDS]
+
+The "openai" rows use a local fake client that sleeps for the given latency
+per request (no network access or API key needed), serially and with
+concurrency; the "extractive" rows run the offline TF-IDF backend.
+"""
+from __future__ import annotations
+
+import os
+import random
+import sys
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), "..", "src"))
+
+import tasks4  # noqa: E402
+from bench_concurrency import fake_openai  # noqa: E402
+
+WORDS = ("budget review hiring plan launch customer release roadmap storage index query latency "
+         "design meeting report invoice travel dentist garden groceries laundry backup server").split()
+
+
+def make_text(n: int, seed: int = 0) -> str:
+    rng = random.Random(seed)
+    paras = []
+    for _ in range(n):
+        words = [rng.choice(WORDS) for _ in range(rng.randint(20, 60))]
+        paras.append(" ".join(words).capitalize() + ".")
+    return "\n\n".join(paras)
+
+
+def run(label: str, text: str, n: int, **kwargs) -> None:
+    start = time.perf_counter()
+    summaries = tasks4.summarize_paragraphs(text, api_key="fake", **kwargs)
+    elapsed = time.perf_counter() - start
+    assert len(summaries) == n
+    print(f"{label:<28}  {elapsed:>8.3f}  {elapsed / n * 1000:>12.3f}  {n / elapsed:>12.1f}")
+
+
+def main(argv=None) -> int:
+    argv = argv if argv is not None else sys.argv[1:]
+    n = int(argv[0]) if argv else 200
+    latency = float(argv[1]) if len(argv) > 1 else 0.05
+    tasks4.openai = fake_openai(latency)
+    text = make_text(n)
+
+    print(f"{n} paragraphs, {latency * 1000:.0f} ms simulated latency per API request")
+    print(f"{'backend':<28}  {'seconds':>8}  {'ms/paragraph':>12}  {'paragraphs/s':>12}")
+    run("openai (serial)", text, n, backend="openai")
+    run("openai (concurrency=16)", text, n, backend="openai", concurrency=16)
+    run("extractive", text, n, backend="extractive")
+    big = 20 * n
+    run(f"extractive ({big} paragraphs)", make_text(big, seed=1), big, backend="extractive")
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
@@ -0,0 +1,53 @@
+"""Wall-clock scaling of summarize_paragraphs with the concurrency level.
+
+Usage:
+  python benchmarks/bench_concurrency.py [PARAGRAPHS] [LATENCY_SECONDS]
+
+Replaces the OpenAI client with a local fake that sleeps for the given
+latency per request, so no network access or API key is needed.
+"""
+from __future__ import annotations
+
+import os
+import sys
+import time
+import types
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), "..", "src"))
+
+import tasks4  # noqa: E402
+
+
+def fake_openai(latency: float):
+    class FakeChatCompletion:
+        @staticmethod
+        def create(*args, **kwargs):
+            time.sleep(latency)
+            para = kwargs["messages"][-1]["content"]
+            return {"choices": [{"message": {"content": " ".join(para.split()[:3])}}]}
+
+    return types.SimpleNamespace(ChatCompletion=FakeChatCompletion)
+
+
+def main(argv=None) -> int:
+    argv = argv if argv is not None else sys.argv[1:]
+    n = int(argv[0]) if argv else 300
+    latency = float(argv[1]) if len(argv) > 1 else 0.05
+    tasks4.openai = fake_openai(latency)
+    text = "\n\n".join(f"Paragraph {i} talks about topic {i % 17} at some length." for i in range(n))
+
+    print(f"{n} paragraphs, {latency * 1000:.0f} ms simulated latency per request")
+    print(f"{'concurrency':>11}  {'seconds':>8}  {'paragraphs/s':>12}  {'speedup':>7}")
+    baseline = None
+    for concurrency in (1, 2, 4, 8, 16, 32, 64):
+        start = time.perf_counter()
+        summaries = tasks4.summarize_paragraphs(text, api_key="fake", concurrency=concurrency)
+        elapsed = time.perf_counter() - start
+        assert len(summaries) == n
+        baseline = baseline or elapsed
+        print(f"{concurrency:>11}  {elapsed:>8.2f}  {n / elapsed:>12.1f}  {baseline / elapsed:>6.1f}x")
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
@@ -2,7 +2,28 @@
 
 This module provides a tiny CLI and function to summarize paragraphs into
 very short phrases using the `gpt-5-mini` model. It sends one request per
-paragraph so summaries are independent.
+paragraph so summaries are independent; requests can be issued
+concurrently with `concurrency=N` (results still come back in paragraph
+order). Pass a `SummaryCache` (see `tasks4.cache`) to skip paragraphs that
+were already summarized with the same settings. With `batch_size=N` up to N
+paragraphs share one request that answers with a JSON array.
+
+`iter_paragraphs` and `iter_summaries` form a streaming pipeline: paragraphs
+are read off a file object as blank lines arrive and summaries are yielded
+in order as soon as they are ready, with at most `window` paragraphs held
+in memory (`--stream` on the CLI).
+
+Pass a `Scheduler` (see `tasks4.scheduler`) to keep requests under
+requests/tokens-per-minute quotas and retry 429s and transient errors with
+backoff; the CLI always uses one (`--rpm`, `--tpm`, `--retries`).
+
+Where summaries come from is pluggable (see `tasks4.backends`): the default
+"openai" backend calls the API, while `backend="extractive"` (`--backend
+extractive`) picks keywords locally by TF-IDF with no network or API key.
+
+`tasks4.incremental.summarize_file` (`--incremental`) remembers each run's
+paragraph fingerprints and summaries next to the input file, so after an
+edit only new or changed paragraphs are summarized again.
 
 Requirements
 - Set the environment variable `OPENAI_API_KEY` with your API key.
@@ -11,18 +32,30 @@ Requirements
 
 Usage (example):
 	python -m tasks4  # then paste or pipe multi-paragraph text on stdin
+	python -m tasks4 input.txt --concurrency 8
+	python -m tasks4 input.txt --cache ~/.cache/tasks4.db
+	python -m tasks4 input.txt --batch-size 20
+	python -m tasks4 input.txt --backend extractive
+	python -m tasks4 input.txt --incremental
+	some-producer | python -m tasks4 --stream -j 8
 
 Functions
-- summarize_paragraphs(text, model='gpt-5-mini') -> list[str]
+- summarize_paragraphs(text, model='gpt-5-mini', concurrency=1) -> list[str]
 	Splits `text` into paragraphs and returns a list of short phrase summaries.
+- iter_summaries(iter_paragraphs(stream), concurrency=1) -> iterator[str]
+	Streaming equivalent that yields summaries while input is still arriving.
 """
 
 from __future__ import annotations
 
+import argparse
+import json
 import os
 import re
 import sys
-from typing import List, Optional
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+from typing import Callable, Iterable, Iterator, List, Optional, Sequence, TextIO, TypeVar
 
 try:
 	import openai
@@ -30,6 +63,38 @@ except Exception as e:  # pragma: no cover - runtime/import error
 	openai = None
 
 
+SYSTEM_PROMPT = (
+	"You are a concise summarizer. For the given paragraph, produce a very short"
+	" phrase (roughly 1-6 words) that captures the main idea. Return only the"
+	" phrase, with no explanation or extra punctuation."
+)
+
+BATCH_SYSTEM_PROMPT = (
+	"You are a concise summarizer. You will receive a JSON array of paragraphs."
+	" For each paragraph, produce a very short phrase (roughly 1-6 words) that"
+	" captures its main idea. Return only a JSON array of strings with exactly"
+	" one phrase per paragraph, in the same order."
+)
+
+T = TypeVar("T")
+
+# Rough characters-per-token ratio used to size batches without a tokenizer.
+CHARS_PER_TOKEN = 4
+
+
+class SummaryError(str):
+	"""Stand-in summary for a paragraph whose request failed.
+
+	It reads as ``[error: <message>]`` wherever a summary string is expected
+	and keeps the original exception in ``.error``.
+	"""
+
+	def __new__(cls, error: BaseException) -> "SummaryError":
+		obj = super().__new__(cls, f"[error: {error}]")
+		obj.error = error
+		return obj
+
+
 def _split_into_paragraphs(text: str) -> List[str]:
 	"""Split text into non-empty paragraphs.
 
@@ -39,16 +104,156 @@ def _split_into_paragraphs(text: str) -> List[str]:
 	return [p.strip() for p in parts if p.strip()]
 
 
-def summarize_paragraphs(text: str, model: str = "gpt-5-mini", *,
-						 api_key: Optional[str] = None,
-						 max_tokens: int = 16,
-						 temperature: float = 0.2) -> List[str]:
-	"""Summarize each paragraph in `text` into a short phrase.
+def iter_paragraphs(stream: TextIO) -> Iterator[str]:
+	"""Yield paragraphs from `stream` as soon as their closing blank line
+	(or the end of input) has been read.
 
-	Sends one independent request per paragraph so results don't bleed.
+	Produces the same paragraphs as `_split_into_paragraphs` on the whole
+	text, but only ever holds one paragraph in memory.
+	"""
+	lines: List[str] = []
+	for line in stream:
+		if line.strip():
+			lines.append(line)
+		elif lines:
+			yield "".join(lines).strip()
+			lines = []
+	if lines:
+		yield "".join(lines).strip()
+
+
+def _extract_content(response) -> str:
+	"""Pull the message text out of a ChatCompletion response."""
+	choice = response.get("choices", [])[0]
+	content = ""
+	# ChatCompletion sometimes returns message under 'message'
+	if isinstance(choice, dict):
+		msg = choice.get("message") or choice.get("delta") or {}
+		if isinstance(msg, dict):
+			content = msg.get("content", "")
+	if not content:
+		# Fallback to 'text' or 'content' top-level
+		content = choice.get("text") or ""
+	return content
+
+
+def _clean_summary(content: str) -> str:
+	summary = content.strip().strip('"').strip()
+	# Normalize whitespace and remove trailing periods
+	summary = re.sub(r"\s+", " ", summary)
+	return summary.rstrip(".!")
+
+
+def _send(scheduler, fn: Callable[[], T], tokens: int) -> T:
+	"""Run one API call `fn`, through `scheduler` when there is one."""
+	return fn() if scheduler is None else scheduler.call(fn, tokens=tokens)
+
+
+def _request_tokens(paras: Sequence[str], max_tokens: int) -> int:
+	"""Estimated prompt plus completion tokens of a request, for TPM budgets."""
+	prompt = SYSTEM_PROMPT if len(paras) == 1 else BATCH_SYSTEM_PROMPT
+	return _estimate_tokens(prompt) + sum(_estimate_tokens(p) + max_tokens for p in paras)
+
+
+def _summarize_one(para: str, *, model: str, temperature: float, max_tokens: int) -> str:
+	"""Summarize a single paragraph with its own request."""
+	response = openai.ChatCompletion.create(
+		model=model,
+		messages=[
+			{"role": "system", "content": SYSTEM_PROMPT},
+			{"role": "user", "content": para},
+		],
+		temperature=temperature,
+		max_tokens=max_tokens,
+	)
+	return _clean_summary(_extract_content(response))
+
+
+def _estimate_tokens(text: str) -> int:
+	return len(text) // CHARS_PER_TOKEN + 1
+
+
+def _pack_batches(paragraphs: Sequence[str], batch_size: int, token_budget: int) -> List[List[int]]:
+	"""Group paragraph indices into consecutive batches.
+
+	A batch holds at most `batch_size` paragraphs and, unless it is a single
+	oversized paragraph, at most `token_budget` estimated input tokens.
+	"""
+	batches: List[List[int]] = []
+	current: List[int] = []
+	used = 0
+	for i, para in enumerate(paragraphs):
+		cost = _estimate_tokens(para)
+		if current and (len(current) >= batch_size or used + cost > token_budget):
+			batches.append(current)
+			current, used = [], 0
+		current.append(i)
+		used += cost
+	if current:
+		batches.append(current)
+	return batches
+
+
+def _parse_batch(content: str, n: int) -> List[Optional[str]]:
+	"""Split a batch response into `n` summaries.
+
+	Returns None for every item that could not be read: all of them if the
+	reply is not a JSON array of length `n`, otherwise just the entries that
+	are not non-empty strings.
+	"""
+	start, end = content.find("["), content.rfind("]")
+	if start < 0 or end < start:
+		return [None] * n
+	try:
+		items = json.loads(content[start:end + 1])
+	except ValueError:
+		return [None] * n
+	if not isinstance(items, list) or len(items) != n:
+		return [None] * n
+	out: List[Optional[str]] = []
+	for item in items:
+		summary = _clean_summary(item) if isinstance(item, str) else ""
+		out.append(summary or None)
+	return out
+
+
+def _summarize_batch(paras: Sequence[str], *, model: str, temperature: float,
+					 max_tokens: int) -> List[Optional[str]]:
+	"""Summarize several paragraphs with one request (see `_parse_batch`)."""
+	if len(paras) == 1:
+		return [_summarize_one(paras[0], model=model, temperature=temperature, max_tokens=max_tokens)]
+	response = openai.ChatCompletion.create(
+		model=model,
+		messages=[
+			{"role": "system", "content": BATCH_SYSTEM_PROMPT},
+			{"role": "user", "content": json.dumps(list(paras), ensure_ascii=False)},
+		],
+		temperature=temperature,
+		# room for each phrase plus the array's quotes and commas
+		max_tokens=(max_tokens + 4) * len(paras) + 8,
+	)
+	return _parse_batch(_extract_content(response), len(paras))
+
+
+def _run_ordered(fn: Callable[[str], str], items: Sequence[str], concurrency: int) -> List[str]:
+	"""Apply `fn` to every item, running at most `concurrency` at once.
 
-	Returns a list of summary strings (one per paragraph, same order).
+	Results come back in input order. An item whose call raises gets a
+	SummaryError in its slot and the others carry on.
 	"""
+	def call(item: str) -> str:
+		try:
+			return fn(item)
+		except Exception as exc:
+			return SummaryError(exc)
+
+	if concurrency <= 1:
+		return [call(item) for item in items]
+	with ThreadPoolExecutor(max_workers=concurrency) as pool:
+		return list(pool.map(call, items))
+
+
+def _configure(api_key: Optional[str]) -> None:
 	if openai is None:
 		raise RuntimeError(
 			"openai package not installed - run `pip install openai`"
@@ -61,56 +266,247 @@ def summarize_paragraphs(text: str, model: str = "gpt-5-mini", *,
 	# Configure client
 	openai.api_key = key
 
-	paragraphs = _split_into_paragraphs(text)
-	summaries: List[str] = []
-
-	system_prompt = (
-		"You are a concise summarizer. For the given paragraph, produce a very short"
-		" phrase (roughly 1-6 words) that captures the main idea. Return only the"
-		" phrase, with no explanation or extra punctuation."
-	)
 
-	for para in paragraphs:
-		# Make a single request per paragraph to keep responses independent.
-		response = openai.ChatCompletion.create(
-			model=model,
-			messages=[
-				{"role": "system", "content": system_prompt},
-				{"role": "user", "content": para},
-			],
-			temperature=temperature,
-			max_tokens=max_tokens,
-		)
+def summarize_paragraphs(text: str, model: str = "gpt-5-mini", *,
+						 api_key: Optional[str] = None,
+						 max_tokens: int = 16,
+						 temperature: float = 0.2,
+						 concurrency: int = 1,
+						 raise_on_error: bool = True,
+						 cache=None,
+						 batch_size: int = 1,
+						 token_budget: int = 2000,
+						 scheduler=None,
+						 backend=None) -> List[str]:
+	"""Summarize each paragraph in `text` into a short phrase.
 
-		# Extract and sanitize the text
-		choice = response.get("choices", [])[0]
-		content = ""
-		# ChatCompletion sometimes returns message under 'message'
-		if isinstance(choice, dict):
-			msg = choice.get("message") or choice.get("delta") or {}
-			if isinstance(msg, dict):
-				content = msg.get("content", "")
-		if not content:
-			# Fallback to 'text' or 'content' top-level
-			content = choice.get("text") or ""
-
-		summary = content.strip().strip('"').strip()
-		# Normalize whitespace and remove trailing periods
-		summary = re.sub(r"\s+", " ", summary)
-		summary = summary.rstrip(".!")
-		summaries.append(summary)
+	Sends one independent request per paragraph so results don't bleed.
+	With `concurrency` > 1 up to that many requests are in flight at once
+	on a thread pool.
+
+	Returns a list of summary strings (one per paragraph, same order). A
+	failed request does not stop the others: with `raise_on_error` (the
+	default) its exception is re-raised once every paragraph is done and
+	the other summaries are cached, otherwise its slot holds a `SummaryError` marker.
+
+	With a `cache` (a `tasks4.cache.SummaryCache`), paragraphs already
+	summarized with the same model and settings are answered from it and
+	only the rest are sent; successful new summaries are stored back.
+	Each summary is stored under the prompt it was asked with: one-by-one
+	runs only reuse one-by-one answers, while batched runs take either.
+
+	With `batch_size` > 1 consecutive paragraphs are packed into one request
+	(at most `batch_size` paragraphs and roughly `token_budget` input tokens
+	each) that asks for a JSON array of summaries. Paragraphs whose entry
+	is missing or unreadable, or whose whole batch failed, are retried with
+	their own request.
+
+	With a `scheduler` (a `tasks4.scheduler.Scheduler`) every request waits
+	for its RPM/TPM budget and rate-limit or transient failures are retried
+	with backoff before they count as failed.
+
+	`backend` picks what produces the summaries: None or "openai" for the
+	API, "extractive" for the local keyword summarizer, or any
+	`tasks4.backends.Backend`. Local backends get every uncached paragraph
+	in one call and ignore the API settings (key, scheduler, batching,
+	concurrency).
+	"""
+	from .backends import get_backend
+	backend = get_backend(backend)
+	if backend.remote:
+		_configure(api_key)
+	paragraphs = _split_into_paragraphs(text)
 
+	def request(para: str) -> str:
+		return _send(scheduler, lambda: backend.summarize(
+			para, model=model, temperature=temperature, max_tokens=max_tokens),
+			_request_tokens([para], max_tokens))
+
+	def key(para: str, prompt: str) -> str:
+		return cache.key(para, model=backend.cache_tag(model), system_prompt=prompt,
+						 temperature=temperature, max_tokens=max_tokens)
+
+	batched = backend.remote and batch_size > 1
+	summaries: List[Optional[str]] = [None] * len(paragraphs)
+	if cache is not None:
+		# summaries are stored under the prompt they were asked with; batch
+		# mode also takes a one-by-one answer, as it falls back to those
+		for i, p in enumerate(paragraphs):
+			if batched:
+				summaries[i] = cache.get(key(p, BATCH_SYSTEM_PROMPT), key(p, SYSTEM_PROMPT))
+			else:
+				summaries[i] = cache.get(key(p, SYSTEM_PROMPT))
+	todo = [i for i, s in enumerate(summaries) if s is None]
+	# the prompt each result in `results` was asked with
+	prompts = [SYSTEM_PROMPT] * len(todo)
+
+	if not backend.remote:
+		results = backend.summarize_batch([paragraphs[i] for i in todo], model=model,
+										  temperature=temperature, max_tokens=max_tokens)
+	elif batched:
+		batches = _pack_batches([paragraphs[i] for i in todo], batch_size, token_budget)
+		results = [None] * len(todo)
+
+		def batch_request(batch: List[int]) -> List[Optional[str]]:
+			paras = [paragraphs[todo[j]] for j in batch]
+			return _send(scheduler, lambda: backend.summarize_batch(
+				paras, model=model, temperature=temperature, max_tokens=max_tokens),
+				_request_tokens(paras, max_tokens))
+
+		for batch, got in zip(batches, _run_ordered(batch_request, batches, concurrency)):
+			if not isinstance(got, SummaryError):
+				for j, s in zip(batch, got):
+					results[j] = s
+					# a batch of one goes out as a plain single request
+					if s is not None and len(batch) > 1:
+						prompts[j] = BATCH_SYSTEM_PROMPT
+		retry = [j for j, s in enumerate(results) if s is None]
+		retried = _run_ordered(request, [paragraphs[todo[j]] for j in retry], concurrency)
+		for j, s in zip(retry, retried):
+			results[j] = s
+	else:
+		results = _run_ordered(request, [paragraphs[i] for i in todo], concurrency)
+	for i, s, prompt in zip(todo, results, prompts):
+		summaries[i] = s
+		if cache is not None and not isinstance(s, SummaryError):
+			cache.put(key(paragraphs[i], prompt), s)
+	if cache is not None:
+		cache.evict()
+	if raise_on_error:
+		for s in summaries:
+			if isinstance(s, SummaryError):
+				raise s.error
 	return summaries
 
 
+def iter_summaries(paragraphs: Iterable[str], model: str = "gpt-5-mini", *,
+				   api_key: Optional[str] = None,
+				   max_tokens: int = 16,
+				   temperature: float = 0.2,
+				   concurrency: int = 1,
+				   window: Optional[int] = None,
+				   raise_on_error: bool = True,
+				   cache=None,
+				   scheduler=None,
+				   backend=None) -> Iterator[str]:
+	"""Streaming `summarize_paragraphs`: yield one summary per paragraph,
+	in order, while `paragraphs` is still being consumed.
+
+	Up to `concurrency` requests run at once and at most `window` paragraphs
+	(default: twice `concurrency`) are read ahead of the last summary
+	yielded, so memory stays bounded however long the input is. Failures,
+	the `cache`, the `scheduler` and the `backend` behave as in
+	`summarize_paragraphs`, except that with `raise_on_error` the exception
+	is raised when its paragraph's turn comes; summaries before it have
+	already been yielded.
+	"""
+	from .backends import get_backend
+	backend = get_backend(backend)
+	if backend.remote:
+		_configure(api_key)
+	else:
+		scheduler = None
+	window = max(window or 2 * concurrency, 1)
+
+	def request(para: str) -> str:
+		try:
+			return _send(scheduler, lambda: backend.summarize(
+				para, model=model, temperature=temperature, max_tokens=max_tokens),
+				_request_tokens([para], max_tokens))
+		except Exception as exc:
+			return SummaryError(exc)
+
+	def finish(key: Optional[str], pending) -> str:
+		s = pending if isinstance(pending, str) else pending.result()
+		if isinstance(s, SummaryError):
+			if raise_on_error:
+				raise s.error
+		elif key is not None and pending is not s:
+			cache.put(key, s)
+		return s
+
+	# the cache's SQLite connection belongs to this thread, so lookups and
+	# stores happen here rather than in the workers
+	inflight = deque()
+	with ThreadPoolExecutor(max_workers=max(concurrency, 1)) as pool:
+		for para in paragraphs:
+			key = hit = None
+			if cache is not None:
+				key = cache.key(para, model=backend.cache_tag(model), system_prompt=SYSTEM_PROMPT,
+								temperature=temperature, max_tokens=max_tokens)
+				hit = cache.get(key)
+			inflight.append((key, hit if hit is not None else pool.submit(request, para)))
+			while len(inflight) >= window:
+				yield finish(*inflight.popleft())
+		while inflight:
+			yield finish(*inflight.popleft())
+	if cache is not None:
+		cache.evict()
+
+
+def build_parser() -> argparse.ArgumentParser:
+	p = argparse.ArgumentParser(prog="tasks4", description="Summarize paragraphs into short phrases")
+	p.add_argument("path", nargs="?", help="Text file to summarize (default: stdin)")
+	p.add_argument("--backend", choices=["openai", "extractive"], default="openai",
+				   help="Where summaries come from (default: openai; extractive runs offline)")
+	p.add_argument("--concurrency", "-j", type=int, default=1,
+				   help="Number of requests to run at once (default: 1)")
+	p.add_argument("--cache", metavar="PATH",
+				   help="SQLite file caching summaries between runs")
+	p.add_argument("--batch-size", type=int, default=1,
+				   help="Paragraphs packed into one request (default: 1, no batching)")
+	p.add_argument("--token-budget", type=int, default=2000,
+				   help="Approximate input tokens per batched request (default: 2000)")
+	p.add_argument("--stream", action="store_true",
+				   help="Print summaries as paragraphs arrive instead of reading all input first")
+	p.add_argument("--incremental", action="store_true",
+				   help="Reuse summaries of unchanged paragraphs from the last run on this file")
+	p.add_argument("--rpm", type=float, help="Requests-per-minute limit (default: unlimited)")
+	p.add_argument("--tpm", type=float, help="Tokens-per-minute limit (default: unlimited)")
+	p.add_argument("--retries", type=int, default=5,
+				   help="Retries for rate-limited or transient failures (default: 5)")
+	return p
+
+
+def _report_failures(summaries: Iterable[str]) -> int:
+	"""Print how many paragraphs failed to stderr; exit status for `main`."""
+	failed = sum(isinstance(s, SummaryError) for s in summaries)
+	if failed:
+		print(f"{failed} paragraph(s) could not be summarized", file=sys.stderr)
+		return 3
+	return 0
+
+
 def main(argv: Optional[List[str]] = None) -> int:
 	"""CLI entrypoint: read stdin (or file given as first arg) and print summaries."""
 	argv = argv if argv is not None else sys.argv[1:]
-
-	if argv:
-		# treat first arg as filename
-		path = argv[0]
-		with open(path, "r", encoding="utf-8") as fh:
+	parser = build_parser()
+	args = parser.parse_args(argv)
+	if args.stream and args.batch_size > 1:
+		parser.error("--batch-size cannot be combined with --stream")
+	if args.incremental and (args.stream or not args.path):
+		parser.error("--incremental needs a file path and cannot be combined with --stream")
+
+	scheduler = None
+	if args.backend == "openai":
+		from .scheduler import Scheduler
+		scheduler = Scheduler(rpm=args.rpm, tpm=args.tpm, max_retries=args.retries)
+
+	cache = None
+	if args.cache:
+		from .cache import SummaryCache
+		cache = SummaryCache(os.path.expanduser(args.cache))
+
+	if args.stream:
+		try:
+			return _stream_main(args, cache, scheduler)
+		finally:
+			if cache is not None:
+				print(f"cache: {cache.hits} hit(s), {cache.misses} miss(es)", file=sys.stderr)
+				cache.close()
+
+	if args.path:
+		with open(args.path, "r", encoding="utf-8") as fh:
 			text = fh.read()
 	else:
 		# read from stdin
@@ -118,21 +514,60 @@ def main(argv: Optional[List[str]] = None) -> int:
 
 	if not text.strip():
 		print("No input text provided on stdin or file.")
+		if cache is not None:
+			cache.close()
 		return 2
 
+	options = dict(concurrency=args.concurrency, cache=cache, batch_size=args.batch_size,
+				   token_budget=args.token_budget, scheduler=scheduler, backend=args.backend)
 	try:
-		summaries = summarize_paragraphs(text)
+		if args.incremental:
+			from .incremental import summarize_file
+			summaries, stats = summarize_file(args.path, text, **options)
+			print(f"incremental: reused {stats['unchanged'] + stats['moved']} of {len(summaries)} "
+				  f"paragraph(s) ({stats['unchanged']} unchanged, {stats['moved']} moved), "
+				  f"summarized {stats['summarized']}, dropped {stats['deleted']}", file=sys.stderr)
+		else:
+			summaries = summarize_paragraphs(text, raise_on_error=False, **options)
 	except Exception as exc:
 		print(f"Error: {exc}")
 		return 3
+	finally:
+		if cache is not None:
+			print(f"cache: {cache.hits} hit(s), {cache.misses} miss(es)", file=sys.stderr)
+			cache.close()
 
+	# failed paragraphs print as [error: ...] markers in their place
 	for s in summaries:
 		print(s)
 
-	return 0
+	return _report_failures(summaries)
+
+
+def _stream_main(args, cache, scheduler) -> int:
+	"""`main` for `--stream`: print each summary as soon as it is ready."""
+	fh = open(args.path, "r", encoding="utf-8") if args.path else sys.stdin
+	failures = []
+	count = 0
+	try:
+		for s in iter_summaries(iter_paragraphs(fh), concurrency=args.concurrency, cache=cache,
+								scheduler=scheduler, backend=args.backend, raise_on_error=False):
+			print(s, flush=True)
+			count += 1
+			if isinstance(s, SummaryError):
+				failures.append(s)
+	except Exception as exc:
+		print(f"Error: {exc}")
+		return 3
+	finally:
+		if fh is not sys.stdin:
+			fh.close()
+	if not count:
+		print("No input text provided on stdin or file.")
+		return 2
+	return _report_failures(failures)
 
 
 if __name__ == "__main__":
 	raise SystemExit(main())
 
-
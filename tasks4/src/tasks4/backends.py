@@ -0,0 +1,142 @@
+"""Summarizer backends for tasks4.
+
+A backend turns paragraphs into short phrases. `summarize_paragraphs` and
+`iter_summaries` take one with `backend=` (an instance or a name from
+`BACKENDS`; the default is "openai"):
+
+- `OpenAIBackend` sends chat-completion requests through the module-level
+  `tasks4.openai` client, exactly as before backends existed.
+- `ExtractiveBackend` runs locally with no network or API key: it scores
+  each paragraph's words by TF-IDF and returns the top few keywords in the
+  order they appear. Thousands of paragraphs per second on one core.
+
+Remote backends (`remote = True`) need an API key and have their requests
+issued on a thread pool through the optional scheduler; local ones are
+called directly.
+"""
+from __future__ import annotations
+
+import math
+import re
+import threading
+from collections import Counter
+from typing import Dict, List, Optional, Sequence, Union
+
+
+class Backend:
+	"""Interface every summarizer backend implements."""
+
+	name = ""
+	remote = True
+
+	def summarize(self, paragraph: str, *, model: str, temperature: float, max_tokens: int) -> str:
+		raise NotImplementedError
+
+	def summarize_batch(self, paragraphs: Sequence[str], *, model: str, temperature: float,
+						max_tokens: int) -> List[Optional[str]]:
+		"""One summary per paragraph, None where an entry could not be read."""
+		return [self.summarize(p, model=model, temperature=temperature, max_tokens=max_tokens)
+				for p in paragraphs]
+
+	def cache_tag(self, model: str) -> str:
+		"""What identifies this backend's output in `SummaryCache` keys."""
+		return f"{self.name}:{model}"
+
+
+class OpenAIBackend(Backend):
+	"""Chat-completion requests via `tasks4.openai`."""
+
+	name = "openai"
+
+	def summarize(self, paragraph, *, model, temperature, max_tokens):
+		from . import _summarize_one
+		return _summarize_one(paragraph, model=model, temperature=temperature, max_tokens=max_tokens)
+
+	def summarize_batch(self, paragraphs, *, model, temperature, max_tokens):
+		from . import _summarize_batch
+		return _summarize_batch(paragraphs, model=model, temperature=temperature, max_tokens=max_tokens)
+
+	def cache_tag(self, model):
+		# plain model name, so caches written before backends existed still hit
+		return model
+
+
+STOPWORDS = frozenset("""
+a about above after again against all also am an and any are as at be because been before
+being below between both but by can could did do does doing down during each few for from
+further had has have having he her here hers herself him himself his how i if in into is it
+its itself just me more most my myself no nor not now of off on once only or other our ours
+ourselves out over own same she should so some such than that the their theirs them
+themselves then there these they this those through to too under until up very was we were
+what when where which while who whom why will with would you your yours yourself yourselves
+""".split())
+
+_WORD = re.compile(r"[A-Za-z][A-Za-z0-9'-]*")
+
+
+class ExtractiveBackend(Backend):
+	"""Local keyword summarizer (TF-IDF over every paragraph seen so far).
+
+	Document frequencies accumulate across calls, so a word that appears in
+	most paragraphs of a document stops being picked as a keyword. The
+	summary is the `max_words` best-scoring distinct words of the paragraph
+	in their original order and casing, with the first letter capitalized.
+	"""
+
+	name = "extractive"
+	remote = False
+
+	def __init__(self, max_words: int = 4):
+		self.max_words = max_words
+		self.df: Counter = Counter()
+		self.docs = 0
+		self._lock = threading.Lock()
+
+	def _terms(self, paragraph: str) -> List[str]:
+		return [w for w in _WORD.findall(paragraph) if w.lower() not in STOPWORDS and len(w) > 1]
+
+	def _observe(self, terms: Sequence[str]) -> None:
+		with self._lock:
+			self.df.update({t.lower() for t in terms})
+			self.docs += 1
+
+	def _phrase(self, terms: Sequence[str]) -> str:
+		tf = Counter(t.lower() for t in terms)
+		docs, df = self.docs, self.df
+		score: Dict[str, float] = {
+			w: n * (math.log((1 + docs) / (1 + df[w])) + 1.0) for w, n in tf.items()}
+		# highest score first; earlier words win ties
+		first = {}
+		for i, t in enumerate(terms):
+			first.setdefault(t.lower(), (i, t))
+		best = sorted(score, key=lambda w: (-score[w], first[w][0]))[:self.max_words]
+		words = [first[w][1] for w in sorted(best, key=lambda w: first[w][0])]
+		phrase = " ".join(words)
+		return phrase[:1].upper() + phrase[1:]
+
+	def summarize(self, paragraph, *, model="", temperature=0.0, max_tokens=0):
+		terms = self._terms(paragraph)
+		self._observe(terms)
+		return self._phrase(terms)
+
+	def summarize_batch(self, paragraphs, *, model="", temperature=0.0, max_tokens=0):
+		# see the whole batch first so IDF reflects all of it
+		termlists = [self._terms(p) for p in paragraphs]
+		for terms in termlists:
+			self._observe(terms)
+		return [self._phrase(terms) for terms in termlists]
+
+
+BACKENDS = {"openai": OpenAIBackend, "extractive": ExtractiveBackend}
+
+
+def get_backend(backend: Union[None, str, Backend] = None) -> Backend:
+	"""Resolve `backend` (None, a name from BACKENDS or an instance)."""
+	if backend is None:
+		return OpenAIBackend()
+	if isinstance(backend, str):
+		try:
+			return BACKENDS[backend]()
+		except KeyError:
+			raise ValueError(f"unknown backend {backend!r} (choose from {', '.join(BACKENDS)})")
+	return backend
@@ -0,0 +1,136 @@
+"""Persistent summary cache for tasks4.
+
+Summaries are stored in a local SQLite file keyed by a SHA-256 of the
+normalized paragraph text plus everything else that shapes the answer
+(model, system prompt, temperature, max_tokens), so re-running over a
+mostly unchanged document only sends the paragraphs that changed.
+
+Entries older than `max_age` seconds are treated as missing, and `evict()`
+drops expired entries and then the least recently used ones until at most
+`max_entries` remain.
+
+Lookups and stores are held in memory and written in one transaction by
+`flush()`, which `evict()` and `close()` call, so a run commits once
+rather than once per paragraph.
+"""
+from __future__ import annotations
+
+import hashlib
+import json
+import os
+import re
+import sqlite3
+import time
+from typing import Callable, Dict, Optional
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS summaries (
+    key TEXT PRIMARY KEY,
+    summary TEXT NOT NULL,
+    created REAL NOT NULL,
+    last_used REAL NOT NULL
+);
+CREATE INDEX IF NOT EXISTS summaries_last_used ON summaries(last_used);
+"""
+
+
+def normalize(paragraph: str) -> str:
+	"""Collapse whitespace so re-wrapped paragraphs hash the same."""
+	return re.sub(r"\s+", " ", paragraph).strip()
+
+
+class SummaryCache:
+	"""SQLite-backed summary cache with hit/miss counters."""
+
+	def __init__(self, path: str, max_entries: int = 100_000,
+				 max_age: float = 30 * 24 * 3600,
+				 clock: Callable[[], float] = time.time):
+		dirpath = os.path.dirname(path)
+		if dirpath and not os.path.exists(dirpath):
+			os.makedirs(dirpath, exist_ok=True)
+		self.path = path
+		self.max_entries = max_entries
+		self.max_age = max_age
+		self.clock = clock
+		self.hits = 0
+		self.misses = 0
+		# written by flush(): key -> (summary, created) for new entries and
+		# key -> last_used for hits
+		self._new: Dict[str, tuple] = {}
+		self._used: Dict[str, float] = {}
+		self.conn = sqlite3.connect(path)
+		self.conn.executescript(SCHEMA)
+
+	@staticmethod
+	def key(paragraph: str, *, model: str, system_prompt: str,
+			temperature: float, max_tokens: int) -> str:
+		payload = json.dumps([normalize(paragraph), model, system_prompt, temperature, max_tokens],
+							 ensure_ascii=False)
+		return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+	def get(self, key: str, *fallbacks: str) -> Optional[str]:
+		"""The summary under `key`, else under the first of `fallbacks` that
+		has one; counts as a single hit or miss."""
+		now = self.clock()
+		cutoff = now - self.max_age
+		keys = (key,) + fallbacks
+		rows = dict(self.conn.execute(
+			f"SELECT key, summary FROM summaries WHERE key IN ({', '.join('?' * len(keys))}) AND created >= ?",
+			keys + (cutoff,)))
+		for k in keys:
+			if k in self._new and self._new[k][1] >= cutoff:
+				self.hits += 1
+				self._used[k] = now
+				return self._new[k][0]
+			if k in rows:
+				self.hits += 1
+				self._used[k] = now
+				return rows[k]
+		self.misses += 1
+		return None
+
+	def put(self, key: str, summary: str) -> None:
+		self._new[key] = (summary, self.clock())
+		self._used.pop(key, None)
+
+	def flush(self) -> None:
+		"""Write the pending stores and last-used times in one transaction."""
+		if not self._new and not self._used:
+			return
+		with self.conn:
+			self._write()
+
+	def _write(self) -> None:
+		self.conn.executemany(
+			"INSERT OR REPLACE INTO summaries (key, summary, created, last_used) VALUES (?, ?, ?, ?)",
+			[(k, s, t, self._used.pop(k, t)) for k, (s, t) in self._new.items()])
+		self.conn.executemany("UPDATE summaries SET last_used = ? WHERE key = ?",
+							  [(t, k) for k, t in self._used.items()])
+		self._new.clear()
+		self._used.clear()
+
+	def evict(self) -> int:
+		"""Write pending changes, then drop expired entries and least recently
+		used ones over the size limit."""
+		with self.conn:
+			self._write()
+			cur = self.conn.execute("DELETE FROM summaries WHERE created < ?",
+									(self.clock() - self.max_age,))
+			removed = cur.rowcount
+			cur = self.conn.execute(
+				"DELETE FROM summaries WHERE key IN ("
+				" SELECT key FROM summaries ORDER BY last_used DESC LIMIT -1 OFFSET ?)",
+				(self.max_entries,))
+			removed += cur.rowcount
+		return removed
+
+	def __len__(self) -> int:
+		self.flush()
+		return self.conn.execute("SELECT COUNT(*) FROM summaries").fetchone()[0]
+
+	def stats(self) -> Dict[str, int]:
+		return {"hits": self.hits, "misses": self.misses}
+
+	def close(self) -> None:
+		self.flush()
+		self.conn.close()
@@ -0,0 +1,137 @@
+"""Incremental re-summarization of edited documents.
+
+`summarize_file(path)` keeps the previous run's paragraph fingerprints and
+summaries in a sidecar next to the document (`<path>.summaries.json`). On
+the next run the new paragraph list is diffed against the stored one:
+
+- paragraphs whose fingerprint is still there reuse their summary, whether
+  they stayed put or moved (including duplicates, matched one for one);
+- only new or edited paragraphs are sent to the backend;
+- fingerprints that no longer appear are dropped from the sidecar.
+
+Fingerprints are SHA-256 hashes of the whitespace-normalized paragraph, and
+the sidecar remembers the backend/model/settings it was written with, so
+changing any of those starts from scratch.
+"""
+from __future__ import annotations
+
+import difflib
+import hashlib
+import json
+import os
+import tempfile
+from collections import defaultdict, deque
+from typing import Dict, List, Optional, Tuple
+
+from .cache import normalize
+
+STATE_VERSION = 1
+
+
+def sidecar_path(path: str) -> str:
+	return path + ".summaries.json"
+
+
+def fingerprint(paragraph: str) -> str:
+	return hashlib.sha256(normalize(paragraph).encode("utf-8")).hexdigest()
+
+
+def load_state(path: str, settings: str) -> List[Tuple[str, str]]:
+	"""(fingerprint, summary) pairs from the last run, or [] if the sidecar
+	is missing, unreadable or was written with other settings."""
+	try:
+		with open(sidecar_path(path), "r", encoding="utf-8") as f:
+			state = json.load(f)
+	except (OSError, ValueError):
+		return []
+	if state.get("version") != STATE_VERSION or state.get("settings") != settings:
+		return []
+	return [(p["fp"], p["summary"]) for p in state.get("paragraphs", [])]
+
+
+def save_state(path: str, settings: str, entries: List[Tuple[str, str]]) -> None:
+	target = sidecar_path(path)
+	state = {"version": STATE_VERSION, "settings": settings,
+			 "paragraphs": [{"fp": fp, "summary": s} for fp, s in entries]}
+	fd, tmp = tempfile.mkstemp(dir=os.path.dirname(os.path.abspath(target)))
+	try:
+		with os.fdopen(fd, "w", encoding="utf-8") as f:
+			json.dump(state, f, ensure_ascii=False)
+		os.replace(tmp, target)
+	finally:
+		if os.path.exists(tmp):
+			os.remove(tmp)
+
+
+def plan(old: List[Tuple[str, str]], new_fps: List[str]) -> Tuple[List[Optional[str]], Dict[str, int]]:
+	"""Match `new_fps` against the stored `old` entries.
+
+	Returns the reusable summary for each new paragraph (None where it must
+	be summarized) and counts of unchanged, moved, new and deleted
+	paragraphs. Unchanged ones are those in the longest matching runs of
+	the two sequences; other reused ones count as moved.
+	"""
+	old_fps = [fp for fp, _ in old]
+	reused: List[Optional[str]] = [None] * len(new_fps)
+	taken = [False] * len(old)
+	matcher = difflib.SequenceMatcher(None, old_fps, new_fps, autojunk=False)
+	unchanged = 0
+	for block in matcher.get_matching_blocks():
+		for k in range(block.size):
+			reused[block.b + k] = old[block.a + k][1]
+			taken[block.a + k] = True
+		unchanged += block.size
+	spare = defaultdict(deque)
+	for (fp, summary), used in zip(old, taken):
+		if not used:
+			spare[fp].append(summary)
+	moved = 0
+	for i, fp in enumerate(new_fps):
+		if reused[i] is None and spare[fp]:
+			reused[i] = spare[fp].popleft()
+			moved += 1
+	stats = {
+		"unchanged": unchanged,
+		"moved": moved,
+		"new": sum(s is None for s in reused),
+		"deleted": sum(len(q) for q in spare.values()),
+	}
+	return reused, stats
+
+
+def summarize_file(path: str, text: Optional[str] = None, *, model: str = "gpt-5-mini",
+				   max_tokens: int = 16, temperature: float = 0.2, backend=None,
+				   **kwargs) -> Tuple[List[str], Dict[str, int]]:
+	"""Summarize the document at `path`, re-using the last run's summaries.
+
+	`text` defaults to the file's contents. Other keyword arguments go to
+	`summarize_paragraphs` for the paragraphs that do need summarizing;
+	failed ones come back as `SummaryError` markers (never raised) and are
+	not remembered. Returns the full summary list, in paragraph order, and
+	the stats from `plan` plus "summarized" (paragraphs sent).
+	"""
+	from . import SummaryError, _split_into_paragraphs, summarize_paragraphs
+	from .backends import get_backend
+
+	backend = get_backend(backend)
+	if text is None:
+		with open(path, "r", encoding="utf-8") as f:
+			text = f.read()
+	settings = json.dumps([backend.cache_tag(model), temperature, max_tokens])
+	paragraphs = _split_into_paragraphs(text)
+	fps = [fingerprint(p) for p in paragraphs]
+	summaries, stats = plan(load_state(path, settings), fps)
+
+	todo = [i for i, s in enumerate(summaries) if s is None]
+	if todo:
+		# paragraphs hold no blank lines, so this re-splits into exactly `todo`
+		fresh = summarize_paragraphs("\n\n".join(paragraphs[i] for i in todo), model,
+									 max_tokens=max_tokens, temperature=temperature,
+									 backend=backend, raise_on_error=False, **kwargs)
+		for i, s in zip(todo, fresh):
+			summaries[i] = s
+	stats["summarized"] = len(todo)
+
+	save_state(path, settings, [(fp, s) for fp, s in zip(fps, summaries)
+								if not isinstance(s, SummaryError)])
+	return summaries, stats
@@ -0,0 +1,128 @@
+"""Rate limiting and retries for tasks4 API calls.
+
+`Scheduler.call(fn, tokens=n)` waits until both the requests-per-minute and
+the tokens-per-minute budgets allow another call, runs `fn`, and retries it
+with jittered exponential backoff when it fails with a rate-limit (429) or
+transient server/network error. Budgets are token buckets that refill
+continuously, so a long run settles at the configured ceiling instead of
+bursting into 429s.
+
+The clock, sleep and random source are injectable so the whole thing can
+be driven by a fake clock in tests.
+"""
+from __future__ import annotations
+
+import random
+import threading
+import time
+from typing import Callable, Optional, TypeVar
+
+T = TypeVar("T")
+
+RETRYABLE_STATUS = {408, 409, 429, 500, 502, 503, 504}
+# exception class names used by the openai package (old and new clients)
+RETRYABLE_NAMES = {
+	"RateLimitError", "APIError", "Timeout", "APITimeoutError", "APIConnectionError",
+	"ServiceUnavailableError", "InternalServerError", "TryAgain",
+}
+
+
+def is_retryable(exc: BaseException) -> bool:
+	"""Whether `exc` looks like a rate limit or a transient failure."""
+	status = getattr(exc, "http_status", None) or getattr(exc, "status_code", None)
+	if isinstance(status, int):
+		return status in RETRYABLE_STATUS
+	return isinstance(exc, (ConnectionError, TimeoutError)) or type(exc).__name__ in RETRYABLE_NAMES
+
+
+class TokenBucket:
+	"""Budget of `rate` units per minute with room for `capacity` at once.
+
+	`acquire(n)` reserves `n` units, sleeping first if the bucket does not
+	hold them yet. Reservations may overdraw the bucket, so a request larger
+	than `capacity` still goes through once the debt has been paid off, and
+	concurrent callers queue up behind each other instead of racing.
+	"""
+
+	def __init__(self, rate: float, capacity: Optional[float] = None,
+				 clock: Callable[[], float] = time.monotonic,
+				 sleep: Callable[[float], None] = time.sleep):
+		if rate <= 0:
+			raise ValueError("rate must be positive")
+		self.per_second = rate / 60.0
+		# default: one second's worth, so no window ever sees more than the quota
+		self.capacity = capacity if capacity is not None else max(self.per_second, 1.0)
+		self.clock = clock
+		self.sleep = sleep
+		self.tokens = self.capacity
+		self.updated = clock()
+		self._lock = threading.Lock()
+
+	def acquire(self, n: float = 1.0) -> float:
+		"""Take `n` units, blocking until they are available; returns the wait."""
+		with self._lock:
+			now = self.clock()
+			self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.per_second)
+			self.updated = now
+			self.tokens -= n
+			wait = -self.tokens / self.per_second if self.tokens < 0 else 0.0
+		if wait > 0:
+			self.sleep(wait)
+		return wait
+
+
+class Scheduler:
+	"""Run calls under RPM/TPM budgets, retrying transient failures.
+
+	`rpm`/`tpm` of None mean unlimited. A call is attempted at most
+	`max_retries + 1` times; the delay before retry k is
+	`min(max_delay, base_delay * 2**k)`, jittered to between half and all
+	of that, or the error's `retry_after` if it carries one.
+	"""
+
+	def __init__(self, rpm: Optional[float] = None, tpm: Optional[float] = None, *,
+				 max_retries: int = 5, base_delay: float = 1.0, max_delay: float = 60.0,
+				 clock: Callable[[], float] = time.monotonic,
+				 sleep: Callable[[float], None] = time.sleep,
+				 rng: Callable[[], float] = random.random):
+		self.requests = TokenBucket(rpm, clock=clock, sleep=sleep) if rpm else None
+		self.tokens = TokenBucket(tpm, clock=clock, sleep=sleep) if tpm else None
+		self.max_retries = max_retries
+		self.base_delay = base_delay
+		self.max_delay = max_delay
+		self.sleep = sleep
+		self.rng = rng
+		self.calls = 0
+		self.retries = 0
+		self.waited = 0.0
+		self._lock = threading.Lock()
+
+	def backoff(self, attempt: int, exc: Optional[BaseException] = None) -> float:
+		retry_after = getattr(exc, "retry_after", None)
+		if isinstance(retry_after, (int, float)) and retry_after > 0:
+			return float(retry_after)
+		delay = min(self.max_delay, self.base_delay * (2 ** attempt))
+		return delay / 2 + self.rng() * delay / 2
+
+	def call(self, fn: Callable[[], T], tokens: float = 1.0) -> T:
+		attempt = 0
+		while True:
+			waited = 0.0
+			if self.requests is not None:
+				waited += self.requests.acquire(1)
+			if self.tokens is not None:
+				waited += self.tokens.acquire(tokens)
+			with self._lock:
+				self.calls += 1
+				self.waited += waited
+			try:
+				return fn()
+			except Exception as exc:
+				if attempt >= self.max_retries or not is_retryable(exc):
+					raise
+				delay = self.backoff(attempt, exc)
+				attempt += 1
+				with self._lock:
+					self.retries += 1
+					self.waited += delay
+				self.sleep(delay)
@@ -0,0 +1,49 @@
+import os
+import sys
+
+import pytest
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "..", "..")))
+
+import tasks4
+from tasks4.backends import Backend, ExtractiveBackend, get_backend
+
+
+def test_extractive_backend_works_offline(monkeypatch):
+    monkeypatch.setattr(tasks4, "openai", None)
+    monkeypatch.delenv("OPENAI_API_KEY", raising=False)
+    text = ("The quarterly budget review covers marketing spend and hiring plans.\n\n"
+            "Our cat knocked the vase off the shelf during the storm.")
+    summaries = tasks4.summarize_paragraphs(text, backend="extractive")
+    assert len(summaries) == 2
+    assert summaries[0].startswith("Quarterly")
+    assert "cat" in summaries[1].lower() and "the" not in summaries[1].lower().split()
+
+
+def test_extractive_prefers_distinctive_words():
+    backend = ExtractiveBackend(max_words=1)
+    out = backend.summarize_batch([
+        "project alpha deadline", "project beta budget", "project gamma launch"])
+    assert out == ["Alpha", "Beta", "Gamma"]
+
+
+def test_custom_backend_instance_and_unknown_name(monkeypatch):
+    class Upper(Backend):
+        name = "upper"
+        remote = False
+
+        def summarize(self, paragraph, **kwargs):
+            return paragraph.upper()
+
+    assert tasks4.summarize_paragraphs("a\n\nb", backend=Upper()) == ["A", "B"]
+    with pytest.raises(ValueError):
+        get_backend("nope")
+
+
+def test_extractive_backend_throughput():
+    import time
+    paras = [f"Paragraph {i} discusses topic {i % 50} with several descriptive words here." for i in range(5000)]
+    start = time.perf_counter()
+    out = ExtractiveBackend().summarize_batch(paras)
+    assert len(out) == 5000
+    assert time.perf_counter() - start < 2.5
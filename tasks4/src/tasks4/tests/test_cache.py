@@ -0,0 +1,115 @@
+import os
+import sys
+import types
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "..", "..")))
+
+import tasks4
+from tasks4.cache import SummaryCache
+
+
+def counting_openai(calls):
+    class CountingChatCompletion:
+        @staticmethod
+        def create(*args, **kwargs):
+            para = kwargs["messages"][-1]["content"]
+            calls.append(para)
+            return {"choices": [{"message": {"content": para.split()[0]}}]}
+
+    return types.SimpleNamespace(ChatCompletion=CountingChatCompletion)
+
+
+def test_unchanged_paragraphs_cost_no_requests(tmp_path, monkeypatch):
+    calls = []
+    monkeypatch.setattr(tasks4, "openai", counting_openai(calls))
+    cache = SummaryCache(str(tmp_path / "cache.db"))
+    text = "alpha one\n\nbeta two\n\ngamma three"
+    assert tasks4.summarize_paragraphs(text, api_key="k", cache=cache) == ["alpha", "beta", "gamma"]
+    assert len(calls) == 3
+
+    # whitespace changes do not matter; only the edited paragraph is re-sent
+    edited = "alpha   one\n\ndelta two\n\ngamma\nthree"
+    assert tasks4.summarize_paragraphs(edited, api_key="k", cache=cache) == ["alpha", "delta", "gamma"]
+    assert calls[3:] == ["delta two"]
+    assert cache.stats() == {"hits": 2, "misses": 4}
+
+    # a different model is a different key
+    tasks4.summarize_paragraphs(text, model="other", api_key="k", cache=cache)
+    assert len(calls) == 7
+    cache.close()
+
+
+def test_summaries_finished_before_a_failure_are_cached(tmp_path, monkeypatch):
+    import pytest
+    from test_summarizer import EchoChatCompletion
+    monkeypatch.setattr(tasks4, "openai", types.SimpleNamespace(ChatCompletion=EchoChatCompletion))
+    cache = SummaryCache(str(tmp_path / "cache.db"))
+    with pytest.raises(RuntimeError):
+        tasks4.summarize_paragraphs("alpha one\n\nFAIL two\n\ngamma three", api_key="k", cache=cache)
+    # the paragraph after the failure was still summarized
+    assert len(cache) == 2
+    cache.close()
+
+
+def test_batched_and_single_summaries_are_cached_apart(tmp_path, monkeypatch):
+    from test_summarizer import BatchChatCompletion
+    monkeypatch.setattr(tasks4, "openai", types.SimpleNamespace(ChatCompletion=BatchChatCompletion))
+    monkeypatch.setattr(BatchChatCompletion, "calls", [])
+    cache = SummaryCache(str(tmp_path / "cache.db"))
+    # one batch of four with a retried paragraph, then a batch of one
+    text = "alpha one\n\nGARBLE two\n\ngamma three\n\ndelta four\n\nepsilon five"
+    tasks4.summarize_paragraphs(text, api_key="k", cache=cache, batch_size=4)
+    assert len(BatchChatCompletion.calls) == 3
+    # the retry and the batch of one went out one-by-one, so a one-by-one
+    # run reuses them and asks again only for the batched answers
+    assert tasks4.summarize_paragraphs(text, api_key="k", cache=cache) == \
+        ["alpha", "GARBLE", "gamma", "delta", "epsilon"]
+    assert [m[-1]["content"] for m in BatchChatCompletion.calls[3:]] == ["alpha one", "gamma three", "delta four"]
+    assert all(m[0]["content"] == tasks4.SYSTEM_PROMPT for m in BatchChatCompletion.calls[3:])
+    # batch mode takes either kind of answer
+    tasks4.summarize_paragraphs(text, api_key="k", cache=cache, batch_size=4)
+    assert len(BatchChatCompletion.calls) == 6
+    cache.close()
+
+
+def test_eviction_by_age_and_size(tmp_path):
+    now = [1000.0]
+    cache = SummaryCache(str(tmp_path / "cache.db"), max_entries=2, max_age=100, clock=lambda: now[0])
+    for i, key in enumerate("abc"):
+        now[0] += 1
+        cache.put(key, f"s{i}")
+    now[0] += 1
+    assert cache.get("a") == "s0"  # "a" becomes most recently used
+    assert cache.evict() == 1
+    assert cache.get("b") is None and cache.get("a") == "s0" and cache.get("c") == "s2"
+
+    now[0] += 200
+    assert cache.get("a") is None
+    assert cache.evict() == 2
+    assert len(cache) == 0
+    cache.close()
+
+
+def test_a_run_writes_its_changes_in_one_transaction(tmp_path, monkeypatch):
+    import sqlite3
+    path = str(tmp_path / "cache.db")
+    calls = []
+    monkeypatch.setattr(tasks4, "openai", counting_openai(calls))
+    cache = SummaryCache(path)
+    cache.put("old", "s")
+    cache.flush()
+    commits = []
+    cache.conn.set_trace_callback(lambda sql: commits.append(sql) if sql == "COMMIT" else None)
+    reader = sqlite3.connect(path)
+    seen = []
+    evict = cache.evict
+    cache.evict = lambda: (seen.append(reader.execute("SELECT COUNT(*) FROM summaries").fetchone()[0]),
+                           evict())[1]
+    assert cache.get("old") == "s"
+    tasks4.summarize_paragraphs("alpha one\n\nbeta two\n\ngamma three", api_key="k", cache=cache)
+    # nothing reached the file before the final evict(), which committed once
+    assert seen == [1]
+    assert commits == ["COMMIT"]
+    assert reader.execute("SELECT COUNT(*) FROM summaries").fetchone()[0] == 4
+    reader.close()
+    cache.close()
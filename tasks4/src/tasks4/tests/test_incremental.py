@@ -0,0 +1,86 @@
+import os
+import sys
+import tempfile
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "..", "..")))
+
+import tasks4
+from tasks4 import incremental
+from tasks4.backends import Backend
+
+
+class CountingBackend(Backend):
+    """Local backend summarizing a paragraph as its first word and
+    remembering which paragraphs it was asked about."""
+
+    name = "counting"
+    remote = False
+
+    def __init__(self):
+        self.seen = []
+
+    def summarize(self, paragraph, **kwargs):
+        self.seen.append(paragraph)
+        return paragraph.split()[0]
+
+
+def temp_doc(text):
+    fd, path = tempfile.mkstemp(suffix=".txt")
+    with os.fdopen(fd, "w", encoding="utf-8") as f:
+        f.write(text)
+    return path
+
+
+def cleanup(path):
+    for p in (path, incremental.sidecar_path(path)):
+        if os.path.exists(p):
+            os.remove(p)
+
+
+def test_only_changed_paragraphs_are_resummarized():
+    path = temp_doc("alpha one\n\nbeta two\n\ngamma three\n\ndelta four")
+    backend = CountingBackend()
+    summaries, stats = incremental.summarize_file(path, backend=backend)
+    assert summaries == ["alpha", "beta", "gamma", "delta"]
+    assert stats["summarized"] == 4
+
+    # move delta to the front, edit beta, delete gamma, insert a new one
+    backend.seen.clear()
+    text = "delta four\n\nalpha one\n\nbeta   two edited\n\nepsilon five"
+    summaries, stats = incremental.summarize_file(path, text, backend=backend)
+    assert summaries == ["delta", "alpha", "beta", "epsilon"]
+    assert backend.seen == ["beta   two edited", "epsilon five"]
+    assert stats == {"unchanged": 1, "moved": 1, "new": 2, "deleted": 2, "summarized": 2}
+    cleanup(path)
+
+
+def test_whitespace_reflow_and_duplicates_are_reused():
+    path = temp_doc("same text here\n\nsame text here\n\nother")
+    backend = CountingBackend()
+    incremental.summarize_file(path, backend=backend)
+    backend.seen.clear()
+    summaries, stats = incremental.summarize_file(
+        path, "same\ntext here\n\nother\n\nsame text  here", backend=backend)
+    assert summaries == ["same", "other", "same"]
+    assert backend.seen == []
+    assert stats["summarized"] == 0 and stats["deleted"] == 0
+    cleanup(path)
+
+
+def test_changed_settings_start_from_scratch():
+    path = temp_doc("alpha one\n\nbeta two")
+    backend = CountingBackend()
+    incremental.summarize_file(path, backend=backend)
+    backend.seen.clear()
+    incremental.summarize_file(path, backend=backend, max_tokens=32)
+    assert len(backend.seen) == 2
+    cleanup(path)
+
+
+def test_cli_incremental_reports_reuse(capsys):
+    path = temp_doc("The quarterly budget review.\n\nThe cat and the vase.")
+    assert tasks4.main([path, "--backend", "extractive", "--incremental"]) == 0
+    assert "summarized 2" in capsys.readouterr().err
+    assert tasks4.main([path, "--backend", "extractive", "--incremental"]) == 0
+    assert "reused 2 of 2 paragraph(s) (2 unchanged, 0 moved), summarized 0" in capsys.readouterr().err
+    cleanup(path)
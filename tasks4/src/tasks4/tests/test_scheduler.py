@@ -0,0 +1,104 @@
+import os
+import sys
+import types
+
+import pytest
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "..", "..")))
+
+import tasks4
+from tasks4.scheduler import Scheduler, TokenBucket, is_retryable
+
+
+class FakeClock:
+    """Monotonic clock that only moves when someone sleeps."""
+
+    def __init__(self):
+        self.now = 0.0
+        self.sleeps = []
+
+    def __call__(self):
+        return self.now
+
+    def sleep(self, seconds):
+        self.sleeps.append(seconds)
+        self.now += seconds
+
+
+class RateLimitError(Exception):
+    http_status = 429
+
+
+class FlakyChatCompletion:
+    """Fake client: each paragraph is rate limited `failures` times before it
+    succeeds; paragraphs containing 'BAD' fail with a non-retryable error."""
+
+    failures = 2
+    seen = {}
+
+    @classmethod
+    def create(cls, *args, **kwargs):
+        para = kwargs["messages"][-1]["content"]
+        if "BAD" in para:
+            raise ValueError("bad request")
+        n = cls.seen[para] = cls.seen.get(para, 0) + 1
+        if n <= cls.failures:
+            raise RateLimitError("slow down")
+        return {"choices": [{"message": {"content": para.split()[0]}}]}
+
+
+def test_token_bucket_settles_at_rate():
+    clock = FakeClock()
+    bucket = TokenBucket(120, clock=clock, sleep=clock.sleep)
+    for _ in range(100):
+        bucket.acquire()
+    # 2 per second, with a 2-request burst allowance at the start
+    assert clock.now == pytest.approx(49.0)
+
+
+def test_token_bucket_allows_oversized_request_after_debt():
+    clock = FakeClock()
+    bucket = TokenBucket(600, capacity=10, clock=clock, sleep=clock.sleep)
+    bucket.acquire(50)
+    assert clock.now == pytest.approx(4.0)
+    bucket.acquire(10)
+    assert clock.now == pytest.approx(5.0)
+
+
+def test_retries_with_jittered_exponential_backoff():
+    clock = FakeClock()
+    sched = Scheduler(max_retries=3, base_delay=1.0, clock=clock, sleep=clock.sleep, rng=lambda: 1.0)
+    attempts = []
+
+    def call():
+        attempts.append(clock.now)
+        if len(attempts) < 4:
+            raise RateLimitError("429")
+        return "ok"
+
+    assert sched.call(call) == "ok"
+    assert clock.sleeps == [1.0, 2.0, 4.0]
+    assert sched.retries == 3
+
+    sched = Scheduler(max_retries=1, clock=clock, sleep=clock.sleep, rng=lambda: 0.0)
+    with pytest.raises(RateLimitError):
+        sched.call(lambda: (_ for _ in ()).throw(RateLimitError("429")))
+
+
+def test_is_retryable():
+    assert is_retryable(RateLimitError())
+    assert is_retryable(ConnectionError())
+    assert not is_retryable(ValueError())
+
+
+def test_summaries_survive_rate_limits_with_partial_results(monkeypatch):
+    clock = FakeClock()
+    monkeypatch.setattr(tasks4, "openai", types.SimpleNamespace(ChatCompletion=FlakyChatCompletion))
+    monkeypatch.setattr(FlakyChatCompletion, "seen", {})
+    sched = Scheduler(rpm=60, max_retries=5, clock=clock, sleep=clock.sleep, rng=lambda: 0.5)
+    text = "alpha one\n\nBAD two\n\ngamma three"
+    summaries = tasks4.summarize_paragraphs(text, api_key="test", scheduler=sched, raise_on_error=False)
+    assert summaries[0] == "alpha" and summaries[2] == "gamma"
+    assert isinstance(summaries[1], tasks4.SummaryError)
+    assert sched.retries == 4
+    assert sched.calls == 7
@@ -42,3 +42,140 @@ def test_summarize_two_paragraphs(monkeypatch):
 
     # Expect exactly two summaries and that trailing punctuation was removed
     assert summaries == ["Brief task A", "Brief task B"]
+
+
+class EchoChatCompletion:
+    """Fake client that summarizes a paragraph as its first word, optionally
+    sleeping to simulate latency and failing on paragraphs containing 'FAIL'."""
+
+    latency = 0.0
+
+    @classmethod
+    def create(cls, *args, **kwargs):
+        import time
+        para = kwargs["messages"][-1]["content"]
+        time.sleep(cls.latency)
+        if "FAIL" in para:
+            raise RuntimeError("boom")
+        return {"choices": [{"message": {"content": para.split()[0] + "."}}]}
+
+
+class OverlapChatCompletion:
+    """Fake client that holds each request until `width` are in flight
+    together (or a second passes) and records the most seen at once."""
+
+    def __init__(self, width):
+        import threading
+        self.width = width
+        self.lock = threading.Lock()
+        self.full = threading.Event()
+        self.active = self.peak = 0
+
+    def create(self, *args, **kwargs):
+        with self.lock:
+            self.active += 1
+            self.peak = max(self.peak, self.active)
+            if self.active >= self.width:
+                self.full.set()
+        self.full.wait(1.0)
+        with self.lock:
+            self.active -= 1
+        para = kwargs["messages"][-1]["content"]
+        return {"choices": [{"message": {"content": para.split()[0] + "."}}]}
+
+
+def test_concurrent_summaries_keep_paragraph_order(monkeypatch):
+    client = OverlapChatCompletion(width=4)
+    monkeypatch.setattr(tasks4, "openai", types.SimpleNamespace(ChatCompletion=client))
+    text = "\n\n".join(f"p{i} some words" for i in range(16))
+    summaries = tasks4.summarize_paragraphs(text, api_key="test", concurrency=8)
+    assert summaries == [f"p{i}" for i in range(16)]
+    assert client.peak >= 4
+
+
+def test_failed_request_is_isolated(monkeypatch):
+    import pytest
+    monkeypatch.setattr(tasks4, "openai", types.SimpleNamespace(ChatCompletion=EchoChatCompletion))
+    text = "alpha one\n\nFAIL two\n\ngamma three"
+    summaries = tasks4.summarize_paragraphs(text, api_key="test", concurrency=3, raise_on_error=False)
+    assert summaries[0] == "alpha" and summaries[2] == "gamma"
+    assert isinstance(summaries[1], tasks4.SummaryError)
+    assert summaries[1] == "[error: boom]"
+    with pytest.raises(RuntimeError):
+        tasks4.summarize_paragraphs(text, api_key="test", concurrency=3)
+
+
+class BatchChatCompletion:
+    """Fake client answering batched requests with a JSON array of first
+    words; a paragraph containing 'GARBLE' gets a non-string entry."""
+
+    calls = []
+
+    @classmethod
+    def create(cls, *args, **kwargs):
+        import json
+        messages = kwargs["messages"]
+        cls.calls.append(messages)
+        if messages[0]["content"] != tasks4.BATCH_SYSTEM_PROMPT:
+            return EchoChatCompletion.create(*args, **kwargs)
+        paras = json.loads(messages[-1]["content"])
+        items = [None if "GARBLE" in p else p.split()[0] for p in paras]
+        return {"choices": [{"message": {"content": "Summaries:\n" + json.dumps(items)}}]}
+
+
+def test_batched_mode_packs_paragraphs(monkeypatch):
+    monkeypatch.setattr(tasks4, "openai", types.SimpleNamespace(ChatCompletion=BatchChatCompletion))
+    monkeypatch.setattr(BatchChatCompletion, "calls", [])
+    text = "\n\n".join(f"p{i} some words" for i in range(10))
+    summaries = tasks4.summarize_paragraphs(text, api_key="test", batch_size=4)
+    assert summaries == [f"p{i}" for i in range(10)]
+    assert len(BatchChatCompletion.calls) == 3
+
+
+def test_batched_mode_falls_back_for_unparsed_items(monkeypatch):
+    monkeypatch.setattr(tasks4, "openai", types.SimpleNamespace(ChatCompletion=BatchChatCompletion))
+    monkeypatch.setattr(BatchChatCompletion, "calls", [])
+    text = "alpha one\n\nGARBLE two\n\ngamma three"
+    summaries = tasks4.summarize_paragraphs(text, api_key="test", batch_size=8)
+    assert summaries == ["alpha", "GARBLE", "gamma"]
+    # one batched call plus one single-paragraph retry
+    assert [m[-1]["content"] for m in BatchChatCompletion.calls[1:]] == ["GARBLE two"]
+
+
+def test_pack_batches_respects_token_budget():
+    paras = ["x" * 40, "x" * 40, "x" * 400, "x" * 40]
+    assert tasks4._pack_batches(paras, 10, 30) == [[0, 1], [2], [3]]
+    assert tasks4._parse_batch("not json", 2) == [None, None]
+    assert tasks4._parse_batch('["a.", "b"]', 3) == [None, None, None]
+
+
+def test_iter_paragraphs_matches_split():
+    import io
+    text = "\n  first para\nline two\n\n\n \nsecond\n\t\nthird  \n"
+    assert list(tasks4.iter_paragraphs(io.StringIO(text))) == tasks4._split_into_paragraphs(text)
+
+
+def test_iter_summaries_streams_in_order_with_bounded_window(monkeypatch):
+    monkeypatch.setattr(tasks4, "openai", types.SimpleNamespace(ChatCompletion=EchoChatCompletion))
+    monkeypatch.setattr(EchoChatCompletion, "latency", 0.01)
+    consumed = []
+
+    def paragraphs():
+        for i in range(50):
+            consumed.append(i)
+            yield f"p{i} words"
+
+    stream = tasks4.iter_summaries(paragraphs(), api_key="test", concurrency=4, window=6)
+    first = next(stream)
+    assert first == "p0"
+    assert len(consumed) <= 6
+    assert [first] + list(stream) == [f"p{i}" for i in range(50)]
+
+
+def test_iter_summaries_raises_in_turn(monkeypatch):
+    import pytest
+    monkeypatch.setattr(tasks4, "openai", types.SimpleNamespace(ChatCompletion=EchoChatCompletion))
+    stream = tasks4.iter_summaries(["alpha one", "FAIL two", "gamma"], api_key="test", concurrency=2)
+    assert next(stream) == "alpha"
+    with pytest.raises(RuntimeError):
+        next(stream)
@@ -0,0 +1,93 @@
+"""Commands per second: one process per command vs the socket server.
+
+Usage (from the tasks5 directory):
+  python benchmarks/bench_server.py [COMMANDS] [CLIENTS]
+
+Runs the same add-task/list-tasks mix three ways against fresh data files:
+a new `python -m src.cli` process per command (as tests/integration/
+test_flow.py does), one `src.client.Client` connection to `src.server`,
+and CLIENTS connections in parallel (where group commit kicks in).
+"""
+import os
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), ".."))
+
+from src.client import Client  # noqa: E402
+
+
+def commands(user_id, n, tag=""):
+    for i in range(n):
+        if i % 4 == 3:
+            yield ["list-tasks", user_id, "--limit", "20"]
+        else:
+            yield ["add-task", user_id, "--title", f"task {tag}{i}", "--due", f"2025-12-{i % 28 + 1:02d}"]
+
+
+def bench_subprocess(env, user_id, n):
+    start = time.perf_counter()
+    for argv in commands(user_id, n):
+        subprocess.run([sys.executable, "-m", "src.cli"] + argv, env=env, check=True,
+                       stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+    return time.perf_counter() - start
+
+
+def bench_client(sock, user_id, n, clients):
+    per_client = n // clients
+
+    def worker(k):
+        with Client(sock) as c:
+            for argv in commands(user_id, per_client, tag=f"{k}-"):
+                assert c.call(argv)["code"] == 0
+
+    threads = [threading.Thread(target=worker, args=(k,)) for k in range(clients)]
+    start = time.perf_counter()
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+    return time.perf_counter() - start
+
+
+def fresh_env(tmp, name):
+    env = os.environ.copy()
+    env["TASKS_FILE"] = os.path.join(tmp, name + ".json")
+    out = subprocess.run([sys.executable, "-m", "src.cli", "create-user", "Bench"], env=env,
+                         check=True, stdout=subprocess.PIPE, stderr=subprocess.DEVNULL, text=True).stdout
+    return env, out.split()[-1]
+
+
+def main(argv=None):
+    argv = sys.argv[1:] if argv is None else argv
+    n = int(argv[0]) if argv else 200
+    clients = int(argv[1]) if len(argv) > 1 else 8
+    os.chdir(os.path.join(os.path.dirname(__file__), ".."))
+    with tempfile.TemporaryDirectory() as tmp:
+        print(f"{n} commands (3 add-task : 1 list-tasks)")
+        print(f"{'mode':<28}  {'seconds':>8}  {'commands/s':>10}")
+        env, user_id = fresh_env(tmp, "cli")
+        elapsed = bench_subprocess(env, user_id, n)
+        print(f"{'subprocess per command':<28}  {elapsed:>8.2f}  {n / elapsed:>10.1f}")
+
+        for count in (1, clients):
+            env, user_id = fresh_env(tmp, f"server{count}")
+            sock = os.path.join(tmp, f"server{count}.sock")
+            server = subprocess.Popen([sys.executable, "-m", "src.server", "--socket", sock],
+                                      env=env, stdout=subprocess.PIPE, text=True)
+            server.stdout.readline()
+            try:
+                elapsed = bench_client(sock, user_id, n, count)
+            finally:
+                server.terminate()
+                server.wait()
+            label = f"server, {count} client(s)"
+            print(f"{label:<28}  {elapsed:>8.2f}  {n / elapsed:>10.1f}")
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
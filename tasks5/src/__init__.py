@@ -1 +1,18 @@
-from . import models, storage, cli
+"""Task manager package.
+
+Submodules (`models`, `storage`, `cli`, ...) are imported on first use
+(`src.storage`, `from src import cli`) rather than here, so running one
+of them with `python -m` or importing one doesn't load all the others.
+"""
+_SUBMODULES = {"cli", "client", "index", "models", "profiling", "server", "sqlite_storage", "storage"}
+
+
+def __getattr__(name):
+    if name in _SUBMODULES:
+        __import__(f"{__name__}.{name}")  # binds the submodule in globals()
+        return globals()[name]
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+
+
+def __dir__():
+    return sorted(set(globals()) | _SUBMODULES)
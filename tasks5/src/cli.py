@@ -1,19 +1,25 @@
 import argparse
+import os
 import sys
-from typing import Optional
 
 from . import models
+from . import profiling
 from . import storage
+from .profiling import span
 
 
 def eprint(*args, **kwargs):
     print(*args, file=sys.stderr, **kwargs)
 
 
+def _engine(args):
+    """The engine to run against: `args.engine` if the caller set one (the
+    server does), else the one configured by the environment."""
+    return getattr(args, "engine", None) or storage.get_engine()
+
+
 def cmd_list_users(args):
-    data = storage.load_data()
-    users = sorted(data.get("users", []), key=lambda u: u.get("display_name", ""))
-    for u in users:
+    for u in _engine(args).list_users():
         print(f"{u['id']}\t{u['display_name']}")
     return 0
 
@@ -25,31 +31,42 @@ def cmd_create_user(args):
     except ValueError as e:
         eprint(f"ERROR 2 {e}")
         return 2
-    data = storage.load_data()
-    data.setdefault("users", []).append({"id": user.id, "display_name": user.display_name})
-    storage.save_data(data)
+    _engine(args).add_user({"id": user.id, "display_name": user.display_name})
     print(f"CREATED {user.id}")
     return 0
 
 
-def _find_user(data, user_id):
-    for u in data.get("users", []):
-        if u["id"] == user_id:
-            return u
-    return None
-
-
 def cmd_list_tasks(args):
     user_id = args.user_id
-    data = storage.load_data()
-    user = _find_user(data, user_id)
-    if not user:
-        eprint("ERROR 3 user-not-found")
-        return 3
-    tasks = [t for t in data.get("tasks", []) if t.get("user_id") == user_id]
-    tasks_sorted = sorted(tasks, key=lambda t: t.get("due_date", ""))
-    for t in tasks_sorted:
-        print(f"{t['id']}\t{t['due_date']}\t{t.get('category','')}\t{t['title']}")
+    filters = {k: v for k, v in (("due_from", args.due_from), ("due_to", args.due_to),
+                                 ("category", args.category), ("limit", args.limit),
+                                 ("after", args.after)) if v is not None}
+    try:
+        for bound in (args.due_from, args.due_to):
+            if bound is not None:
+                from datetime import date
+                date.fromisoformat(bound)
+    except ValueError:
+        eprint("ERROR 2 dates must be ISO YYYY-MM-DD")
+        return 2
+    if args.limit is not None and args.limit < 0:
+        eprint("ERROR 2 limit must not be negative")
+        return 2
+    engine = _engine(args)
+    with engine.transaction(write=False):
+        if engine.get_user(user_id) is None:
+            eprint("ERROR 3 user-not-found")
+            return 3
+        try:
+            with span("query"):
+                tasks = engine.list_tasks(user_id, **filters)
+        except ValueError as e:
+            eprint(f"ERROR 2 {e}")
+            return 2
+    with span("format"):
+        lines = [f"{t['id']}\t{t['due_date']}\t{t.get('category','')}\t{t['title']}\n" for t in tasks]
+    with span("print"):
+        sys.stdout.writelines(lines)
     return 0
 
 
@@ -58,25 +75,24 @@ def cmd_add_task(args):
     title = args.title
     due = args.due
     category = args.category
-    data = storage.load_data()
-    user = _find_user(data, user_id)
-    if not user:
-        eprint("ERROR 3 user-not-found")
-        return 3
-    try:
-        task = models.Task.create(user_id=user_id, title=title, due_date=due, category=category)
-    except ValueError as e:
-        eprint(f"ERROR 2 {e}")
-        return 2
-    data.setdefault("tasks", []).append({
-        "id": task.id,
-        "user_id": task.user_id,
-        "title": task.title,
-        "due_date": task.due_date,
-        "category": task.category,
-        "created_at": task.created_at,
-    })
-    storage.save_data(data)
+    engine = _engine(args)
+    with engine.transaction():
+        if engine.get_user(user_id) is None:
+            eprint("ERROR 3 user-not-found")
+            return 3
+        try:
+            task = models.Task.create(user_id=user_id, title=title, due_date=due, category=category)
+        except ValueError as e:
+            eprint(f"ERROR 2 {e}")
+            return 2
+        engine.add_task({
+            "id": task.id,
+            "user_id": task.user_id,
+            "title": task.title,
+            "due_date": task.due_date,
+            "category": task.category,
+            "created_at": task.created_at,
+        })
     print(f"TASK-ADDED {task.id}")
     return 0
 
@@ -84,57 +100,137 @@ def cmd_add_task(args):
 def cmd_remove_task(args):
     user_id = args.user_id
     task_id = args.task_id
-    data = storage.load_data()
-    user = _find_user(data, user_id)
-    if not user:
-        eprint("ERROR 3 user-not-found")
-        return 3
-    tasks = data.get("tasks", [])
-    for i, t in enumerate(tasks):
-        if t.get("id") == task_id and t.get("user_id") == user_id:
-            del tasks[i]
-            storage.save_data(data)
-            print(f"TASK-REMOVED {task_id}")
-            return 0
-    eprint("ERROR 4 task-not-found")
-    return 4
+    engine = _engine(args)
+    with engine.transaction():
+        if engine.get_user(user_id) is None:
+            eprint("ERROR 3 user-not-found")
+            return 3
+        removed = engine.remove_task(user_id, task_id)
+    if not removed:
+        eprint("ERROR 4 task-not-found")
+        return 4
+    print(f"TASK-REMOVED {task_id}")
+    return 0
 
 
-def main(argv=None):
-    parser = argparse.ArgumentParser(prog="taskmgr")
-    sub = parser.add_subparsers(dest="cmd")
+def cmd_migrate(args):
+    try:
+        copied = storage.migrate(args.source, _engine(args))
+    except (OSError, ValueError) as e:
+        eprint(f"ERROR 2 {e}")
+        return 2
+    print(f"MIGRATED {copied['users']} {copied['tasks']}")
+    return 0
 
-    sub.add_parser("list-users")
 
-    p = sub.add_parser("create-user")
+def _create_user_args(p):
     p.add_argument("display_name")
 
-    p = sub.add_parser("list-tasks")
+
+def _list_tasks_args(p):
     p.add_argument("user_id")
+    p.add_argument("--from", dest="due_from", default=None, help="earliest due date (inclusive)")
+    p.add_argument("--to", dest="due_to", default=None, help="latest due date (inclusive)")
+    p.add_argument("--category", default=None)
+    p.add_argument("--limit", type=int, default=None)
+    p.add_argument("--after", default=None, help="task id to continue after (last one printed)")
+
 
-    p = sub.add_parser("add-task")
+def _add_task_args(p):
     p.add_argument("user_id")
     p.add_argument("--title", required=True)
     p.add_argument("--due", required=True)
     p.add_argument("--category", default=None)
 
-    p = sub.add_parser("remove-task")
+
+def _remove_task_args(p):
     p.add_argument("user_id")
     p.add_argument("task_id")
 
+
+def _migrate_args(p):
+    p.add_argument("source")
+
+
+# subcommand -> function adding its arguments
+SUBCOMMAND_ARGS = {
+    "list-users": lambda p: None,
+    "create-user": _create_user_args,
+    "list-tasks": _list_tasks_args,
+    "add-task": _add_task_args,
+    "remove-task": _remove_task_args,
+    "migrate": _migrate_args,
+}
+
+
+def _help_formatter(prog):
+    """argparse's HelpFormatter without its shutil import.
+
+    argparse makes a formatter for every add_argument, and the default one
+    imports shutil (and bz2, lzma, ...) to find the terminal width.
+    """
+    try:
+        width = int(os.environ["COLUMNS"])
+    except (KeyError, ValueError):
+        try:
+            width = os.get_terminal_size(sys.__stdout__.fileno()).columns
+        except (AttributeError, ValueError, OSError):
+            width = 80
+    return argparse.HelpFormatter(prog, width=width - 2)
+
+
+def build_parser(command=None):
+    """The CLI's parser. With `command`, only that subcommand's arguments are
+    set up, which is all `main` needs for a command line naming it."""
+    parser = argparse.ArgumentParser(prog="taskmgr", formatter_class=_help_formatter)
+    parser.add_argument("--profile", action="store_true",
+                        help="print a per-phase timing breakdown to stderr")
+    sub = parser.add_subparsers(dest="cmd")
+    for name, add_args in SUBCOMMAND_ARGS.items():
+        if command is None or name == command:
+            add_args(sub.add_parser(name, formatter_class=_help_formatter))
+        else:
+            sub.add_parser(name, add_help=False)
+    return parser
+
+
+def _command_in(argv):
+    """The subcommand `argv` names; None if it names none or asks for help."""
+    for arg in argv:
+        if arg in ("-h", "--help"):
+            return None
+        if not arg.startswith("-"):
+            return arg if arg in SUBCOMMAND_ARGS else None
+    return None
+
+
+COMMANDS = {
+    "list-users": cmd_list_users,
+    "create-user": cmd_create_user,
+    "list-tasks": cmd_list_tasks,
+    "add-task": cmd_add_task,
+    "remove-task": cmd_remove_task,
+    "migrate": cmd_migrate,
+}
+
+# commands that change the data (the server group-commits these)
+WRITE_COMMANDS = {"create-user", "add-task", "remove-task", "migrate"}
+
+
+def main(argv=None):
+    argv = sys.argv[1:] if argv is None else argv
+    parser = build_parser(_command_in(argv))
     args = parser.parse_args(argv)
-    if args.cmd == "list-users":
-        return cmd_list_users(args)
-    if args.cmd == "create-user":
-        return cmd_create_user(args)
-    if args.cmd == "list-tasks":
-        return cmd_list_tasks(args)
-    if args.cmd == "add-task":
-        return cmd_add_task(args)
-    if args.cmd == "remove-task":
-        return cmd_remove_task(args)
-    parser.print_help()
-    return 1
+    command = COMMANDS.get(args.cmd)
+    if command is None:
+        parser.print_help()
+        return 1
+    profiling.start(profile=args.profile)
+    try:
+        with span(args.cmd):
+            return command(args)
+    finally:
+        profiling.stop()
 
 
 if __name__ == "__main__":
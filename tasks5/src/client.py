@@ -0,0 +1,58 @@
+"""Thin client for `src.server`.
+
+`python -m src.client <command> [args...]` takes the same arguments as
+`src.cli`, sends them to the running server and prints its output and
+exits with its status. From Python, keep a `Client` open and `call()` it
+repeatedly to avoid reconnecting per command.
+"""
+import json
+import socket
+import sys
+from typing import Any, Dict, List, Optional
+
+from .server import default_socket
+
+
+class Client:
+    """One connection to the server; `call()` sends a command and waits."""
+
+    def __init__(self, socket_path: Optional[str] = None):
+        self.socket_path = socket_path or default_socket()
+        self.sock = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+        self.sock.connect(self.socket_path)
+        self.file = self.sock.makefile("rwb")
+
+    def call(self, argv: List[str]) -> Dict[str, Any]:
+        self.file.write(json.dumps({"argv": list(argv)}).encode("utf-8") + b"\n")
+        self.file.flush()
+        line = self.file.readline()
+        if not line:
+            raise ConnectionError("server closed the connection")
+        return json.loads(line)
+
+    def close(self) -> None:
+        self.file.close()
+        self.sock.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+
+def main(argv=None):
+    argv = sys.argv[1:] if argv is None else argv
+    try:
+        with Client() as client:
+            reply = client.call(argv)
+    except OSError as e:
+        print(f"ERROR 1 server unavailable: {e}", file=sys.stderr)
+        return 1
+    sys.stdout.write(reply["stdout"])
+    sys.stderr.write(reply["stderr"])
+    return reply["code"]
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
@@ -0,0 +1,204 @@
+"""Lookup index for the JSON data document.
+
+`JsonEngine` keeps this under `data["index"]` while a document is loaded
+and updates it on every write, so reads never scan or sort the whole task
+list:
+
+- `users` / `tasks`: id -> position in `data["users"]` / `data["tasks"]`
+- `by_user`: user id -> `{"due": [...], "ids": [...]}`, that user's task
+  ids in due-date order (parallel lists so `bisect` works on the dates;
+  tasks with equal dates keep insertion order)
+- `digest`: sum of a CRC per user (position, id) and per task (position,
+  id, owner, due date); the functions below keep it up to date
+
+Tasks are removed by moving the last task into the freed slot, so
+`data["tasks"]` itself is in no particular order.
+
+On disk the index lives in a `<data file>.idx` sidecar holding `by_user`
+and `digest` (`to_sidecar`), stamped by `storage` with the data file it
+was written for; the position maps are cheap to recompute (`attach`).
+A sidecar whose stamp does not match is only trusted if its digest still
+does, and `ensure` rebuilds an index that is missing or from another
+version.
+"""
+from __future__ import annotations
+
+import zlib
+from bisect import bisect_left, bisect_right
+from typing import Any, Dict, List, Optional
+
+from .profiling import span
+
+INDEX_VERSION = 3
+_MASK = (1 << 64) - 1
+
+
+def _user_sig(pos: int, user: Dict[str, Any]) -> int:
+    return zlib.crc32(f"u{pos}\t{user.get('id')}".encode())
+
+
+def _task_sig(pos: int, task: Dict[str, Any]) -> int:
+    return zlib.crc32(f"{pos}\t{task.get('id')}\t{task.get('user_id')}\t{task.get('due_date', '')}".encode())
+
+
+def digest(data: Dict[str, Any]) -> int:
+    """What `index["digest"]` must be for `data`; O(n)."""
+    users = sum(_user_sig(i, u) for i, u in enumerate(data.get("users", [])))
+    return (users + sum(_task_sig(i, t) for i, t in enumerate(data.get("tasks", [])))) & _MASK
+
+
+def index_path(path: str) -> str:
+    return path + ".idx"
+
+
+def to_sidecar(index: Dict[str, Any]) -> Dict[str, Any]:
+    """The part of `index` worth saving: the rest is rebuilt in O(n)."""
+    return {"version": index["version"], "by_user": index["by_user"], "digest": index["digest"]}
+
+
+def attach(data: Dict[str, Any], saved: Dict[str, Any], check: bool = False) -> bool:
+    """Make `saved` (from `to_sidecar`) the index of `data`.
+
+    With `check`, only if its digest matches `data`, which catches what
+    counts cannot: a due date, owner or id edited by hand, or a task
+    removed and another added by a release that ignores the index.
+    """
+    if not isinstance(saved, dict) or saved.get("version") != INDEX_VERSION:
+        return False
+    if check and saved.get("digest") != digest(data):
+        return False
+    data["index"] = {
+        "version": INDEX_VERSION,
+        "users": {u["id"]: i for i, u in enumerate(data.get("users", []))},
+        "tasks": {t["id"]: i for i, t in enumerate(data.get("tasks", []))},
+        "by_user": saved["by_user"],
+        "digest": saved["digest"],
+    }
+    return True
+
+
+def build(data: Dict[str, Any]) -> Dict[str, Any]:
+    """Build the index for `data` from scratch."""
+    index = {
+        "version": INDEX_VERSION,
+        "users": {u["id"]: i for i, u in enumerate(data.get("users", []))},
+        "tasks": {},
+        "by_user": {},
+        "digest": digest(data),
+    }
+    tasks = data.get("tasks", [])
+    # a stable sort keeps equal due dates in file order
+    for i in sorted(range(len(tasks)), key=lambda i: tasks[i].get("due_date", "")):
+        _link(index, tasks[i], i)
+    return index
+
+
+def ensure(data: Dict[str, Any]) -> Dict[str, Any]:
+    """Return `data["index"]`, (re)building it if it can't be trusted."""
+    index = data.get("index")
+    if (not isinstance(index, dict) or index.get("version") != INDEX_VERSION
+            or len(index.get("users", ())) != len(data.get("users", []))
+            or len(index.get("tasks", ())) != len(data.get("tasks", []))):
+        with span("index"):
+            index = data["index"] = build(data)
+    return index
+
+
+def _link(index: Dict[str, Any], task: Dict[str, Any], pos: int) -> None:
+    index["tasks"][task["id"]] = pos
+    entry = index["by_user"].setdefault(task.get("user_id"), {"due": [], "ids": []})
+    due = task.get("due_date", "")
+    at = bisect_right(entry["due"], due)
+    entry["due"].insert(at, due)
+    entry["ids"].insert(at, task["id"])
+
+
+def add_user(data: Dict[str, Any], user: Dict[str, Any]) -> None:
+    index = ensure(data)
+    users = data.setdefault("users", [])
+    index["users"][user["id"]] = len(users)
+    index["digest"] = (index["digest"] + _user_sig(len(users), user)) & _MASK
+    users.append(user)
+
+
+def get_user(data: Dict[str, Any], user_id: str):
+    pos = ensure(data)["users"].get(user_id)
+    return None if pos is None else data["users"][pos]
+
+
+def add_task(data: Dict[str, Any], task: Dict[str, Any]) -> None:
+    index = ensure(data)
+    tasks = data.setdefault("tasks", [])
+    tasks.append(task)
+    _link(index, task, len(tasks) - 1)
+    index["digest"] = (index["digest"] + _task_sig(len(tasks) - 1, task)) & _MASK
+
+
+def user_tasks(data: Dict[str, Any], user_id: str) -> List[Dict[str, Any]]:
+    """`user_id`'s tasks in due-date order, in O(k) for k tasks."""
+    index = ensure(data)
+    entry = index["by_user"].get(user_id)
+    if entry is None:
+        return []
+    tasks, pos = data["tasks"], index["tasks"]
+    return [tasks[pos[tid]] for tid in entry["ids"]]
+
+
+def query(data: Dict[str, Any], user_id: str, *, due_from: Optional[str] = None,
+          due_to: Optional[str] = None, category: Optional[str] = None,
+          limit: Optional[int] = None, after: Optional[str] = None) -> List[Dict[str, Any]]:
+    """`user_tasks` restricted to `due_from <= due_date <= due_to`, to one
+    `category`, to tasks after the task `after` in that order, and to at
+    most `limit` results.
+
+    The date bounds and cursor are found by bisection, so only the tasks
+    that are returned (plus any skipped by the category filter) are read.
+    Raises ValueError if `after` is not one of the user's tasks.
+    """
+    index = ensure(data)
+    entry = index["by_user"].get(user_id, {"due": [], "ids": []})
+    due, ids = entry["due"], entry["ids"]
+    tasks, pos = data.get("tasks", []), index["tasks"]
+    start = 0 if due_from is None else bisect_left(due, due_from)
+    end = len(due) if due_to is None else bisect_right(due, due_to)
+    if after is not None:
+        at = pos.get(after)
+        if at is None or tasks[at].get("user_id") != user_id:
+            raise ValueError(f"unknown cursor {after}")
+        d = tasks[at].get("due_date", "")
+        start = max(start, ids.index(after, bisect_left(due, d), bisect_right(due, d)) + 1)
+    out: List[Dict[str, Any]] = []
+    for i in range(start, end):
+        if limit is not None and len(out) >= limit:
+            break
+        task = tasks[pos[ids[i]]]
+        if category is None or task.get("category") == category:
+            out.append(task)
+    return out
+
+
+def remove_task(data: Dict[str, Any], user_id: str, task_id: str) -> bool:
+    """Remove `task_id` if it belongs to `user_id`; False if there is no such task."""
+    index = ensure(data)
+    pos = index["tasks"].get(task_id)
+    tasks = data.get("tasks", [])
+    if pos is None or tasks[pos].get("user_id") != user_id:
+        return False
+    task = tasks[pos]
+    entry = index["by_user"][user_id]
+    due = task.get("due_date", "")
+    lo, hi = bisect_left(entry["due"], due), bisect_right(entry["due"], due)
+    at = entry["ids"].index(task_id, lo, hi)
+    del entry["due"][at], entry["ids"][at]
+    if not entry["ids"]:
+        del index["by_user"][user_id]
+    # swap-remove: the last task takes the freed slot
+    sig = index["digest"] - _task_sig(pos, task)
+    last = tasks.pop()
+    del index["tasks"][task_id]
+    if pos < len(tasks):
+        tasks[pos] = last
+        index["tasks"][last["id"]] = pos
+        sig += _task_sig(pos, last) - _task_sig(len(tasks), last)
+    index["digest"] = sig & _MASK
+    return True
@@ -1,10 +1,11 @@
 from dataclasses import dataclass, asdict
-from datetime import date, datetime
 from typing import Optional
-import uuid
 
 
 def new_id() -> str:
+    # uuid and datetime are imported where they are used: list commands
+    # load this module but never build a model
+    import uuid
     return uuid.uuid4().hex
 
 
@@ -32,6 +33,7 @@ class Task:
 
     @staticmethod
     def create(user_id: str, title: str, due_date: str, category: Optional[str] = None) -> "Task":
+        from datetime import date, datetime
         t = title.strip()
         if not t:
             raise ValueError("title must be non-empty")
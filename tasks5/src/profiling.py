@@ -0,0 +1,118 @@
+"""Timing spans around storage and command phases.
+
+`span()` is a shared no-op until `start()` (called by `src.cli` and
+`src.server`). `--profile` prints a per-phase breakdown at exit and
+`TASKS_TRACE=<file>` appends one JSON line per span (see the quickstart).
+The server runs requests on several threads, so each thread nests its
+spans on its own stack and the totals are updated under a lock.
+"""
+from __future__ import annotations
+
+import json
+import os
+import sys
+import threading
+import time
+from contextlib import nullcontext
+from typing import Dict, Optional, TextIO
+
+TRACE_ENV = "TASKS_TRACE"
+
+_NULL = nullcontext()
+_enabled = False
+_report = False
+_trace: Optional[TextIO] = None
+_local = threading.local()
+_mutex = threading.Lock()
+# name -> [calls, total seconds, self seconds], in order of first use
+_phases: Dict[str, list] = {}
+
+
+class _Span:
+    __slots__ = ("name", "start", "children", "stack")
+
+    def __init__(self, name: str):
+        self.name = name
+
+    def __enter__(self):
+        stack = getattr(_local, "stack", None)
+        if stack is None:
+            stack = _local.stack = []
+        self.stack = stack
+        self.children = 0.0
+        stack.append(self)
+        self.start = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc):
+        elapsed = time.perf_counter() - self.start
+        stack = self.stack
+        stack.pop()
+        if stack:
+            stack[-1].children += elapsed
+        with _mutex:
+            phase = _phases.setdefault(self.name, [0, 0.0, 0.0])
+            phase[0] += 1
+            phase[1] += elapsed
+            phase[2] += elapsed - self.children
+            if _trace is not None:
+                _trace.write(json.dumps({
+                    "name": self.name,
+                    "ts": int((time.time() - elapsed) * 1e6),
+                    "dur": int(elapsed * 1e6),
+                    "depth": len(stack),
+                    "pid": os.getpid(),
+                    "thread": threading.current_thread().name,
+                }) + "\n")
+        return False
+
+
+def span(name: str):
+    """Time the enclosed block as phase `name` (a no-op unless started)."""
+    if _enabled:
+        return _Span(name)
+    return _NULL
+
+
+def start(profile: bool = False, trace_path: Optional[str] = None) -> None:
+    """Turn spans on if `profile` is set or a trace file is given
+    (`trace_path`, default `TASKS_TRACE`)."""
+    global _enabled, _report, _trace
+    if trace_path is None:
+        trace_path = os.environ.get(TRACE_ENV)
+    with _mutex:
+        _phases.clear()
+        _report = profile
+        if trace_path:
+            # line-buffered: a long-running server's trace can be followed
+            _trace = open(trace_path, "a", encoding="utf-8", buffering=1)
+        _enabled = bool(profile or trace_path)
+
+
+def stop(out: Optional[TextIO] = None) -> None:
+    """Turn spans off, print the breakdown if asked for and close the trace."""
+    global _enabled, _report, _trace
+    _enabled = False
+    with _mutex:
+        if _report:
+            report(out if out is not None else sys.stderr)
+        if _trace is not None:
+            _trace.close()
+            _trace = None
+        _report = False
+
+
+def phases() -> Dict[str, tuple]:
+    """{name: (calls, total seconds, self seconds)} for the spans so far."""
+    with _mutex:
+        return {name: tuple(v) for name, v in _phases.items()}
+
+
+def report(out: TextIO) -> None:
+    """Print the per-phase breakdown, slowest self time first."""
+    wall = sum(v[2] for v in _phases.values())
+    print(f"{'phase':<12} {'calls':>7} {'total ms':>10} {'self ms':>10} {'self %':>7}", file=out)
+    for name, (calls, total, own) in sorted(_phases.items(), key=lambda kv: -kv[1][2]):
+        share = 100.0 * own / wall if wall else 0.0
+        print(f"{name:<12} {calls:>7} {total * 1e3:>10.2f} {own * 1e3:>10.2f} {share:>6.1f}%", file=out)
+    print(f"{'(wall)':<12} {'':>7} {wall * 1e3:>10.2f}", file=out)
@@ -0,0 +1,272 @@
+"""Long-running task manager server.
+
+`python -m src.server` loads the JSON store once and answers the same
+commands as `src.cli` over a Unix domain socket, so scripts that issue many
+commands skip interpreter start-up and the per-command parse/rewrite of the
+data file. Use `src.client` (or any JSON-lines client) to talk to it.
+
+Protocol: one JSON object per line each way. A request is
+`{"argv": ["add-task", "u1", "--title", "x", "--due", "2025-01-01"]}` and
+the reply is `{"code": 0, "stdout": "TASK-ADDED ...\\n", "stderr": ""}`,
+i.e. what the CLI would have exited with and printed. Requests on one
+connection are answered in order.
+
+Reads are served straight from memory. Writes are group-committed: every
+write that arrives while the previous batch is being saved goes into the
+next batch, which is applied in memory and then saved with a single
+`storage.save_data` (one rewrite, one fsync). A write is only acknowledged
+once its batch is on disk, and reads that arrive while a batch is being
+saved wait for it, so they never see changes that might not be kept. If
+the file is changed by someone else (the CLI, another process) the server
+notices by its inode, mtime and size (storage's stamp) and reloads it.
+
+The socket is `TASKS_SOCKET`, or `<TASKS_FILE>.sock` by default. Only JSON
+stores are served; SQLite stores already avoid the whole-file rewrite.
+"""
+import argparse
+import asyncio
+import io
+import json
+import os
+import signal
+import socket
+import sys
+from contextlib import contextmanager, redirect_stderr, redirect_stdout
+from typing import Any, Dict, List, Optional, Tuple
+
+from . import cli, index, profiling, storage
+from .profiling import span
+
+
+def default_socket() -> str:
+    return os.environ.get("TASKS_SOCKET") or storage._tasks_file() + ".sock"
+
+
+def _stamp(path: str) -> Optional[Tuple[int, int, int]]:
+    try:
+        return storage._stamp(os.stat(path))
+    except OSError:
+        return None
+
+
+class MemoryEngine(storage.JsonEngine):
+    """`JsonEngine` over a document kept in memory.
+
+    Writes only change the in-memory document and mark it dirty; `flush()`
+    saves it. `reload()` re-reads the file, dropping unsaved changes.
+    """
+
+    def __init__(self, path: Optional[str] = None):
+        super().__init__(path)
+        self.reload()
+
+    def reload(self) -> None:
+        self._data = storage.load_data(self.path)
+        index.ensure(self._data)
+        self._writable = True
+        self._dirty = False
+        self.stamp = _stamp(self.path)
+
+    def changed_on_disk(self) -> bool:
+        return _stamp(self.path) != self.stamp
+
+    @contextmanager
+    def transaction(self, write: bool = True):
+        yield self
+
+    def load_data(self) -> Dict[str, Any]:
+        return self._data
+
+    def save_data(self, obj: Dict[str, Any]) -> None:
+        self._data = obj
+        index.ensure(obj)
+        self._dirty = True
+
+    def flush(self) -> None:
+        with span("commit"):
+            storage.save_data(self._data, self.path)
+        self._dirty = False
+        self.stamp = _stamp(self.path)
+
+
+class Server:
+    """Serve `src.cli` commands for one JSON store over a Unix socket."""
+
+    def __init__(self, socket_path: Optional[str] = None, path: Optional[str] = None,
+                 max_batch: int = 1024):
+        url = storage.store_url() if path is None else "json:///" + path
+        if not url.startswith("json:///"):
+            raise ValueError(f"the server only serves JSON stores, not {url}")
+        self.engine = MemoryEngine(url[len("json:///"):])
+        self.socket_path = socket_path or default_socket()
+        self.max_batch = max_batch
+        self.parser = cli.build_parser()
+        self.queue: Optional[asyncio.Queue] = None
+        # cleared while a batch is applied but not yet saved
+        self.idle: Optional[asyncio.Event] = None
+        self.stats = {"requests": 0, "writes": 0, "commits": 0}
+
+    def execute(self, argv: List[str]) -> Dict[str, Any]:
+        """Run one CLI command against the in-memory engine."""
+        out, err = io.StringIO(), io.StringIO()
+        with redirect_stdout(out), redirect_stderr(err):
+            try:
+                args = self.parser.parse_args(argv)
+                args.engine = self.engine
+                command = cli.COMMANDS.get(args.cmd)
+                if command is None:
+                    self.parser.print_help()
+                    code = 1
+                else:
+                    with span(args.cmd):
+                        code = command(args)
+            except SystemExit as e:  # argparse usage errors and --help
+                code = e.code if isinstance(e.code, int) else 2
+            except Exception as e:
+                print(f"ERROR 1 {e}", file=sys.stderr)
+                code = 1
+        return {"code": code, "stdout": out.getvalue(), "stderr": err.getvalue()}
+
+    def refresh(self) -> None:
+        """Reload the document if another process wrote the file."""
+        if self.engine.changed_on_disk():
+            self.engine.reload()
+
+    async def read(self, argv: List[str]) -> Dict[str, Any]:
+        """Run a read-only command once no batch is being saved."""
+        # the next batch may have started before this task got to run
+        while not self.idle.is_set():
+            await self.idle.wait()
+        self.refresh()
+        return self.execute(argv)
+
+    async def commit_loop(self) -> None:
+        loop = asyncio.get_running_loop()
+        while True:
+            batch = [await self.queue.get()]
+            while len(batch) < self.max_batch and not self.queue.empty():
+                batch.append(self.queue.get_nowait())
+            try:
+                replies = await self._commit(loop, [argv for argv, _ in batch])
+            except Exception as e:
+                # nothing in this batch reached the disk; forget it (before
+                # the reads woken by `idle` get to run)
+                self.engine.reload()
+                replies = [{"code": 1, "stdout": "", "stderr": f"ERROR 1 {e}\n"}] * len(batch)
+            for (_, reply), result in zip(batch, replies):
+                if not reply.done():
+                    reply.set_result(result)
+                self.queue.task_done()
+
+    async def _commit(self, loop, batch: List[List[str]]) -> List[Dict[str, Any]]:
+        for _ in range(3):
+            self.refresh()
+            replies = [self.execute(argv) for argv in batch]
+            if not self.engine._dirty:
+                return replies
+            self.idle.clear()
+            try:
+                await loop.run_in_executor(None, self.engine.flush)
+            except storage.ConflictError:
+                # another process wrote the file between our check and save:
+                # start again from its version
+                self.engine.reload()
+                continue
+            finally:
+                self.idle.set()
+            self.stats["commits"] += 1
+            return replies
+        raise storage.ConflictError("data file keeps changing; batch not saved")
+
+    async def handle(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter) -> None:
+        loop = asyncio.get_running_loop()
+        try:
+            while True:
+                line = await reader.readline()
+                if not line:
+                    break
+                self.stats["requests"] += 1
+                try:
+                    argv = json.loads(line)["argv"]
+                    if not isinstance(argv, list) or not all(isinstance(a, str) for a in argv):
+                        raise ValueError("argv must be a list of strings")
+                except (ValueError, KeyError, TypeError) as e:
+                    result = {"code": 2, "stdout": "", "stderr": f"ERROR 2 bad request: {e}\n"}
+                else:
+                    if argv and argv[0] in cli.WRITE_COMMANDS:
+                        self.stats["writes"] += 1
+                        reply = loop.create_future()
+                        self.queue.put_nowait((argv, reply))
+                        result = await reply
+                    else:
+                        result = await self.read(argv)
+                writer.write(json.dumps(result).encode("utf-8") + b"\n")
+                await writer.drain()
+        except (ConnectionError, asyncio.IncompleteReadError):
+            pass
+        finally:
+            writer.close()
+
+    def _claim_socket(self) -> None:
+        if not os.path.exists(self.socket_path):
+            return
+        probe = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+        try:
+            probe.connect(self.socket_path)
+        except OSError:
+            os.remove(self.socket_path)  # left behind by a server that died
+        else:
+            raise RuntimeError(f"a server is already listening on {self.socket_path}")
+        finally:
+            probe.close()
+
+    async def serve(self, ready=None) -> None:
+        """Serve until SIGINT/SIGTERM, then finish pending writes and exit."""
+        loop = asyncio.get_running_loop()
+        self.queue = asyncio.Queue()
+        self.idle = asyncio.Event()
+        self.idle.set()
+        self._claim_socket()
+        server = await asyncio.start_unix_server(self.handle, path=self.socket_path)
+        committer = asyncio.create_task(self.commit_loop())
+        stop = asyncio.Event()
+        for sig in (signal.SIGINT, signal.SIGTERM):
+            loop.add_signal_handler(sig, stop.set)
+        if ready is not None:
+            ready()
+        try:
+            await stop.wait()
+        finally:
+            server.close()
+            await self.queue.join()
+            committer.cancel()
+            if os.path.exists(self.socket_path):
+                os.remove(self.socket_path)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(prog="taskmgr-server")
+    parser.add_argument("--socket", default=None, help="socket path (default: TASKS_SOCKET or <TASKS_FILE>.sock)")
+    args = parser.parse_args(argv)
+    try:
+        server = Server(args.socket)
+    except (ValueError, OSError) as e:
+        print(f"ERROR 2 {e}", file=sys.stderr)
+        return 2
+
+    def ready():
+        print(f"LISTENING {server.socket_path}", flush=True)
+
+    profiling.start()  # TASKS_TRACE traces every request the server runs
+    try:
+        asyncio.run(server.serve(ready))
+    except RuntimeError as e:
+        print(f"ERROR 2 {e}", file=sys.stderr)
+        return 2
+    finally:
+        profiling.stop()
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
@@ -0,0 +1,134 @@
+"""SQLite storage engine for the task manager.
+
+Users and tasks live in two tables; `tasks(user_id, due_date)` is indexed so
+`list-tasks` is a single index range scan and every write touches one row.
+Selected with `TASKS_STORE=sqlite:///path/to/tasks.db` (see `storage`).
+"""
+import os
+import sqlite3
+from contextlib import contextmanager
+from typing import Any, Dict, List, Optional
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS users (
+    id TEXT PRIMARY KEY,
+    display_name TEXT NOT NULL
+);
+CREATE TABLE IF NOT EXISTS tasks (
+    id TEXT PRIMARY KEY,
+    user_id TEXT NOT NULL REFERENCES users(id),
+    title TEXT NOT NULL,
+    due_date TEXT NOT NULL,
+    category TEXT,
+    created_at TEXT NOT NULL
+);
+CREATE INDEX IF NOT EXISTS tasks_user_due ON tasks(user_id, due_date);
+CREATE INDEX IF NOT EXISTS users_display_name ON users(display_name);
+"""
+
+TASK_COLUMNS = ("id", "user_id", "title", "due_date", "category", "created_at")
+
+
+class SqliteEngine:
+    """Storage engine backed by an SQLite database file.
+
+    Same interface as `storage.JsonEngine`. Ties in ordering are broken by
+    insertion order (rowid), matching the stable sorts of the JSON engine.
+    """
+
+    def __init__(self, path: str):
+        self.path = path
+        dirpath = os.path.dirname(path)
+        if dirpath and not os.path.exists(dirpath):
+            os.makedirs(dirpath, exist_ok=True)
+        # autocommit mode; transaction() issues BEGIN/COMMIT itself
+        self.conn = sqlite3.connect(path, isolation_level=None, timeout=30)
+        self.conn.row_factory = sqlite3.Row
+        self.conn.executescript(SCHEMA)
+        self._depth = 0
+
+    @contextmanager
+    def transaction(self, write: bool = True):
+        if self._depth:
+            self._depth += 1
+            try:
+                yield self
+            finally:
+                self._depth -= 1
+            return
+        self.conn.execute("BEGIN IMMEDIATE" if write else "BEGIN")
+        self._depth = 1
+        try:
+            yield self
+        except BaseException:
+            self.conn.execute("ROLLBACK")
+            raise
+        else:
+            self.conn.execute("COMMIT")
+        finally:
+            self._depth = 0
+
+    def load_data(self) -> Dict[str, Any]:
+        users = [dict(r) for r in self.conn.execute("SELECT id, display_name FROM users ORDER BY rowid")]
+        tasks = [dict(r) for r in self.conn.execute(
+            f"SELECT {', '.join(TASK_COLUMNS)} FROM tasks ORDER BY rowid")]
+        return {"users": users, "tasks": tasks}
+
+    def save_data(self, obj: Dict[str, Any]) -> None:
+        """Replace the whole database with the users and tasks in `obj`."""
+        with self.transaction():
+            self.conn.execute("DELETE FROM tasks")
+            self.conn.execute("DELETE FROM users")
+            for u in obj.get("users", []):
+                self.add_user(u)
+            for t in obj.get("tasks", []):
+                self.add_task(t)
+
+    def list_users(self) -> List[Dict[str, Any]]:
+        rows = self.conn.execute("SELECT id, display_name FROM users ORDER BY display_name, rowid")
+        return [dict(r) for r in rows]
+
+    def get_user(self, user_id: str) -> Optional[Dict[str, Any]]:
+        row = self.conn.execute("SELECT id, display_name FROM users WHERE id = ?", (user_id,)).fetchone()
+        return dict(row) if row else None
+
+    def add_user(self, user: Dict[str, Any]) -> None:
+        self.conn.execute("INSERT INTO users (id, display_name) VALUES (?, ?)",
+                          (user["id"], user["display_name"]))
+
+    def list_tasks(self, user_id: str, *, due_from: Optional[str] = None,
+                   due_to: Optional[str] = None, category: Optional[str] = None,
+                   limit: Optional[int] = None, after: Optional[str] = None) -> List[Dict[str, Any]]:
+        """Same filters as `index.query`, as one range scan of `tasks_user_due`."""
+        where, params = ["user_id = ?"], [user_id]
+        if due_from is not None:
+            where.append("due_date >= ?")
+            params.append(due_from)
+        if due_to is not None:
+            where.append("due_date <= ?")
+            params.append(due_to)
+        if category is not None:
+            where.append("category = ?")
+            params.append(category)
+        if after is not None:
+            row = self.conn.execute("SELECT due_date, rowid FROM tasks WHERE id = ? AND user_id = ?",
+                                    (after, user_id)).fetchone()
+            if row is None:
+                raise ValueError(f"unknown cursor {after}")
+            where.append("(due_date, rowid) > (?, ?)")
+            params.extend(row)
+        sql = (f"SELECT {', '.join(TASK_COLUMNS)} FROM tasks WHERE {' AND '.join(where)}"
+               " ORDER BY due_date, rowid")
+        if limit is not None:
+            sql += " LIMIT ?"
+            params.append(limit)
+        return [dict(r) for r in self.conn.execute(sql, params)]
+
+    def add_task(self, task: Dict[str, Any]) -> None:
+        self.conn.execute(
+            f"INSERT INTO tasks ({', '.join(TASK_COLUMNS)}) VALUES (?, ?, ?, ?, ?, ?)",
+            tuple(task.get(c) for c in TASK_COLUMNS))
+
+    def remove_task(self, user_id: str, task_id: str) -> bool:
+        cur = self.conn.execute("DELETE FROM tasks WHERE id = ? AND user_id = ?", (task_id, user_id))
+        return cur.rowcount > 0
@@ -1,37 +1,463 @@
+"""Persistence for the task manager.
+
+`load_data`/`save_data` read and write the whole JSON document selected by
+`TASKS_FILE`. The CLI goes through a storage engine instead (`get_engine`),
+which exposes one method per operation so each command can be a single
+lookup or write:
+
+- `JsonEngine` (default) implements them on top of `load_data`/`save_data`,
+  keeping a per-user due-date index (`src.index`) in a `.idx` sidecar so
+  lookups and `list-tasks` never scan or sort every task.
+- `SqliteEngine` (`src.sqlite_storage`) uses indexed SQLite tables. Select it
+  with `TASKS_STORE=sqlite:///path/to/tasks.db` or a `TASKS_FILE` ending in
+  `.db`/`.sqlite`.
+
+How hard `save_data` works to get each write onto stable storage is set by
+`TASKS_DURABILITY` (see `durability()` and the quickstart's "Durability"
+section), and `batch()` folds several saves in one process into one write.
+"""
+from __future__ import annotations
+
+import atexit
 import json
 import os
-import tempfile
-from typing import Dict, Any
+import threading
+from contextlib import contextmanager, nullcontext
+from typing import Dict, Any, List, Optional
+
+from . import index
+from .profiling import span
+
+try:
+    import fcntl
+except ImportError:  # pragma: no cover - Windows has no fcntl; locking becomes a no-op
+    fcntl = None
+
+
+class ConflictError(RuntimeError):
+    """The data file was written by someone else since it was loaded."""
+
+
+# per thread: .locks (abspath -> lock depth) and .batches (abspath -> the
+# document saved inside batch(), or None before the first save)
+_local = threading.local()
+
+DURABILITY_MODES = ("always", "batch", "os")
 
 
 def _tasks_file() -> str:
     return os.environ.get("TASKS_FILE", os.path.join("data", "tasks.json"))
 
 
-def load_data() -> Dict[str, Any]:
-    path = _tasks_file()
+def durability() -> str:
+    """The `TASKS_DURABILITY` policy for `save_data`:
+
+    - "always" (default): fsync the new file and its directory before
+      `save_data` returns.
+    - "batch": don't fsync on every save; sync once `TASKS_SYNC_WRITES`
+      (default 50) saves have piled up or `TASKS_SYNC_MS` (default 100)
+      milliseconds after the first unsynced one, and at exit.
+    - "os": never fsync; the OS writes the data back when it likes.
+    """
+    mode = os.environ.get("TASKS_DURABILITY", "always")
+    if mode not in DURABILITY_MODES:
+        raise ValueError(f"TASKS_DURABILITY must be one of {', '.join(DURABILITY_MODES)}, not {mode!r}")
+    return mode
+
+
+def _fsync_path(path: str, directory: bool = False) -> None:
+    flags = os.O_RDONLY | (getattr(os, "O_DIRECTORY", 0) if directory else 0)
+    try:
+        fd = os.open(path, flags)
+    except OSError:
+        if directory:  # e.g. Windows can't open directories; nothing to do
+            return
+        raise
+    try:
+        os.fsync(fd)
+    finally:
+        os.close(fd)
+
+
+_sync_lock = threading.Lock()
+_unsynced: Dict[str, int] = {}  # path -> saves since its last fsync
+_sync_timer: Optional[threading.Timer] = None
+
+
+def sync() -> None:
+    """fsync every file (and its directory) saved without one in "batch" mode."""
+    global _sync_timer
+    with _sync_lock:
+        paths = list(_unsynced)
+        _unsynced.clear()
+        if _sync_timer is not None:
+            _sync_timer.cancel()
+            _sync_timer = None
+    for path in paths:
+        if os.path.exists(path):
+            with span("fsync"):
+                _fsync_path(path)
+                _fsync_path(os.path.dirname(path) or ".", directory=True)
+
+
+atexit.register(sync)
+
+
+def _note_unsynced(path: str) -> None:
+    global _sync_timer
+    max_writes = int(os.environ.get("TASKS_SYNC_WRITES", "50"))
+    delay = int(os.environ.get("TASKS_SYNC_MS", "100")) / 1000.0
+    with _sync_lock:
+        _unsynced[path] = _unsynced.get(path, 0) + 1
+        due = sum(_unsynced.values()) >= max_writes
+        if not due and _sync_timer is None:
+            _sync_timer = threading.Timer(delay, sync)
+            _sync_timer.daemon = True
+            _sync_timer.start()
+    if due:
+        sync()
+
+
+def _thread_state(name: str) -> Dict[str, Any]:
+    state = getattr(_local, name, None)
+    if state is None:
+        state = {}
+        setattr(_local, name, state)
+    return state
+
+
+def _batched(path: str) -> Optional[Dict[str, Any]]:
+    """This thread's open batch() on `path`, or None."""
+    batches = getattr(_local, "batches", None)
+    return batches if batches and os.path.abspath(path) in batches else None
+
+
+@contextmanager
+def batch(path: Optional[str] = None):
+    """Share one write (and at most one fsync) between several saves.
+
+    Holds the lock on `path` (default `TASKS_FILE`) throughout. Inside the
+    block, this thread's `save_data` calls for that file only record the
+    document and `load_data` returns the recorded one, so load -> change ->
+    save cycles see each other's changes; the last recorded document is
+    written when the block exits. If the block raises, nothing is written.
+    Re-entrant.
+    """
+    path = os.path.abspath(path or _tasks_file())
+    batches = _thread_state("batches")
+    if path in batches:
+        yield
+        return
+    with lock(path):
+        batches[path] = None
+        try:
+            yield
+            pending = batches[path]
+        finally:
+            del batches[path]
+        if pending is not None:
+            _write(pending, path)
+
+
+@contextmanager
+def lock(path: Optional[str] = None):
+    """Hold an exclusive advisory lock on the data file.
+
+    Wrap a whole load -> mutate -> save sequence in this so concurrent
+    writers serialize instead of overwriting each other. The lock is
+    re-entrant within a thread (save_data takes it too); other threads
+    wait for it like other processes do.
+    """
+    path = os.path.abspath(path or _tasks_file())
+    depth = _thread_state("locks")
+    if path in depth:
+        depth[path] += 1
+        try:
+            yield
+        finally:
+            depth[path] -= 1
+        return
+    dirpath = os.path.dirname(path)
+    if dirpath and not os.path.exists(dirpath):
+        os.makedirs(dirpath, exist_ok=True)
+    # each open() is its own open file description, so flock also
+    # excludes other threads of this process
+    with open(path + ".lock", "a") as f:
+        if fcntl is not None:
+            with span("lock"):
+                fcntl.flock(f.fileno(), fcntl.LOCK_EX)
+        depth[path] = 1
+        try:
+            yield
+        finally:
+            del depth[path]
+            if fcntl is not None:
+                fcntl.flock(f.fileno(), fcntl.LOCK_UN)
+
+
+# abspath -> (stamp, version) of the file as this process last read or wrote it
+_seen: Dict[str, tuple] = {}
+
+
+def _stamp(st: os.stat_result) -> tuple:
+    # every write replaces the file, so a new version also means a new inode
+    return (st.st_ino, st.st_mtime_ns, st.st_size)
+
+
+def load_data(path: Optional[str] = None) -> Dict[str, Any]:
+    path = path or _tasks_file()
+    batches = _batched(path)
+    if batches is not None and batches[os.path.abspath(path)] is not None:
+        return batches[os.path.abspath(path)]
     if not os.path.exists(path):
         return {"users": [], "tasks": []}
-    with open(path, "r", encoding="utf-8") as f:
-        return json.load(f)
+    with span("read"):
+        with open(path, "r", encoding="utf-8") as f:
+            # fstat: the stamp of exactly the file read, even if it is replaced meanwhile
+            stamp = _stamp(os.fstat(f.fileno()))
+            text = f.read()
+    with span("parse"):
+        obj = json.loads(text)
+    if isinstance(obj, dict):
+        # releases before the sidecar kept the index in the document itself
+        obj.pop("index", None)
+        with span("index"):
+            _load_index(path, obj, stamp)
+    _seen[os.path.abspath(path)] = (stamp, obj.get("version", 0) if isinstance(obj, dict) else 0)
+    return obj
 
 
-def save_data(obj: Dict[str, Any]) -> None:
-    path = _tasks_file()
+def _load_index(path: str, obj: Dict[str, Any], stamp: tuple) -> None:
+    """Attach the sidecar index to `obj` if it was written for this file,
+    or if the file changed since but the index's digest still matches."""
+    try:
+        with open(index.index_path(path), "r", encoding="utf-8") as f:
+            saved = json.load(f)
+    except (OSError, ValueError):
+        return
+    if isinstance(saved, dict):
+        index.attach(obj, saved.get("index"), check=saved.get("stamp") != list(stamp))
+
+
+def _save_index(path: str, obj: Dict[str, Any]) -> None:
+    """Write `obj`'s index to its sidecar, stamped with the file just written."""
+    sidecar = index.index_path(path)
+    tmp = f"{sidecar}.{os.getpid()}-{threading.get_ident()}.tmp"
+    try:
+        with open(tmp, "w", encoding="utf-8") as f:
+            json.dump({"stamp": list(_seen[os.path.abspath(path)][0]),
+                       "index": index.to_sidecar(obj["index"])}, f, separators=(",", ":"))
+        os.replace(tmp, sidecar)
+    except OSError:
+        # the stamp check catches whatever sidecar is left behind
+        if os.path.exists(tmp):
+            os.remove(tmp)
+
+
+def _version_on_disk(path: str) -> int:
+    """The version of the file at `path`, parsing it only if it changed
+    since this process last read or wrote it."""
+    try:
+        stamp = _stamp(os.stat(path))
+    except FileNotFoundError:
+        return 0
+    seen = _seen.get(os.path.abspath(path))
+    if seen is not None and seen[0] == stamp:
+        return seen[1]
+    return load_data(path).get("version", 0)
+
+
+def save_data(obj: Dict[str, Any], path: Optional[str] = None) -> None:
+    """Write `obj` back to the data file.
+
+    `obj["version"]` must still match the version on disk (files written
+    before versioning count as version 0), otherwise ConflictError is
+    raised and nothing is written. On success the version is bumped in
+    both the file and `obj`.
+
+    The file is replaced atomically; whether it is also fsynced first
+    depends on `durability()`. Inside `batch()` the write is deferred to
+    the end of the block.
+    """
+    path = path or _tasks_file()
+    with lock(path):
+        batches = _batched(path)
+        recorded = batches[os.path.abspath(path)] if batches is not None else None
+        current = recorded.get("version", 0) if recorded is not None else _version_on_disk(path)
+        if obj.get("version", 0) != current:
+            raise ConflictError(f"data file is at version {current}, expected {obj.get('version', 0)}")
+        obj["version"] = current + 1
+        if batches is not None:
+            batches[os.path.abspath(path)] = obj
+            return
+        try:
+            _write(obj, path)
+        except BaseException:
+            obj["version"] = current
+            raise
+
+
+def _write(obj: Dict[str, Any], path: str) -> None:
+    """Atomically replace `path` with `obj`, syncing per `durability()`."""
+    mode = durability()
     dirpath = os.path.dirname(path)
     if dirpath and not os.path.exists(dirpath):
         os.makedirs(dirpath, exist_ok=True)
     # atomic write: write to temp file then replace
-    fd, tmp = tempfile.mkstemp(dir=dirpath or None)
+    with span("serialize"):
+        text = json.dumps({k: v for k, v in obj.items() if k != "index"}, indent=2, ensure_ascii=False)
+    # a name private to this process and thread, like tempfile.mkstemp's
+    # but without importing tempfile (and shutil, random, ...) on every write
+    tmp = f"{path}.{os.getpid()}-{threading.get_ident()}.tmp"
+    fd = os.open(tmp, os.O_WRONLY | os.O_CREAT | os.O_TRUNC | getattr(os, "O_BINARY", 0), 0o600)
     try:
         with os.fdopen(fd, "w", encoding="utf-8") as f:
-            json.dump(obj, f, indent=2, ensure_ascii=False)
-            f.flush()
-            os.fsync(f.fileno())
-        os.replace(tmp, path)
+            with span("write"):
+                f.write(text)
+                f.flush()
+            if mode == "always":
+                with span("fsync"):
+                    os.fsync(f.fileno())
+        with span("write"):
+            os.replace(tmp, path)
+        _seen[os.path.abspath(path)] = (_stamp(os.stat(path)), obj.get("version", 0))
     finally:
         if os.path.exists(tmp):
             try:
                 os.remove(tmp)
             except Exception:
                 pass
+    if isinstance(obj.get("index"), dict):
+        with span("index"):
+            _save_index(path, obj)
+    if mode == "always":
+        with span("fsync"):
+            _fsync_path(dirpath or ".", directory=True)
+    elif mode == "batch":
+        _note_unsynced(os.path.abspath(path))
+
+
+class JsonEngine:
+    """Storage engine over a JSON document (default: `TASKS_FILE`).
+
+    Inside `transaction()` the document is loaded once and shared by every
+    call; a write transaction holds the file lock and saves once at the end
+    if anything changed. Calls made outside a transaction open their own.
+    """
+
+    def __init__(self, path: Optional[str] = None):
+        self.path = path or _tasks_file()
+        self._data: Optional[Dict[str, Any]] = None
+        self._writable = False
+        self._dirty = False
+
+    @contextmanager
+    def transaction(self, write: bool = True):
+        if self._data is not None:
+            if write and not self._writable:
+                raise RuntimeError("write inside a read-only transaction")
+            yield self
+            return
+        with (lock(self.path) if write else nullcontext()):
+            self._data = load_data(self.path)
+            self._writable = write
+            self._dirty = False
+            try:
+                yield self
+                if self._dirty:
+                    save_data(self._data, self.path)
+            finally:
+                self._data = None
+
+    def load_data(self) -> Dict[str, Any]:
+        return load_data(self.path)
+
+    def save_data(self, obj: Dict[str, Any]) -> None:
+        save_data(obj, self.path)
+
+    def list_users(self) -> List[Dict[str, Any]]:
+        with self.transaction(write=False):
+            return sorted(self._data.get("users", []), key=lambda u: u.get("display_name", ""))
+
+    def get_user(self, user_id: str) -> Optional[Dict[str, Any]]:
+        with self.transaction(write=False):
+            return index.get_user(self._data, user_id)
+
+    def add_user(self, user: Dict[str, Any]) -> None:
+        with self.transaction():
+            index.add_user(self._data, user)
+            self._dirty = True
+
+    def list_tasks(self, user_id: str, **filters) -> List[Dict[str, Any]]:
+        """The user's tasks in due-date order; `filters` are those of
+        `index.query` (due_from, due_to, category, limit, after)."""
+        with self.transaction(write=False):
+            if filters:
+                return index.query(self._data, user_id, **filters)
+            return index.user_tasks(self._data, user_id)
+
+    def add_task(self, task: Dict[str, Any]) -> None:
+        with self.transaction():
+            index.add_task(self._data, task)
+            self._dirty = True
+
+    def remove_task(self, user_id: str, task_id: str) -> bool:
+        with self.transaction():
+            removed = index.remove_task(self._data, user_id, task_id)
+            self._dirty = self._dirty or removed
+            return removed
+
+
+def store_url() -> str:
+    """The configured store: `TASKS_STORE` if set, else `TASKS_FILE`."""
+    url = os.environ.get("TASKS_STORE")
+    if url:
+        return url
+    path = _tasks_file()
+    if path.endswith((".db", ".sqlite", ".sqlite3")):
+        return "sqlite:///" + path
+    return "json:///" + path
+
+
+def get_engine():
+    """Return the storage engine selected by the environment.
+
+    There is one per store and thread: an engine's open transaction (and an
+    SQLite connection) belongs to the thread that started it.
+    """
+    url = store_url()
+    engines = _thread_state("engines")
+    engine = engines.get(url)
+    if engine is None:
+        if url.startswith("sqlite:///"):
+            from .sqlite_storage import SqliteEngine
+            engine = SqliteEngine(url[len("sqlite:///"):])
+        elif url.startswith("json:///"):
+            engine = JsonEngine(url[len("json:///"):])
+        else:
+            raise ValueError(f"unsupported TASKS_STORE: {url}")
+        engines[url] = engine
+    return engine
+
+
+def migrate(src_path: str, engine) -> Dict[str, int]:
+    """Copy users and tasks from the JSON file at `src_path` into `engine`.
+
+    Rows whose id already exists in the target are skipped, so running the
+    migration twice is harmless. Returns the number of rows copied.
+    """
+    with open(src_path, "r", encoding="utf-8") as f:
+        src = json.load(f)
+    copied = {"users": 0, "tasks": 0}
+    existing = {t["id"] for t in engine.load_data().get("tasks", [])}
+    with engine.transaction():
+        for u in src.get("users", []):
+            if engine.get_user(u["id"]) is None:
+                engine.add_user({"id": u["id"], "display_name": u["display_name"]})
+                copied["users"] += 1
+        for t in src.get("tasks", []):
+            if t["id"] not in existing:
+                engine.add_task(t)
+                existing.add(t["id"])
+                copied["tasks"] += 1
+    return copied
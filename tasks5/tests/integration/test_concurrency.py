@@ -0,0 +1,33 @@
+import subprocess
+import os
+import sys
+
+
+def run_cmd(args, env=None):
+    cmd = [sys.executable, "-m", "src.cli"] + args
+    res = subprocess.run(cmd, stdout=subprocess.PIPE, stderr=subprocess.PIPE, text=True, env=env)
+    return res
+
+
+def test_parallel_add_task_loses_nothing(tmp_path):
+    f = tmp_path / "tasks.json"
+    env = os.environ.copy()
+    env["TASKS_FILE"] = str(f)
+    r = run_cmd(["create-user", "Carol"], env=env)
+    user_id = r.stdout.strip().split()[-1]
+
+    n = 24
+    procs = [
+        subprocess.Popen(
+            [sys.executable, "-m", "src.cli", "add-task", user_id, "--title", f"job {i}", "--due", "2025-12-01"],
+            stdout=subprocess.PIPE, stderr=subprocess.PIPE, text=True, env=env,
+        )
+        for i in range(n)
+    ]
+    for p in procs:
+        out, err = p.communicate()
+        assert p.returncode == 0, err
+
+    r = run_cmd(["list-tasks", user_id], env=env)
+    titles = {line.split("\t")[-1] for line in r.stdout.splitlines()}
+    assert titles == {f"job {i}" for i in range(n)}
@@ -0,0 +1,37 @@
+import subprocess
+import os
+import sys
+
+
+def run_cmd(args, env=None):
+    cmd = [sys.executable, "-m", "src.cli"] + args
+    res = subprocess.run(cmd, stdout=subprocess.PIPE, stderr=subprocess.PIPE, text=True, env=env)
+    return res
+
+
+def test_list_tasks_range_and_pagination(tmp_path):
+    env = os.environ.copy()
+    env["TASKS_FILE"] = str(tmp_path / "tasks.json")
+    user_id = run_cmd(["create-user", "Ann"], env=env).stdout.strip().split()[-1]
+    for day in range(1, 8):
+        run_cmd(["add-task", user_id, "--title", f"day {day}", "--due", f"2025-06-0{day}",
+                 "--category", "even" if day % 2 == 0 else "odd"], env=env)
+
+    r = run_cmd(["list-tasks", user_id, "--from", "2025-06-02", "--to", "2025-06-05",
+                 "--category", "odd"], env=env)
+    assert [line.split("\t")[-1] for line in r.stdout.splitlines()] == ["day 3", "day 5"]
+
+    pages, after = [], None
+    while True:
+        args = ["list-tasks", user_id, "--limit", "3"] + (["--after", after] if after else [])
+        lines = run_cmd(args, env=env).stdout.splitlines()
+        if not lines:
+            break
+        pages.append([line.split("\t")[-1] for line in lines])
+        after = lines[-1].split("\t")[0]
+    assert pages == [["day 1", "day 2", "day 3"], ["day 4", "day 5", "day 6"], ["day 7"]]
+
+    r = run_cmd(["list-tasks", user_id, "--after", "no-such-task"], env=env)
+    assert r.returncode == 2
+    r = run_cmd(["list-tasks", user_id, "--from", "June"], env=env)
+    assert r.returncode == 2
@@ -0,0 +1,32 @@
+import json
+import os
+import subprocess
+import sys
+
+
+def run_cmd(args, env=None):
+    cmd = [sys.executable, "-m", "src.cli"] + args
+    res = subprocess.run(cmd, stdout=subprocess.PIPE, stderr=subprocess.PIPE, text=True, env=env)
+    return res
+
+
+def test_profile_flag_and_trace_file(tmp_path):
+    env = os.environ.copy()
+    env["TASKS_FILE"] = str(tmp_path / "tasks.json")
+    user_id = run_cmd(["create-user", "Ann"], env=env).stdout.strip().split()[-1]
+    run_cmd(["add-task", user_id, "--title", "t", "--due", "2025-06-01"], env=env)
+
+    r = run_cmd(["--profile", "list-tasks", user_id], env=env)
+    assert r.returncode == 0
+    assert r.stdout.splitlines()[0].endswith("\tt")
+    phases = {line.split()[0] for line in r.stderr.splitlines() if line.strip()}
+    assert {"list-tasks", "read", "parse", "query", "format", "print", "(wall)"} <= phases
+
+    trace = tmp_path / "trace.jsonl"
+    env["TASKS_TRACE"] = str(trace)
+    r = run_cmd(["add-task", user_id, "--title", "u", "--due", "2025-06-02"], env=env)
+    assert r.returncode == 0
+    assert "phase" not in r.stderr
+    events = [json.loads(line) for line in trace.read_text().splitlines()]
+    assert events[-1]["name"] == "add-task" and events[-1]["depth"] == 0
+    assert {"lock", "read", "parse", "serialize", "write", "fsync"} <= {e["name"] for e in events}
@@ -0,0 +1,121 @@
+import json
+import os
+import signal
+import socket
+import subprocess
+import sys
+import threading
+
+import pytest
+
+from src.client import Client
+
+pytestmark = pytest.mark.skipif(not hasattr(socket, "AF_UNIX"), reason="needs Unix domain sockets")
+
+
+def run_cmd(args, env=None):
+    cmd = [sys.executable, "-m", "src.cli"] + args
+    res = subprocess.run(cmd, stdout=subprocess.PIPE, stderr=subprocess.PIPE, text=True, env=env)
+    return res
+
+
+@pytest.fixture
+def server(tmp_path):
+    env = os.environ.copy()
+    env["TASKS_FILE"] = str(tmp_path / "tasks.json")
+    sock = str(tmp_path / "tasks.sock")
+    proc = subprocess.Popen([sys.executable, "-m", "src.server", "--socket", sock],
+                            stdout=subprocess.PIPE, stderr=subprocess.PIPE, text=True, env=env)
+    assert proc.stdout.readline().strip() == f"LISTENING {sock}"
+    yield sock, env
+    proc.send_signal(signal.SIGTERM)
+    proc.wait(timeout=10)
+    assert proc.returncode == 0
+    assert not os.path.exists(sock)
+
+
+def test_server_serves_cli_commands(server, tmp_path):
+    sock, env = server
+    with Client(sock) as c:
+        reply = c.call(["create-user", "Dana"])
+        assert reply["code"] == 0
+        user_id = reply["stdout"].split()[-1]
+        assert c.call(["add-task", user_id, "--title", "late", "--due", "2025-12-02"])["code"] == 0
+        assert c.call(["add-task", user_id, "--title", "early", "--due", "2025-12-01"])["code"] == 0
+        titles = [line.split("\t")[-1] for line in c.call(["list-tasks", user_id])["stdout"].splitlines()]
+        assert titles == ["early", "late"]
+        assert c.call(["list-tasks", "nobody"]) == {"code": 3, "stdout": "", "stderr": "ERROR 3 user-not-found\n"}
+        assert c.call(["add-task", user_id, "--title", "x"])["code"] == 2  # missing --due
+
+    # acknowledged writes are on disk, and the CLI sees them
+    r = run_cmd(["list-tasks", user_id], env=env)
+    assert [line.split("\t")[-1] for line in r.stdout.splitlines()] == ["early", "late"]
+
+    # a write made behind the server's back is picked up
+    run_cmd(["add-task", user_id, "--title", "cli", "--due", "2025-11-30"], env=env)
+    with Client(sock) as c:
+        assert c.call(["list-tasks", user_id])["stdout"].splitlines()[0].endswith("\tcli")
+
+
+def test_concurrent_clients_are_group_committed(server, tmp_path):
+    sock, env = server
+    with Client(sock) as c:
+        user_id = c.call(["create-user", "Eve"])["stdout"].split()[-1]
+
+    def worker(k):
+        with Client(sock) as c:
+            for i in range(25):
+                assert c.call(["add-task", user_id, "--title", f"{k}-{i}", "--due", "2025-12-01"])["code"] == 0
+
+    threads = [threading.Thread(target=worker, args=(k,)) for k in range(8)]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+    data = json.loads((tmp_path / "tasks.json").read_text())
+    assert len(data["tasks"]) == 200
+    # fewer saves than writes: concurrent writes shared commits
+    assert data["version"] < 201
+
+
+def test_reads_wait_for_the_batch_being_saved(tmp_path):
+    import asyncio
+    from src.server import Server
+
+    srv = Server(str(tmp_path / "tasks.sock"), str(tmp_path / "tasks.json"))
+    user_id = srv.execute(["create-user", "Dana"])["stdout"].split()[-1]
+    srv.engine.flush()
+    gate = threading.Event()
+    flush = srv.engine.flush
+    srv.engine.flush = lambda: (gate.wait(5), flush())[1]
+
+    async def scenario():
+        loop = asyncio.get_running_loop()
+        srv.idle = asyncio.Event()
+        srv.idle.set()
+        write = asyncio.ensure_future(srv._commit(loop, [["add-task", user_id, "--title", "x", "--due", "2025-12-01"]]))
+        await asyncio.sleep(0.05)
+        read = asyncio.ensure_future(srv.read(["list-tasks", user_id]))
+        await asyncio.sleep(0.05)
+        # the batch is applied in memory but not saved: the read is held
+        assert not read.done()
+        gate.set()
+        await write
+        return await read
+
+    assert asyncio.run(scenario())["stdout"].endswith("\tx\n")
+
+
+def test_an_external_write_of_the_same_size_and_mtime_is_noticed(tmp_path):
+    from src.server import MemoryEngine
+
+    path = tmp_path / "tasks.json"
+    path.write_text(json.dumps({"users": [], "tasks": []}))
+    engine = MemoryEngine(str(path))
+    st = os.stat(path)
+    other = tmp_path / "other.json"
+    other.write_text(json.dumps({"users": [], "tasks": []}).replace("users", "USERS"))
+    os.utime(other, ns=(st.st_atime_ns, st.st_mtime_ns))
+    os.replace(other, path)
+    assert (os.stat(path).st_mtime_ns, os.stat(path).st_size) == (st.st_mtime_ns, st.st_size)
+    assert engine.changed_on_disk()
@@ -0,0 +1,34 @@
+import subprocess
+import os
+import sys
+
+
+def run_cmd(args, env=None):
+    cmd = [sys.executable, "-m", "src.cli"] + args
+    res = subprocess.run(cmd, stdout=subprocess.PIPE, stderr=subprocess.PIPE, text=True, env=env)
+    return res
+
+
+def test_migrate_then_use_sqlite_store(tmp_path):
+    env = os.environ.copy()
+    env["TASKS_FILE"] = str(tmp_path / "tasks.json")
+    r = run_cmd(["create-user", "Bob"], env=env)
+    user_id = r.stdout.strip().split()[-1]
+    run_cmd(["add-task", user_id, "--title", "Pay rent", "--due", "2025-12-01"], env=env)
+
+    env["TASKS_STORE"] = "sqlite:///" + str(tmp_path / "tasks.db")
+    r = run_cmd(["migrate", str(tmp_path / "tasks.json")], env=env)
+    assert r.stdout.strip() == "MIGRATED 1 1"
+
+    r = run_cmd(["add-task", user_id, "--title", "Buy milk", "--due", "2025-11-19"], env=env)
+    assert r.returncode == 0
+    task_id = r.stdout.strip().split()[-1]
+    r = run_cmd(["list-tasks", user_id], env=env)
+    assert [line.split("\t")[-1] for line in r.stdout.splitlines()] == ["Buy milk", "Pay rent"]
+
+    r = run_cmd(["remove-task", user_id, task_id], env=env)
+    assert r.returncode == 0
+    r = run_cmd(["remove-task", user_id, task_id], env=env)
+    assert r.returncode == 4
+    r = run_cmd(["list-tasks", "nobody"], env=env)
+    assert r.returncode == 3
@@ -0,0 +1,35 @@
+import os
+import subprocess
+import sys
+
+# slow imports that short commands on a JSON store don't need
+HEAVY = {"shutil", "asyncio", "sqlite3", "src.server"}
+
+
+def imported_modules(args, env):
+    """Modules `python -X importtime -m src.cli <args>` imports."""
+    cmd = [sys.executable, "-X", "importtime", "-m", "src.cli"] + args
+    res = subprocess.run(cmd, stdout=subprocess.PIPE, stderr=subprocess.PIPE, text=True, env=env)
+    assert res.returncode == 0, res.stderr
+    assert "RuntimeWarning" not in res.stderr
+    return {line.split("|")[-1].strip() for line in res.stderr.splitlines()
+            if line.startswith("import time:") and "|" in line}
+
+
+def test_short_commands_skip_heavy_imports(tmp_path):
+    env = os.environ.copy()
+    env["TASKS_FILE"] = str(tmp_path / "tasks.json")
+    res = subprocess.run([sys.executable, "-m", "src.cli", "create-user", "Ann"],
+                         stdout=subprocess.PIPE, text=True, env=env)
+    user_id = res.stdout.split()[-1]
+
+    added = imported_modules(["add-task", user_id, "--title", "t", "--due", "2025-06-01"], env)
+    assert "src.storage" in added
+    assert not HEAVY & added
+    listed = imported_modules(["list-tasks", user_id], env)
+    assert not (HEAVY | {"tempfile", "uuid", "datetime"}) & listed
+
+
+def test_package_import_is_lazy():
+    code = "import sys, src; assert 'src.cli' not in sys.modules; src.storage; assert 'src.cli' not in sys.modules"
+    assert subprocess.run([sys.executable, "-c", code]).returncode == 0
@@ -0,0 +1,85 @@
+import os
+import pytest
+from src import storage
+
+
+@pytest.fixture
+def counted(tmp_path, monkeypatch):
+    monkeypatch.setenv("TASKS_FILE", str(tmp_path / "tasks.json"))
+    calls = {"fsync": 0, "replace": 0}
+    real_fsync, real_replace = os.fsync, os.replace
+
+    def fsync(fd):
+        calls["fsync"] += 1
+        real_fsync(fd)
+
+    def replace(src, dst):
+        if not dst.endswith(".idx"):  # the index sidecar is never synced
+            calls["replace"] += 1
+        real_replace(src, dst)
+
+    monkeypatch.setattr(storage.os, "fsync", fsync)
+    monkeypatch.setattr(storage.os, "replace", replace)
+    yield calls
+    storage.sync()
+
+
+def add_users(n):
+    for i in range(n):
+        data = storage.load_data()
+        data["users"].append({"id": f"u{i}", "display_name": str(i)})
+        storage.save_data(data)
+
+
+def test_always_syncs_file_and_directory(counted, monkeypatch):
+    monkeypatch.delenv("TASKS_DURABILITY", raising=False)
+    add_users(3)
+    assert counted == {"fsync": 6, "replace": 3}
+
+
+def test_os_mode_never_syncs(counted, monkeypatch):
+    monkeypatch.setenv("TASKS_DURABILITY", "os")
+    add_users(3)
+    assert counted == {"fsync": 0, "replace": 3}
+    assert len(storage.load_data()["users"]) == 3
+
+
+def test_batch_mode_syncs_every_n_writes(counted, monkeypatch):
+    monkeypatch.setenv("TASKS_DURABILITY", "batch")
+    monkeypatch.setenv("TASKS_SYNC_WRITES", "4")
+    monkeypatch.setenv("TASKS_SYNC_MS", "60000")
+    add_users(3)
+    assert counted["fsync"] == 0
+    add_users(1)
+    assert counted["fsync"] == 2  # the file and its directory, once
+    add_users(1)
+    storage.sync()
+    assert counted["fsync"] == 4
+
+
+def test_batch_context_shares_one_write(counted, monkeypatch):
+    monkeypatch.delenv("TASKS_DURABILITY", raising=False)
+    with storage.batch():
+        add_users(5)
+        engine = storage.JsonEngine()
+        engine.add_user({"id": "x", "display_name": "X"})
+        assert counted["replace"] == 0
+    assert counted == {"fsync": 2, "replace": 1}
+    data = storage.load_data()
+    assert [u["id"] for u in data["users"]] == ["u0", "u1", "u2", "u3", "u4", "x"]
+    assert data["version"] == 6
+
+
+def test_failed_batch_writes_nothing(counted):
+    storage.save_data({"users": [], "tasks": []})
+    with pytest.raises(RuntimeError):
+        with storage.batch():
+            add_users(2)
+            raise RuntimeError("abort")
+    assert storage.load_data() == {"users": [], "tasks": [], "version": 1}
+
+
+def test_unknown_mode_is_rejected(counted, monkeypatch):
+    monkeypatch.setenv("TASKS_DURABILITY", "sometimes")
+    with pytest.raises(ValueError):
+        add_users(1)
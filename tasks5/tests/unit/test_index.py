@@ -0,0 +1,114 @@
+import json
+import random
+import pytest
+from src import index, storage
+
+
+def brute_force(data, user_id):
+    tasks = [t for t in data["tasks"] if t["user_id"] == user_id]
+    return sorted(tasks, key=lambda t: t["due_date"])
+
+
+def test_index_matches_scan_through_random_edits():
+    rng = random.Random(7)
+    data = {"users": [{"id": f"u{i}", "display_name": str(i)} for i in range(3)], "tasks": []}
+    live = []
+    for n in range(400):
+        if live and rng.random() < 0.3:
+            task = live.pop(rng.randrange(len(live)))
+            assert index.remove_task(data, task["user_id"], task["id"])
+        else:
+            task = {"id": f"t{n}", "user_id": f"u{rng.randrange(3)}",
+                    "due_date": f"2025-01-{rng.randint(1, 9):02d}"}
+            index.add_task(data, task)
+            live.append(task)
+    # insertion order breaks due-date ties, as the old stable sort did
+    for uid in ("u0", "u1", "u2"):
+        expected = sorted((t for t in live if t["user_id"] == uid), key=lambda t: t["due_date"])
+        assert index.user_tasks(data, uid) == expected
+    assert index.build(data)["tasks"] == data["index"]["tasks"]
+    assert index.get_user(data, "u2") == {"id": "u2", "display_name": "2"}
+    assert index.get_user(data, "nope") is None
+
+
+def test_remove_checks_owner():
+    data = {"users": [], "tasks": []}
+    index.add_task(data, {"id": "t1", "user_id": "a", "due_date": "2025-01-01"})
+    assert not index.remove_task(data, "b", "t1")
+    assert not index.remove_task(data, "a", "t2")
+    assert index.remove_task(data, "a", "t1")
+    assert data["tasks"] == [] and data["index"]["by_user"] == {}
+
+
+def test_index_persists_and_stale_index_is_rebuilt(tmp_path):
+    path = tmp_path / "tasks.json"
+    engine = storage.JsonEngine(str(path))
+    engine.add_user({"id": "u1", "display_name": "A"})
+    engine.add_task({"id": "t1", "user_id": "u1", "title": "x", "due_date": "2025-02-01"})
+    on_disk = json.loads(path.read_text())
+    assert "index" not in on_disk
+    sidecar = json.loads((tmp_path / "tasks.json.idx").read_text())
+    assert sidecar["index"]["by_user"]["u1"]["ids"] == ["t1"]
+
+    # a writer that doesn't know about the index appends a task
+    on_disk["tasks"].append({"id": "t0", "user_id": "u1", "title": "y", "due_date": "2025-01-01"})
+    path.write_text(json.dumps(on_disk))
+    assert [t["id"] for t in engine.list_tasks("u1")] == ["t0", "t1"]
+
+
+def test_digest_is_kept_up_to_date_by_edits():
+    rng = random.Random(3)
+    data = {"users": [], "tasks": []}
+    for i in range(3):
+        index.add_user(data, {"id": f"u{i}", "display_name": str(i)})
+    live = []
+    for n in range(200):
+        if live and rng.random() < 0.4:
+            task = live.pop(rng.randrange(len(live)))
+            index.remove_task(data, task["user_id"], task["id"])
+        else:
+            task = {"id": f"t{n}", "user_id": f"u{rng.randrange(3)}", "due_date": f"2025-01-{rng.randint(1, 9):02d}"}
+            index.add_task(data, task)
+            live.append(task)
+        assert data["index"]["digest"] == index.digest(data)
+
+
+def test_edits_that_keep_the_counts_are_caught(tmp_path):
+    path = tmp_path / "tasks.json"
+    engine = storage.JsonEngine(str(path))
+    engine.add_user({"id": "u1", "display_name": "A"})
+    engine.add_user({"id": "u2", "display_name": "B"})
+    engine.add_task({"id": "t1", "user_id": "u1", "title": "x", "due_date": "2025-01-01"})
+    engine.add_task({"id": "t2", "user_id": "u1", "title": "y", "due_date": "2025-02-01"})
+
+    # a due date changed by hand
+    on_disk = json.loads(path.read_text())
+    on_disk["tasks"][0]["due_date"] = "2025-03-01"
+    path.write_text(json.dumps(on_disk))
+    assert [t["id"] for t in engine.list_tasks("u1")] == ["t2", "t1"]
+
+    # an index-unaware writer removes t1 and adds another user's task: same counts
+    on_disk = json.loads(path.read_text())
+    on_disk["tasks"] = [t for t in on_disk["tasks"] if t["id"] != "t1"]
+    on_disk["tasks"].insert(0, {"id": "t3", "user_id": "u2", "title": "z", "due_date": "2025-01-15"})
+    path.write_text(json.dumps(on_disk))
+    assert [t["id"] for t in engine.list_tasks("u1")] == ["t2"]
+    assert [t["id"] for t in engine.list_tasks("u2")] == ["t3"]
+
+
+def test_sidecar_is_trusted_by_stamp_and_checked_only_when_that_changes(tmp_path, monkeypatch):
+    path = tmp_path / "tasks.json"
+    engine = storage.JsonEngine(str(path))
+    engine.add_user({"id": "u1", "display_name": "A"})
+    engine.add_task({"id": "t1", "user_id": "u1", "title": "x", "due_date": "2025-02-01"})
+    digests = []
+    real_digest = index.digest
+    monkeypatch.setattr(index, "digest", lambda data: digests.append(1) or real_digest(data))
+    monkeypatch.setattr(index, "build", lambda data: pytest.fail("index rebuilt"))
+    assert [t["id"] for t in engine.list_tasks("u1")] == ["t1"]
+    assert digests == []
+
+    # the same content written again (say, restored from a copy): new stamp, same digest
+    path.write_text(path.read_text())
+    assert [t["id"] for t in engine.list_tasks("u1")] == ["t1"]
+    assert digests == [1]
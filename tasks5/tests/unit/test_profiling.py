@@ -0,0 +1,29 @@
+import io
+import threading
+
+from src import profiling
+
+
+def test_span_is_a_shared_noop_until_started():
+    assert profiling.span("read") is profiling.span("parse")
+
+
+def test_breakdown_separates_self_time_per_thread():
+    out = io.StringIO()
+    profiling.start(profile=True, trace_path="")
+    try:
+        with profiling.span("outer"):
+            with profiling.span("inner"):
+                pass
+            t = threading.Thread(target=lambda: profiling.span("other").__enter__().__exit__())
+            t.start()
+            t.join()
+        phases = profiling.phases()
+    finally:
+        profiling.stop(out)
+    calls, total, own = phases["outer"]
+    assert calls == 1 and abs(own - (total - phases["inner"][1])) < 1e-9
+    # a span on another thread does not nest under this thread's spans
+    assert phases["other"][0] == 1
+    assert out.getvalue().splitlines()[0].split() == ["phase", "calls", "total", "ms", "self", "ms", "self", "%"]
+    assert profiling.span("outer") is profiling.span("inner")
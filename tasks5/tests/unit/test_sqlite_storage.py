@@ -0,0 +1,69 @@
+import json
+from src import storage
+from src.sqlite_storage import SqliteEngine
+
+
+def exercise(engine):
+    engine.add_user({"id": "u2", "display_name": "Zed"})
+    engine.add_user({"id": "u1", "display_name": "Amy"})
+    for i, due in enumerate(["2025-12-03", "2025-12-01", "2025-12-03", "2025-11-30"]):
+        engine.add_task({"id": f"t{i}", "user_id": "u1", "title": f"task {i}", "due_date": due,
+                         "category": None if i % 2 else "home", "created_at": "2025-11-18T12:00:00Z"})
+    engine.add_task({"id": "t9", "user_id": "u2", "title": "other", "due_date": "2025-01-01",
+                     "category": "x", "created_at": "2025-11-18T12:00:00Z"})
+    assert engine.remove_task("u1", "t1")
+    assert not engine.remove_task("u2", "t0")
+    return engine.list_users(), engine.list_tasks("u1"), engine.get_user("u2"), engine.get_user("nope")
+
+
+def test_sqlite_engine_matches_json_engine(tmp_path):
+    json_result = exercise(storage.JsonEngine(str(tmp_path / "tasks.json")))
+    sqlite_result = exercise(SqliteEngine(str(tmp_path / "tasks.db")))
+    assert sqlite_result == json_result
+    assert [t["id"] for t in sqlite_result[1]] == ["t3", "t0", "t2"]
+
+
+def test_sqlite_save_and_load_data(tmp_path):
+    engine = SqliteEngine(str(tmp_path / "tasks.db"))
+    data = {"users": [{"id": "u1", "display_name": "A"}],
+            "tasks": [{"id": "t1", "user_id": "u1", "title": "x", "due_date": "2025-01-01",
+                       "category": None, "created_at": "2025-01-01T00:00:00Z"}]}
+    engine.save_data(data)
+    assert engine.load_data() == data
+
+
+def test_migrate_json_to_sqlite(tmp_path, monkeypatch):
+    src = tmp_path / "tasks.json"
+    src.write_text(json.dumps({
+        "users": [{"id": "u1", "display_name": "A"}],
+        "tasks": [{"id": "t1", "user_id": "u1", "title": "x", "due_date": "2025-01-01",
+                   "category": "c", "created_at": "2025-01-01T00:00:00Z"}],
+    }))
+    monkeypatch.setenv("TASKS_STORE", "sqlite:///" + str(tmp_path / "tasks.db"))
+    engine = storage.get_engine()
+    assert isinstance(engine, SqliteEngine)
+    assert storage.migrate(str(src), engine) == {"users": 1, "tasks": 1}
+    assert storage.migrate(str(src), engine) == {"users": 0, "tasks": 0}
+    assert engine.list_tasks("u1")[0]["title"] == "x"
+
+
+def test_list_tasks_filters_match_between_engines(tmp_path):
+    import itertools
+    import pytest
+    engines = [storage.JsonEngine(str(tmp_path / "tasks.json")), SqliteEngine(str(tmp_path / "tasks.db"))]
+    for engine in engines:
+        engine.add_user({"id": "u1", "display_name": "A"})
+        for i in range(30):
+            engine.add_task({"id": f"t{i:02d}", "user_id": "u1" if i % 5 else "u2", "title": str(i),
+                             "due_date": f"2025-03-{i % 7 + 1:02d}", "category": "ab"[i % 2],
+                             "created_at": "2025-01-01T00:00:00Z"})
+    combos = itertools.product([None, "2025-03-03"], [None, "2025-03-05"], [None, "a"], [None, 4],
+                               [None, "t13", "t08"])
+    for due_from, due_to, category, limit, after in combos:
+        results = [[t["id"] for t in e.list_tasks("u1", due_from=due_from, due_to=due_to,
+                                                  category=category, limit=limit, after=after)]
+                   for e in engines]
+        assert results[0] == results[1], (due_from, due_to, category, limit, after)
+    for engine in engines:
+        with pytest.raises(ValueError):
+            engine.list_tasks("u1", after="t05")  # belongs to u2
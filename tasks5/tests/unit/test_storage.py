@@ -1,5 +1,8 @@
 import os
 import json
+import threading
+import time
+import pytest
 from src import storage
 
 
@@ -11,3 +14,110 @@ def test_save_and_load(tmp_path, monkeypatch):
     assert f.exists()
     loaded = storage.load_data()
     assert loaded == data
+
+
+def test_stale_save_raises_conflict(tmp_path, monkeypatch):
+    f = tmp_path / "tasks.json"
+    monkeypatch.setenv("TASKS_FILE", str(f))
+    storage.save_data({"users": [], "tasks": []})
+    first = storage.load_data()
+    second = storage.load_data()
+    first["users"].append({"id": "a", "display_name": "A"})
+    storage.save_data(first)
+    second["users"].append({"id": "b", "display_name": "B"})
+    with pytest.raises(storage.ConflictError):
+        storage.save_data(second)
+    assert storage.load_data()["users"] == [{"id": "a", "display_name": "A"}]
+    assert storage.load_data()["version"] == 2
+
+
+def test_save_checks_version_without_reparsing(tmp_path, monkeypatch):
+    f = tmp_path / "tasks.json"
+    monkeypatch.setenv("TASKS_FILE", str(f))
+    storage.save_data({"users": [], "tasks": []})
+    data = storage.load_data()
+    parses = []
+    real_loads = json.loads
+    monkeypatch.setattr(json, "loads", lambda s, *a, **kw: parses.append(1) or real_loads(s, *a, **kw))
+    data["users"].append({"id": "a", "display_name": "A"})
+    storage.save_data(data)
+    storage.save_data(data)
+    assert parses == []
+
+
+def test_save_still_sees_an_outside_write(tmp_path, monkeypatch):
+    f = tmp_path / "tasks.json"
+    monkeypatch.setenv("TASKS_FILE", str(f))
+    storage.save_data({"users": [], "tasks": []})
+    data = storage.load_data()
+    # another process rewrites the file, same size, behind our back
+    outside = dict(data, version=data["version"] + 1)
+    f.write_text(json.dumps(outside, indent=2), encoding="utf-8")
+    with pytest.raises(storage.ConflictError):
+        storage.save_data(data)
+
+
+def test_lock_and_batch_are_per_thread_and_per_path(tmp_path):
+    first, second = str(tmp_path / "first.json"), str(tmp_path / "second.json")
+    storage.save_data({"users": [], "tasks": []}, first)
+    storage.save_data({"users": [], "tasks": []}, second)
+    events = []
+    holding, trying, saved = threading.Event(), threading.Event(), threading.Event()
+
+    def holder():
+        with storage.batch(first):
+            # a lock on another file is a real lock, not a nested one
+            with storage.lock(second):
+                events.append("holder locked second")
+                holding.set()
+                trying.wait(5)
+                time.sleep(0.1)  # give `other` time to get past lock() if it could
+                events.append("holder unlocks second")
+            saved.wait(5)
+
+    def other():
+        holding.wait(5)
+        trying.set()
+        # neither the lock nor the batch of the holder thread applies here
+        with storage.lock(second):
+            events.append("other locked second")
+        data = storage.load_data(second)
+        data["users"].append({"id": "b", "display_name": "B"})
+        storage.save_data(data, second)
+        with open(second, encoding="utf-8") as f:
+            events.append(f"other saved version {json.load(f)['version']}")
+        saved.set()
+
+    threads = [threading.Thread(target=holder), threading.Thread(target=other)]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join(5)
+    assert events == ["holder locked second", "holder unlocks second",
+                      "other locked second", "other saved version 2"]
+    assert storage.load_data(second)["users"] == [{"id": "b", "display_name": "B"}]
+
+
+@pytest.mark.parametrize("name", ["tasks.json", "tasks.db"])
+def test_threads_sharing_a_store_each_get_their_own_engine(tmp_path, monkeypatch, name):
+    monkeypatch.setenv("TASKS_FILE", str(tmp_path / name))
+    monkeypatch.delenv("TASKS_STORE", raising=False)
+    storage.get_engine().add_user({"id": "u", "display_name": "U"})
+    errors = []
+
+    def writer(n):
+        try:
+            for i in range(50):
+                storage.get_engine().add_task({
+                    "id": f"t{n}-{i}", "user_id": "u", "title": "x", "due_date": "2025-01-01",
+                    "category": None, "created_at": "2025-01-01T00:00:00Z"})
+        except Exception as exc:
+            errors.append(exc)
+
+    threads = [threading.Thread(target=writer, args=(n,)) for n in range(4)]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join(30)
+    assert errors == []
+    assert len(storage.get_engine().list_tasks("u")) == 200